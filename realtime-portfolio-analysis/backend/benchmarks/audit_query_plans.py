@@ -0,0 +1,127 @@
+"""
+Run EXPLAIN QUERY PLAN on the hot queries and fail on full table scans.
+
+Each query mirrors one issued by the REST endpoints or voice tools. The audit
+copies the database to a temporary file, applies the schema migrations to the
+copy, and reports every query whose plan contains a bare `SCAN <table>` step
+(a scan not served by an index). The exit status is 1 when any query degrades
+to a full scan, so the script can gate CI.
+
+Run from the backend directory:
+    python -m benchmarks.audit_query_plans
+    python -m benchmarks.audit_query_plans --db ../../voicebot_with_orders.sqlite3 --no-migrate
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+from datetime import date, timedelta
+
+from sqlalchemy import case, create_engine, func, select, text
+from sqlalchemy.exc import OperationalError
+
+from src.database.migrations import apply_migrations
+from src.database.models import (AssetHistory, AssetLatestPrice, AssetType, OrderBook, User, UserBankAccount,
+                                 UserPortfolio)
+
+DEFAULT_DB = os.path.join("src", "database", "voicebot.sqlite3")
+
+# "SCAN order_book" is a full scan; "SCAN order_book USING INDEX ..." walks an index
+FULL_SCAN = re.compile(r"^SCAN (?!\()(?!CONSTANT ROW)(\S+)(?!.*\bUSING\b)")
+
+
+def hot_queries(user_id: int, asset_id: int, ticker: str):
+    """Return (name, statement) pairs for the queries the audit checks."""
+    since = date.today() - timedelta(days=365)
+    return [
+        ("cash_balance_units",
+         select(UserPortfolio.asset_total_units)
+         .where(UserPortfolio.user_id == user_id, UserPortfolio.asset_id == asset_id)),
+        ("pending_buy_order_value",
+         select(func.sum(OrderBook.amount))
+         .where(OrderBook.user_id == user_id, OrderBook.buy_sell == 'Buy', OrderBook.order_status == 'Under Review')),
+        ("order_book_status",
+         select(OrderBook)
+         .where(OrderBook.user_id == user_id)
+         .order_by(case({'Under Review': 1, 'Placed': 2, 'Cancelled': 3}, value=OrderBook.order_status, else_=4))),
+        ("user_holdings",
+         select(UserPortfolio.asset_id, UserPortfolio.asset_total_units)
+         .where(UserPortfolio.user_id == user_id)),
+        ("portfolio_summary",
+         select(AssetType.asset_name, UserPortfolio.asset_total_units, AssetLatestPrice.close_price)
+         .select_from(User)
+         .join(UserPortfolio, User.user_id == UserPortfolio.user_id)
+         .join(AssetType, UserPortfolio.asset_id == AssetType.asset_id)
+         .outerjoin(AssetLatestPrice, AssetType.asset_id == AssetLatestPrice.asset_id)
+         .where(User.user_id == user_id)),
+        ("asset_price_history",
+         select(AssetHistory.date, AssetHistory.close_price)
+         .where(AssetHistory.asset_id == asset_id, AssetHistory.date >= since)
+         .order_by(AssetHistory.date)),
+        ("index_price_history",
+         select(AssetHistory.asset_id, AssetHistory.date, AssetHistory.close_price)
+         .where(AssetHistory.asset_id.in_([asset_id, asset_id + 1]), AssetHistory.date >= since)
+         .order_by(AssetHistory.date.desc())),
+        ("latest_db_price",
+         select(AssetLatestPrice.close_price, AssetLatestPrice.date)
+         .select_from(AssetLatestPrice)
+         .join(AssetType, AssetType.asset_id == AssetLatestPrice.asset_id)
+         .where(AssetType.asset_ticker == ticker)),
+        ("user_bank_accounts",
+         select(UserBankAccount)
+         .where(UserBankAccount.user_id == user_id, UserBankAccount.is_active == 1)),
+    ]
+
+
+def explain(conn, statement):
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def audit(db_path: str) -> int:
+    """Print the plan of every hot query and return the number of full scans found."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    failures = 0
+    with engine.connect() as conn:
+        user_id = conn.execute(select(func.min(UserPortfolio.user_id))).scalar() or 1
+        asset_id, ticker = conn.execute(
+            select(AssetType.asset_id, AssetType.asset_ticker).where(AssetType.asset_ticker != 'CASH').limit(1)
+        ).first() or (1, 'SPX')
+
+        for name, statement in hot_queries(user_id, asset_id, ticker):
+            try:
+                plan = explain(conn, statement)
+            except OperationalError as e:
+                # e.g. a table the database predates; run without --no-migrate to add it
+                failures += 1
+                print(f"FAIL {name}\n       {e.orig}")
+                continue
+            scans = [step for step in plan if FULL_SCAN.match(step)]
+            failures += bool(scans)
+            print(f"{'FAIL' if scans else 'ok  '} {name}")
+            for step in plan:
+                print(f"       {step}")
+    engine.dispose()
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN audit of the hot queries")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database to audit")
+    parser.add_argument("--no-migrate", action="store_true",
+                        help="Audit the database file as-is instead of a migrated copy")
+    args = parser.parse_args()
+
+    if args.no_migrate:
+        failures = audit(args.db)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            copy_path = os.path.join(tmp, os.path.basename(args.db))
+            shutil.copyfile(args.db, copy_path)
+            apply_migrations(create_engine(f"sqlite:///{copy_path}"))
+            failures = audit(copy_path)
+
+    print(f"\n{failures} quer{'y' if failures == 1 else 'ies'} with full table scans")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,106 @@
+"""
+Compare the unpooled and the pooled aiosqlite engine on the tool lookups.
+
+Each simulated tool call runs the way the tool executor runs an offloaded
+handler: `asyncio.run` on a worker thread, with its own AsyncSession. The
+call reads the user's phone number, available cash balance and holdings.
+Two profiles, each against its own temporary copy of the database:
+
+    nullpool  NullPool: every session opens an aiosqlite connection, starts
+              its thread and runs the pragmas (the previous engine)
+    pooled    create_async_sqlite_engine(read_only=True), as the tools use it
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_async_lookups --calls 2000 --workers 8
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.database import async_queries
+from src.database.async_database import create_async_sqlite_engine
+from src.database.database import create_sqlite_engine, install_sqlite_pragmas, sqlite_settings
+from src.database.migrations import apply_migrations
+from src.database.models import User, UserPortfolio
+
+DEFAULT_DB = os.path.join("src", "database", "voicebot.sqlite3")
+
+
+def make_engine(profile, url):
+    if profile == "nullpool":
+        engine = create_async_engine(url, poolclass=NullPool)
+        install_sqlite_pragmas(engine.sync_engine, sqlite_settings(), read_only=True)
+        return engine
+    return create_async_sqlite_engine(url, read_only=True)
+
+
+async def tool_call(sessionmaker, user_id):
+    async with sessionmaker() as db:
+        await async_queries.get_phone_number(db, user_id)
+        await async_queries.get_available_cash_balance(db, user_id)
+        holdings = await db.scalars(select(UserPortfolio).where(UserPortfolio.user_id == user_id))
+        return len(holdings.all())
+
+
+def run_profile(profile, url, user_ids, calls, workers):
+    engine = make_engine(profile, url)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+
+    def one_call(i):
+        started = time.perf_counter()
+        asyncio.run(tool_call(sessionmaker, user_ids[i % len(user_ids)]))
+        return (time.perf_counter() - started) * 1000
+
+    # The first connection of an engine must not be raced (see create_async_sqlite_engine)
+    one_call(0)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tool") as pool:
+        list(pool.map(one_call, range(workers)))  # warm up
+        started = time.perf_counter()
+        latencies = sorted(pool.map(one_call, range(calls)))
+        elapsed = time.perf_counter() - started
+    opened = engine.pool.checkedin() if profile == "pooled" else "-"
+    # The pool's connections are closed on the loop that disposes of it
+    asyncio.run(engine.dispose())
+    return {
+        "calls_per_s": calls / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "idle_connections": opened,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'profile':<9} {'calls/s':>9} {'p50_ms':>8} {'p95_ms':>8} {'idle_conns':>10}")
+    for profile in ("nullpool", "pooled"):
+        with tempfile.TemporaryDirectory() as tmp:
+            copy_path = os.path.join(tmp, "voicebot.sqlite3")
+            shutil.copyfile(args.db, copy_path)
+            setup_engine = create_sqlite_engine(f"sqlite:///{copy_path}", pool_size=1)
+            apply_migrations(setup_engine)
+            with setup_engine.connect() as conn:
+                user_ids = conn.scalars(select(User.user_id)).all()
+            setup_engine.dispose()
+
+            row = run_profile(profile, f"sqlite+aiosqlite:///{copy_path}", user_ids, args.calls, args.workers)
+            print(f"{profile:<9} {row['calls_per_s']:>9.0f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                  f"{row['idle_connections']:>10}")
+
+
+if __name__ == "__main__":
+    main()
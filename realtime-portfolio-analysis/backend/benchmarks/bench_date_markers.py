@@ -0,0 +1,103 @@
+"""
+Check and time the vectorized date markers against the original row-wise helpers.
+
+Builds a portfolio-plus-indices line chart frame like get_portfolio_benchmark
+does (business days with random market holidays, one series per dimension)
+and verifies that week_end_mask, month_end_mask, quarter_end_mask and
+year_end_mask select exactly the rows the original per-row helpers did.
+Exits 1 on any mismatch. Run from the backend directory:
+
+    python -m benchmarks.bench_date_markers --years 5 --series 4
+"""
+import argparse
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.components.date_markers import month_end_mask, quarter_end_mask, week_end_mask, year_end_mask
+
+
+# Original helpers from get_portfolio_benchmark, kept verbatim as the reference
+def is_working_day(date):
+    return date.weekday() < 5
+
+def is_month_end(date):
+    next_day = date + timedelta(days=1)
+    return next_day.month != date.month and is_working_day(date)
+
+def is_quarter_end(date):
+    if is_month_end(date) and date.month in (3, 6, 9, 12):
+        return True
+    return False
+
+def is_year_end(date):
+    return is_month_end(date) and date.month == 12
+
+def is_week_end(row, df):
+    current_date = row['date']
+    for day in range(4, -1, -1):
+        if current_date.weekday() == day:
+            next_day = current_date + pd.Timedelta(days=1)
+            if next_day in df['date'].values:
+                return False
+            return True
+    return False
+
+
+def make_line_chart(years, series, seed=5):
+    """Concatenated daily series with `date` as datetime.date objects, as the tool builds it."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2025-06-30", periods=int(years * 261))
+    holidays = rng.random(len(dates)) < 0.04
+    frames = []
+    for i in range(series):
+        # Each series misses a few extra days so the union differs from every single series
+        keep = ~holidays & (rng.random(len(dates)) > 0.01)
+        frames.append(pd.DataFrame({
+            'date': dates[keep].date,
+            'dimension': f"S{i}",
+            'portfolio_return': rng.normal(0, 1, keep.sum()),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--series", type=int, default=4, help="Portfolio plus benchmark index series")
+    args = parser.parse_args()
+
+    df = make_line_chart(args.years, args.series)
+    print(f"{len(df)} rows, {args.series} series, {args.years} years")
+
+    started = time.perf_counter()
+    expected_week = df.apply(lambda row: is_week_end(row, df), axis=1).to_numpy()
+    reference_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual_week = week_end_mask(df['date'])
+    vectorized_s = time.perf_counter() - started
+
+    checks = {
+        "weekly": (actual_week, expected_week),
+        "monthly": (month_end_mask(df['date']), df['date'].apply(is_month_end).to_numpy()),
+        "quarterly": (quarter_end_mask(df['date']), df['date'].apply(is_quarter_end).to_numpy()),
+        "yearly": (year_end_mask(df['date']), df['date'].apply(is_year_end).to_numpy()),
+    }
+    failures = 0
+    for name, (actual, expected) in checks.items():
+        mismatches = int((actual != expected.astype(bool)).sum())
+        failures += bool(mismatches)
+        print(f"{name:>9}: {int(expected.sum()):6d} rows marked, {'ok' if not mismatches else f'{mismatches} mismatches'}")
+
+    print(f"row-wise apply: {reference_s * 1000:10.1f} ms")
+    print(f"vectorized:     {vectorized_s * 1000:10.1f} ms")
+    print(f"speedup:        {reference_s / vectorized_s:10.1f}x")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
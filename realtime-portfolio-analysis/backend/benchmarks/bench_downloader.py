@@ -0,0 +1,87 @@
+"""
+Wall time of the market data downloader against a simulated slow, flaky source.
+
+The fake source answers each symbol after a random latency (lognormal around
+`--latency` seconds, with one straggler at `--slowest`) and fails a share of
+requests (`--failure-rate`) with a transient error. A multi-symbol request
+takes the sum of its symbols' latencies, as yfinance does with threads=False.
+Compares:
+
+    sequential  one symbol at a time, no retries (the old refresh loop)
+    parallel    MarketDataDownloader defaults: 8 workers, retries with backoff
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_downloader --tickers 25
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.components.market_data_downloader import MarketDataDownloader
+
+
+class FakeSource:
+    def __init__(self, tickers, latency, slowest, failure_rate, seed=11):
+        rng = random.Random(seed)
+        self.latency = {t: rng.lognormvariate(np.log(latency), 0.5) for t in tickers}
+        self.latency[tickers[-1]] = slowest
+        self.failure_rate = failure_rate
+        self.rng = rng
+        self.lock = threading.Lock()
+
+    def __call__(self, tickers, start, end, timeout):
+        time.sleep(sum(self.latency[t] for t in tickers))
+        with self.lock:
+            failed = self.rng.random() < self.failure_rate
+        if failed:
+            raise ConnectionError("simulated transient failure")
+        days = pd.bdate_range(start, end - timedelta(days=1))
+        return {t: pd.DataFrame({"Close": np.linspace(100, 110, len(days))}, index=days) for t in tickers}
+
+
+def run(name, downloader, tickers, start, end):
+    started = time.perf_counter()
+    frames = downloader(tickers, start, end)
+    elapsed = time.perf_counter() - started
+    report = downloader.last_report.values()
+    return {
+        "mode": name,
+        "seconds": elapsed,
+        "tickers ok": len(frames),
+        "failed": sum(1 for r in report if r.error),
+        "requests": sum(r.attempts for r in report),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.2, help="Typical seconds per symbol")
+    parser.add_argument("--slowest", type=float, default=1.0, help="Seconds for the slowest symbol")
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+    end = date.today()
+    start = end - timedelta(days=30)
+    source = FakeSource(tickers, args.latency, args.slowest, args.failure_rate)
+    print(f"sum of latencies {sum(source.latency.values()):.2f}s, slowest {max(source.latency.values()):.2f}s\n")
+
+    results = [
+        run("sequential", MarketDataDownloader(source, max_workers=1, retries=0), tickers, start, end),
+        run("parallel", MarketDataDownloader(source, backoff_seconds=0.1), tickers, start, end),
+    ]
+    columns = list(results[0])
+    print("  ".join(f"{c:>12}" for c in columns))
+    for result in results:
+        print("  ".join(f"{v:>12.2f}" if isinstance(v, float) else f"{v:>12}" for v in result.values()))
+
+
+if __name__ == "__main__":
+    main()
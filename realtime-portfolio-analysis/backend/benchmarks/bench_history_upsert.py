@@ -0,0 +1,106 @@
+"""
+Compare the per-row and the bulk upsert write path of the asset history refresh.
+
+Writes five years of synthetic daily closes for every non-cash asset into a
+temporary copy of the database, the way update_asset_history_table does after
+its downloads. Half of the days already exist (updates), half are new:
+
+    per-row  SELECT by (asset_id, date) then ORM update or add, one row at a time
+    bulk     upsert_close_prices: INSERT ... ON CONFLICT DO UPDATE, executemany
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_history_upsert --years 5
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from src.database.bulk_upsert import upsert_close_prices
+from src.database.database import create_sqlite_engine
+from src.database.migrations import apply_migrations
+from src.database.models import AssetHistory, AssetType
+
+DEFAULT_DB = os.path.join("src", "database", "voicebot.sqlite3")
+
+
+def synthetic_downloads(asset_ids, years, seed=7):
+    """yfinance-shaped frames (DatetimeIndex, 'Close' column) per asset."""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.today().normalize()
+    days = pd.bdate_range(end - pd.DateOffset(years=years), end)
+    return {
+        asset_id: pd.DataFrame({"Close": 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(days))))}, index=days)
+        for asset_id in asset_ids
+    }
+
+
+def write_per_row(session, asset_id, data):
+    """The write loop update_asset_history_table used before the bulk upsert."""
+    count = 0
+    for date_idx, row in data.iterrows():
+        close_price = row['Close']
+        if float(close_price) != 0:
+            existing_record = session.query(AssetHistory).filter_by(asset_id=asset_id, date=date_idx.date()).first()
+            if existing_record:
+                existing_record.close_price = float(close_price)
+                session.add(existing_record)
+            else:
+                session.add(AssetHistory(asset_id=asset_id, date=date_idx.date(), close_price=float(close_price)))
+            count += 1
+    session.commit()
+    return count
+
+
+def run(mode, db_path, years):
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_path = os.path.join(tmp, os.path.basename(db_path))
+        shutil.copyfile(db_path, copy_path)
+        engine = create_sqlite_engine(f"sqlite:///{copy_path}", echo=False, pool_size=1)
+        apply_migrations(engine)
+        Session = sessionmaker(bind=engine)
+        session = Session()
+        try:
+            asset_ids = session.scalars(select(AssetType.asset_id).where(AssetType.asset_ticker != 'CASH')).all()
+            downloads = synthetic_downloads(asset_ids, years)
+            # Keep only the first half of each download, so the refresh updates half and inserts half
+            cutoff = next(iter(downloads.values())).index[len(next(iter(downloads.values()))) // 2]
+            session.query(AssetHistory).delete()
+            session.commit()
+            for asset_id, data in downloads.items():
+                upsert_close_prices(session, asset_id, data.loc[:cutoff])
+
+            write = write_per_row if mode == "per-row" else upsert_close_prices
+            started = time.perf_counter()
+            written = sum(write(session, asset_id, data) for asset_id, data in downloads.items())
+            elapsed = time.perf_counter() - started
+            rows = session.scalar(select(func.count(AssetHistory.asset_hist_id)))
+        finally:
+            session.close()
+            engine.dispose()
+    return {"mode": mode, "assets": len(asset_ids), "rows written": written, "rows in table": rows,
+            "seconds": elapsed, "rows/s": written / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database to copy for each mode")
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [run(mode, args.db, args.years) for mode in ("per-row", "bulk")]
+    columns = list(results[0])
+    print("  ".join(f"{c:>14}" for c in columns))
+    for result in results:
+        print("  ".join(f"{v:>14.2f}" if isinstance(v, float) else f"{v:>14}" for v in result.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Cold-start time of the price history store: asset_history vs the columnar archive.
+
+Loads every series into a fresh PriceHistoryStore `--repeat` times from a
+temporary copy of the database:
+
+    database       _fetch_rows + _build_series through SQLAlchemy (the old start)
+    archive mmap   price_history_archive.load_series, memory-mapped views
+    archive read   price_history_archive.load_series, columns read into memory
+    fingerprint    table_fingerprint, the check the store makes before trusting the archive
+
+and reports the median and best time of each, plus the archive size on disk.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_price_archive --repeat 20
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from src.components import price_history_archive
+from src.components.price_history_store import PriceHistoryStore, _build_series, _fetch_rows
+from src.database.database import create_sqlite_engine
+from src.database.migrations import apply_migrations
+
+DEFAULT_DB = os.path.join("src", "database", "voicebot.sqlite3")
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_path = os.path.join(tmp, "voicebot.sqlite3")
+        archive_path = os.path.join(tmp, "price_history")
+        shutil.copyfile(args.db, copy_path)
+        engine = create_sqlite_engine(f"sqlite:///{copy_path}", echo=False, pool_size=1)
+        apply_migrations(engine)
+        session_factory = sessionmaker(bind=engine)
+
+        store = PriceHistoryStore(session_factory, archive_path=archive_path)
+        rows = store.load()
+        size = sum(os.path.getsize(os.path.join(archive_path, name)) for name in os.listdir(archive_path))
+        print(f"{rows} rows, {len(store._series)} assets, archive {size / 1024:.0f} KiB\n")
+
+        def from_database():
+            with session_factory() as session:
+                _build_series(*_fetch_rows(session))
+
+        def fingerprint():
+            with session_factory() as session:
+                price_history_archive.table_fingerprint(session)
+
+        results = [
+            ("database", timed(from_database, args.repeat)),
+            ("archive mmap", timed(lambda: price_history_archive.load_series(archive_path), args.repeat)),
+            ("archive read", timed(lambda: price_history_archive.load_series(archive_path, mmap=False), args.repeat)),
+            ("fingerprint", timed(fingerprint, args.repeat)),
+        ]
+        print(f"{'source':>14}  {'median ms':>10}  {'best ms':>10}")
+        for name, (median, best) in results:
+            print(f"{name:>14}  {median:>10.2f}  {best:>10.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare the serial quote loop against the concurrent QuoteEngine.
+
+Uses a stubbed quote source with a fixed upstream latency so it runs offline.
+The timeout defaults to the production QUOTE_ENGINE_TIMEOUT_SECONDS (3 s), so
+large sizes take the timeout path. Each size reports its stale symbols, and
+the stale symbols of a 5-symbol call made right after it: a timed-out request
+must not leave the pool busy for the next one. Run from the backend directory:
+
+    python -m benchmarks.bench_quote_engine --latency-ms 20 --sizes 5 50 500
+"""
+import argparse
+import os
+import random
+import time
+
+from src.components.quote_engine import QuoteEngine
+
+
+def make_stub_source(latency_s, failure_rate=0.0, seed=7):
+    rng = random.Random(seed)
+
+    def source(symbol):
+        time.sleep(latency_s)
+        if rng.random() < failure_rate:
+            raise RuntimeError(f"stubbed upstream failure for {symbol}")
+        return 100.0 + (hash(symbol) % 1000) / 10
+
+    return source
+
+
+def stub_fallback(symbol):
+    return 99.99, "stub"
+
+
+def serial_fetch(source, symbols):
+    """Mirrors the original one-symbol-at-a-time loop in get_realtime_prices_bulk."""
+    prices = {}
+    for symbol in symbols:
+        try:
+            prices[symbol] = round(float(source(symbol)), 2)
+        except Exception:
+            prices[symbol], _ = stub_fallback(symbol)
+    return prices
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=float(os.getenv("QUOTE_ENGINE_TIMEOUT_SECONDS", "3")))
+    args = parser.parse_args()
+
+    source = make_stub_source(args.latency_ms / 1000, args.failure_rate)
+    engine = QuoteEngine(source=source, fallback=stub_fallback, max_workers=args.workers, timeout=args.timeout)
+
+    print(f"{'symbols':>8} {'serial_ms':>10} {'engine_ms':>10} {'speedup':>8} {'stale':>6} {'next_stale':>10} {'next_ms':>8}")
+    for size in args.sizes:
+        symbols = [f"SYM{i:04d}" for i in range(size)]
+
+        started = time.perf_counter()
+        serial_prices = serial_fetch(source, symbols)
+        serial_ms = (time.perf_counter() - started) * 1000
+
+        result = engine.fetch(symbols)
+        assert set(result.prices) == set(serial_prices)
+        following = engine.fetch([f"NEXT{i}" for i in range(5)])
+
+        print(f"{size:>8} {serial_ms:>10.1f} {result.elapsed_ms:>10.1f} "
+              f"{serial_ms / max(result.elapsed_ms, 1e-6):>7.1f}x {len(result.stale):>6} "
+              f"{len(following.stale):>10} {following.elapsed_ms:>8.1f}")
+
+    engine.shutdown()
+
+
+if __name__ == "__main__":
+    main()
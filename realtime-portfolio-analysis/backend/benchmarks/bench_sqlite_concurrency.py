@@ -0,0 +1,161 @@
+"""
+Compare read/write throughput of the default and the tuned SQLite engine.
+
+N reader threads run the analytics queries the voice tools issue (portfolio
+summary and one year of price history) while one writer thread commits
+order-book transactions like confirm_trade does. Each profile runs against its
+own temporary copy of the database:
+
+    default  create_engine(url): rollback journal, synchronous=FULL, default pool
+    tuned    create_sqlite_engine(url): WAL, synchronous=NORMAL, cache/mmap
+             pragmas, readers on the read-only pool
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_sqlite_concurrency --readers 8 --seconds 10
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from src.database.database import create_sqlite_engine
+from src.database.migrations import apply_migrations
+from src.database.models import AssetHistory, AssetLatestPrice, AssetType, OrderBook, User, UserPortfolio
+
+DEFAULT_DB = os.path.join("src", "database", "voicebot.sqlite3")
+
+
+def make_engines(profile, url, readers):
+    """Return (write_engine, read_engine) for a profile."""
+    if profile == "default":
+        engine = create_engine(url)
+        return engine, engine
+    write_engine = create_sqlite_engine(url, echo=False, pool_size=2)
+    read_engine = create_sqlite_engine(url, echo=False, read_only=True, pool_size=readers)
+    return write_engine, read_engine
+
+
+def reader(Session, user_id, asset_ids, stop, latencies, errors):
+    since = date.today() - timedelta(days=365)
+    i = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        session = Session()
+        try:
+            session.execute(
+                select(AssetType.asset_name, UserPortfolio.asset_total_units, AssetLatestPrice.close_price)
+                .select_from(User)
+                .join(UserPortfolio, User.user_id == UserPortfolio.user_id)
+                .join(AssetType, UserPortfolio.asset_id == AssetType.asset_id)
+                .outerjoin(AssetLatestPrice, AssetType.asset_id == AssetLatestPrice.asset_id)
+                .where(User.user_id == user_id)
+            ).all()
+            session.execute(
+                select(AssetHistory.date, AssetHistory.close_price)
+                .where(AssetHistory.asset_id == asset_ids[i % len(asset_ids)], AssetHistory.date >= since)
+                .order_by(AssetHistory.date)
+            ).all()
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            errors.append(1)
+        finally:
+            session.close()
+        i += 1
+
+
+def writer(Session, user_id, asset_id, batch, stop, latencies, errors):
+    while not stop.is_set():
+        started = time.perf_counter()
+        session = Session()
+        try:
+            for _ in range(batch):
+                session.add(OrderBook(user_id=user_id, asset_id=asset_id, order_type='Market Open', symbol='BENCH',
+                                      buy_sell='Buy', unit_price=1.0, qty=1.0, amount=1.0,
+                                      order_status='Placed'))
+            session.execute(
+                update(UserPortfolio)
+                .where(UserPortfolio.user_id == user_id, UserPortfolio.asset_id == asset_id)
+                .values(asset_total_units=UserPortfolio.asset_total_units + 1)
+            )
+            session.commit()
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            session.rollback()
+            errors.append(1)
+        finally:
+            session.close()
+
+
+def run_profile(profile, db_path, readers, seconds, batch):
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_path = os.path.join(tmp, os.path.basename(db_path))
+        shutil.copyfile(db_path, copy_path)
+        url = f"sqlite:///{copy_path}"
+        setup_engine = create_engine(url)
+        apply_migrations(setup_engine)
+        with setup_engine.connect() as conn:
+            user_id = conn.execute(select(func.min(UserPortfolio.user_id))).scalar()
+            holding = conn.execute(select(UserPortfolio.asset_id).where(UserPortfolio.user_id == user_id)).scalar()
+            asset_ids = [row[0] for row in conn.execute(select(AssetLatestPrice.asset_id))]
+        setup_engine.dispose()
+
+        write_engine, read_engine = make_engines(profile, url, readers)
+        WriteSession = sessionmaker(bind=write_engine)
+        ReadSession = sessionmaker(bind=read_engine)
+
+        stop = threading.Event()
+        read_latencies, write_latencies, read_errors, write_errors = [], [], [], []
+        threads = [threading.Thread(target=reader, args=(ReadSession, user_id, asset_ids, stop, read_latencies, read_errors))
+                   for _ in range(readers)]
+        threads.append(threading.Thread(target=writer, args=(WriteSession, user_id, holding, batch, stop,
+                                                             write_latencies, write_errors)))
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        write_engine.dispose()
+        read_engine.dispose()
+
+    def p95(values):
+        return statistics.quantiles(values, n=20)[-1] * 1000 if len(values) >= 20 else float('nan')
+
+    return {
+        "profile": profile,
+        "reads/s": len(read_latencies) / seconds,
+        "read p95 ms": p95(read_latencies),
+        "read errors": len(read_errors),
+        "writes/s": len(write_latencies) / seconds,
+        "write p95 ms": p95(write_latencies),
+        "write errors": len(write_errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database to copy for each profile")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--batch", type=int, default=1, help="Orders inserted per write transaction")
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, 1 writer ({args.batch} rows per commit), {args.seconds:g}s per profile\n")
+    results = [run_profile(profile, args.db, args.readers, args.seconds, args.batch) for profile in ("default", "tuned")]
+    columns = list(results[0])
+    print("  ".join(f"{c:>12}" for c in columns))
+    for result in results:
+        print("  ".join(f"{v:>12.1f}" if isinstance(v, float) else f"{v:>12}" for v in result.values()))
+
+
+if __name__ == "__main__":
+    main()
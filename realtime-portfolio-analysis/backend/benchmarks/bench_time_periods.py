@@ -0,0 +1,174 @@
+"""
+Check and time the vectorized process_time_period_data against the original loop.
+
+The golden check compares both implementations on synthetic frames covering
+every interval, unsorted rows, duplicate dates, data gaps longer than one
+interval and NaN prices, and exits 1 on any mismatch. The timing run
+summarizes business-daily prices for many assets per group, as the portfolio
+benchmark and price trend tools do. Run from the backend directory:
+
+    python -m benchmarks.bench_time_periods --years 5 --assets 500
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from src.components.helper_functions import process_time_period_data
+
+INTERVALS = ['weekly', 'monthly', 'quarterly', 'yearly']
+
+
+def reference_process_time_period_data(asset_data, dimension_levels, interval, time_history):
+    """The original row-by-row implementation, kept verbatim as the golden reference."""
+    asset_data = asset_data.copy()
+    asset_data['last_available_date'] = asset_data.index
+    last_date = asset_data.index.max()
+    interval_str = interval
+    if interval == 'weekly':
+        interval = relativedelta(weeks=1)
+    elif interval == 'monthly':
+        interval = relativedelta(months=1)
+    elif interval == 'quarterly':
+        interval = relativedelta(months=3)
+    else:
+        interval = relativedelta(years=1)
+    start_date = last_date - relativedelta(years=time_history) - interval
+    target_dates = []
+    current_date = last_date
+    while current_date >= start_date:
+        target_dates.append(current_date)
+        current_date -= interval
+    result = pd.DataFrame()
+    for i in range(len(target_dates) - 1):
+        end_target = target_dates[i]
+        start_target = target_dates[i + 1]
+        end_actual = asset_data[asset_data.index <= end_target].index.max()
+        if pd.isnull(end_actual):
+            continue
+        start_actual = asset_data[(asset_data.index <= start_target) & (asset_data.index < end_actual)].index.max()
+        if pd.isnull(start_actual):
+            start_actual = asset_data.index.min()
+        period_data = asset_data[(asset_data.index > start_actual) & (asset_data.index <= end_actual)]
+        if not period_data.empty:
+            period_result = pd.DataFrame({
+                'aligned_date': [end_target],
+                'actual_date': [end_actual],
+                'year': [end_target.year],
+                'index_name': [period_data[dimension_levels[0]].iloc[-1]] if 'all' not in dimension_levels else "portfolio",
+                'open_price': [period_data['close_price'].iloc[0]],
+                'high_price': [period_data['close_price'].max()],
+                'low_price': [period_data['close_price'].min()],
+                'close_price': [period_data['close_price'].iloc[-1]],
+                'average_price': [period_data['close_price'].mean()],
+                'number_of_records': [len(period_data)],
+                'last_date': [period_data.index[-1]]
+            })
+            result = pd.concat([result, period_result], ignore_index=True)
+    if interval_str == 'weekly':
+        result['freq'] = result['actual_date'].dt.strftime('%Y-W%W')
+    elif interval_str == 'monthly':
+        result['freq'] = result['actual_date'].dt.strftime('%Y-%m')
+    elif interval_str == 'quarterly':
+        result['freq'] = result['actual_date'].dt.to_period('Q').astype(str)
+    else:
+        result['freq'] = result['actual_date'].dt.strftime('%Y')
+    return result
+
+
+def make_prices(n_assets, years, seed=11, shuffle=False, gaps=False, nans=False):
+    """Business-daily close prices for `n_assets` tickers, indexed by date."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2025-06-30", periods=int(years * 261))
+    frames = []
+    for asset in range(n_assets):
+        asset_dates = dates
+        if gaps:
+            # Drop random stretches longer than a quarter
+            keep = np.ones(len(dates), dtype=bool)
+            for start in rng.integers(0, len(dates), size=3):
+                keep[start:start + rng.integers(5, 90)] = False
+            asset_dates = dates[keep]
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(asset_dates))))
+        if nans:
+            closes[rng.random(len(closes)) < 0.02] = np.nan
+        frames.append(pd.DataFrame({
+            'date': asset_dates,
+            'close_price': closes,
+            'ticker': f"T{asset:04d}",
+            'asset_class': f"Class{asset % 4}",
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    if shuffle:
+        df = df.sample(frac=1, random_state=seed)
+    return df.set_index('date')
+
+
+def golden_check():
+    cases = [
+        ("sorted", make_prices(3, 6), ['ticker']),
+        ("unsorted", make_prices(3, 6, shuffle=True), ['ticker']),
+        ("gaps", make_prices(3, 6, gaps=True), ['ticker']),
+        ("nans", make_prices(3, 6, nans=True), ['ticker']),
+        ("duplicate dates", make_prices(4, 6, shuffle=True, gaps=True), ['asset_class']),
+        ("all", make_prices(4, 6, gaps=True), ['all']),
+    ]
+    failures = 0
+    for name, df, dimension_levels in cases:
+        group_col = dimension_levels[0] if 'all' not in dimension_levels else None
+        for interval in INTERVALS:
+            for time_history in (1, 2, 5):
+                if group_col:
+                    groups = [df[df[group_col] == value] for value in df[group_col].unique()]
+                else:
+                    groups = [df]
+                expected = pd.concat(
+                    [reference_process_time_period_data(g, dimension_levels, interval, time_history) for g in groups],
+                    ignore_index=True)
+                per_group = pd.concat(
+                    [process_time_period_data(g, dimension_levels, interval, time_history) for g in groups],
+                    ignore_index=True)
+                one_pass = process_time_period_data(df, dimension_levels, interval, time_history, group_by=group_col)
+                for label, actual in (("per group", per_group), ("one pass", one_pass)):
+                    try:
+                        pd.testing.assert_frame_equal(actual, expected, check_exact=False, rtol=1e-12)
+                    except AssertionError as e:
+                        failures += 1
+                        print(f"MISMATCH {name} {interval} {time_history}y ({label}): {e}")
+    print(f"golden check: {'ok' if not failures else f'{failures} mismatches'}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--assets", type=int, default=500)
+    parser.add_argument("--interval", default="weekly", choices=INTERVALS)
+    parser.add_argument("--skip-reference", action="store_true", help="Only time the vectorized implementation")
+    args = parser.parse_args()
+
+    if golden_check():
+        sys.exit(1)
+
+    df = make_prices(args.assets, args.years)
+    print(f"\n{len(df)} rows, {args.assets} assets, {args.years} years, {args.interval}")
+
+    started = time.perf_counter()
+    result = process_time_period_data(df, ['ticker'], args.interval, args.years, group_by='ticker')
+    vectorized_s = time.perf_counter() - started
+    print(f"vectorized (one pass): {vectorized_s * 1000:10.1f} ms  ({len(result)} periods)")
+
+    if not args.skip_reference:
+        started = time.perf_counter()
+        for ticker in df['ticker'].unique():
+            reference_process_time_period_data(df[df['ticker'] == ticker], ['ticker'], args.interval, args.years)
+        reference_s = time.perf_counter() - started
+        print(f"original loop:         {reference_s * 1000:10.1f} ms")
+        print(f"speedup:               {reference_s / vectorized_s:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Latency and peak memory of the voice tool handlers, per dataset size.
+
+Every tool is driven the way a call drives it: the handlers are registered
+through register_voice_tools on a fake LLM service, so offloaded tools run
+on the tool executor, and each call gets a real FunctionCallParams whose
+result_callback captures the result. The call's CallContext carries a stub
+websocket that records the frames send_json_to_websocket pushes, and the
+quote cache loads prices from asset_latest_price instead of Yahoo Finance,
+so no network access is needed.
+
+Each dataset runs in its own process, because the database URL is read at
+import time:
+
+    bundled   a copy of src/database/voicebot.sqlite3
+    <n>       generate_synthetic_db at scale n (1 = 100 users, 20 extra assets)
+    <path>    a copy of an existing database
+
+For every tool and dataset it reports p50/p95/max latency over `--calls`
+calls spread over `--users` users, then peak traced memory over
+`--memory-calls` further calls (tracemalloc slows the handlers, so those
+calls are not timed). Results are written as JSON; pass a previous file to
+--compare to print the p50/p95 ratios against it.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_tools --datasets bundled,1,10 --output bench_tools.json
+    python -m benchmarks.bench_tools --datasets bundled,1,10 --compare bench_tools.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+DEFAULT_DB = os.path.join("src", "database", "voicebot.sqlite3")
+SYNTHETIC_END = date(2025, 7, 15)  # fixed, so a synthetic dataset is the same on every run
+
+
+def tool_calls(user_id, tickers):
+    """(tool name, arguments) of every benchmarked call for one user."""
+    user_id = str(user_id)
+    return [
+        ("aggregation_tool", {"user_id": user_id, "aggregation_metric": "total portfolio value",
+                              "dimension_levels": ["Asset Class", "Sector"], "visualization_types": "donut"}),
+        # The stacked bar chart of returns is built per sector (transform_to_stack_bar_chart_format)
+        ("aggregation_tool:returns", {"user_id": user_id, "aggregation_metric": "percentage returns",
+                                      "dimension_levels": ["Sector"], "visualization_types": "bar"}),
+        ("portfolio_benchmark_tool", {"user_id": user_id, "time_history": 2, "benchmark_against": ["SPX"],
+                                      "interval": "quarterly"}),
+        ("relative_performance_tool", {"user_id": user_id, "time_history": "1year"}),
+        ("risk_score_tool", {"user_id": user_id, "dimension_levels": ["Asset Class"]}),
+        ("attribution_returns_tool", {"user_id": user_id, "time_history": "1year", "dimension_levels": ["Asset Class"]}),
+        ("get_price_trend_tool", {"user_id": user_id, "ticker_value": tickers[:2], "time_history": 2}),
+        ("place_trade_tool", {"user_id": user_id, "symbol": tickers[0], "quantity": 1, "order_type": "market",
+                              "action": "buy"}),
+        ("check_order_status_tool", {"user_id": user_id}),
+    ]
+
+
+class StubWebSocket:
+    """Connected websocket that counts the frames sent to it instead of sending them."""
+
+    def __init__(self):
+        from fastapi.websockets import WebSocketState
+
+        self.client_state = WebSocketState.CONNECTED
+        self.frames = 0
+        self.bytes = 0
+
+    async def send_json(self, data):
+        await self.send_text(json.dumps(data, default=str))
+
+    async def send_text(self, data):
+        self.frames += 1
+        self.bytes += len(data.encode())
+
+
+class FakeLLM:
+    """Stands in for the realtime LLM service: collects the registered handlers and carries the call context."""
+
+    def __init__(self):
+        self.handlers = {}
+        self.call_context = None
+
+    def register_function(self, name, handler):
+        self.handlers[name] = handler
+
+
+async def call_tool(llm, name, arguments):
+    """Invoke a registered tool once; returns (seconds, result or None, error or None)."""
+    from pipecat.services.llm_service import FunctionCallParams
+
+    results = []
+
+    async def result_callback(result, **kwargs):
+        results.append(result)
+
+    params = FunctionCallParams(function_name=name, tool_call_id=str(uuid.uuid4()), arguments=arguments,
+                                llm=llm, context=None, result_callback=result_callback)
+    started = time.perf_counter()
+    try:
+        await llm.handlers[name](params)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return time.perf_counter() - started, results[-1] if results else None, error
+
+
+async def run_dataset(calls, memory_calls, users, seed):
+    """Benchmark every tool against the database in DATABASE_URL; runs in the child process."""
+    from sqlalchemy import select
+
+    from src.components import controller
+    from src.components.call_context import CallContext
+    from src.components.price_history_store import price_history_store
+    from src.components.quote_cache import quote_cache
+    from src.components.reference_catalog import reference_catalog
+    from src.database.database import ReadSessionLocal, engine
+    from src.database.migrations import apply_migrations
+    from src.database.models import AssetLatestPrice, AssetType, User, UserPortfolio
+
+    apply_migrations(engine)
+    reference_catalog.load()
+    price_history_store.load()
+
+    with ReadSessionLocal() as session:
+        latest = dict(session.execute(select(AssetType.asset_ticker, AssetLatestPrice.close_price)
+                                      .join(AssetLatestPrice, AssetLatestPrice.asset_id == AssetType.asset_id)).all())
+        user_rows = session.execute(select(User.user_id, User.phone_number).order_by(User.user_id)).all()
+        rng = np.random.default_rng(seed)
+        picked = [user_rows[i] for i in sorted(rng.choice(len(user_rows), size=min(users, len(user_rows)), replace=False))]
+        holdings = {
+            user_id: session.scalars(
+                select(AssetType.asset_ticker).join(UserPortfolio, UserPortfolio.asset_id == AssetType.asset_id)
+                .where(UserPortfolio.user_id == user_id, AssetType.asset_class.in_(["Stock", "ETF"]))
+                .order_by(AssetType.asset_ticker)
+            ).all() or ["AAPL"]
+            for user_id, _ in picked
+        }
+
+    # Offline price source: every quote is the latest stored close
+    quote_cache.loader = lambda symbol: {"currentPrice": latest.get(symbol)}
+    quote_cache.invalidate()
+
+    sessions = []
+    for user_id, phone_number in picked:
+        llm = FakeLLM()
+        controller.register_voice_tools(llm)
+        llm.call_context = CallContext(connection_id=str(uuid.uuid4()), phone_number=phone_number,
+                                       websocket=StubWebSocket())
+        _, result, error = await call_tool(llm, "authenticate_user_tool",
+                                           {"phonenumber": phone_number, "date_of_birth": ""})
+        if error or not llm.call_context.is_authenticated:
+            raise RuntimeError(f"Could not authenticate user {user_id}: {error or result}")
+        sessions.append((llm, tool_calls(user_id, holdings[user_id])))
+
+    results = {}
+    names = [name for name, _ in sessions[0][1]]
+    for index, label in enumerate(names):
+        tool = label.split(":")[0]
+        seconds, errors, frames, sent = [], 0, 0, 0
+        for i in range(calls + memory_calls):
+            llm, plan = sessions[i % len(sessions)]
+            websocket = llm.call_context.websocket
+            frames_before, bytes_before = websocket.frames, websocket.bytes
+            if i == calls:
+                tracemalloc.start()
+            if i >= calls:
+                tracemalloc.reset_peak()
+            elapsed, _, error = await call_tool(llm, tool, plan[index][1])
+            if i < calls:
+                seconds.append(elapsed)
+                errors += error is not None
+                frames += websocket.frames - frames_before
+                sent += websocket.bytes - bytes_before
+        peak = tracemalloc.get_traced_memory()[1] if memory_calls else None
+        tracemalloc.stop()
+        ms = np.array(seconds) * 1000
+        results[label] = {
+            "calls": calls,
+            "errors": errors,
+            "all_failed": errors == calls,  # then the latencies only time the error path
+            "p50_ms": round(float(np.percentile(ms, 50)), 2),
+            "p95_ms": round(float(np.percentile(ms, 95)), 2),
+            "max_ms": round(float(ms.max()), 2),
+            "mean_ms": round(float(ms.mean()), 2),
+            "peak_kib": round(peak / 1024, 1) if peak is not None else None,
+            "ws_frames_per_call": round(frames / calls, 2),
+            "ws_kib_per_call": round(sent / calls / 1024, 2),
+        }
+    with ReadSessionLocal() as session:
+        size = {"users": session.query(User).count(), "assets": session.query(AssetType).count(),
+                "price_rows": price_history_store.stats()["rows"]}
+    return {"size": size, "tools": results, "tool_executor": controller.tool_executor.stats()}
+
+
+def prepare_dataset(name, tmp):
+    """Path of a private copy (or a freshly generated database) for dataset `name`."""
+    path = os.path.join(tmp, f"{name.replace(os.sep, '_')}.sqlite3")
+    if name == "bundled":
+        shutil.copyfile(DEFAULT_DB, path)
+    elif name.replace(".", "", 1).isdigit():
+        from generate_synthetic_db import SyntheticConfig, generate
+
+        generate(path, SyntheticConfig.scaled(float(name), end=SYNTHETIC_END))
+    else:
+        shutil.copyfile(name, path)
+    return path
+
+
+def print_table(report, baseline=None):
+    header = f"{'dataset':>10}  {'tool':<28} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'peak KiB':>10} {'errors':>6}"
+    if baseline:
+        header += f" {'p50 x':>7} {'p95 x':>7}"
+    print(header)
+    for dataset, result in report["datasets"].items():
+        for tool, stats in result["tools"].items():
+            line = (f"{dataset:>10}  {tool:<28} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['max_ms']:>9.2f} "
+                    f"{stats['peak_kib'] if stats['peak_kib'] is not None else '-':>10} {stats['errors']:>6}")
+            before = (baseline or {}).get("datasets", {}).get(dataset, {}).get("tools", {}).get(tool)
+            if before:
+                line += (f" {stats['p50_ms'] / max(before['p50_ms'], 1e-9):>7.2f}"
+                         f" {stats['p95_ms'] / max(before['p95_ms'], 1e-9):>7.2f}")
+            if stats.get("all_failed"):
+                line += "  ALL CALLS FAILED"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--datasets", default="bundled,1,10",
+                        help="Comma-separated: 'bundled', a synthetic scale, or a database path")
+    parser.add_argument("--calls", type=int, default=30, help="Timed calls per tool and dataset")
+    parser.add_argument("--memory-calls", type=int, default=3, help="Calls per tool traced for peak memory")
+    parser.add_argument("--users", type=int, default=10, help="Users the calls are spread over")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare against")
+    parser.add_argument("--child", help=argparse.SUPPRESS)  # result file; set when running one dataset
+    args = parser.parse_args()
+
+    if args.child:
+        result = asyncio.run(run_dataset(args.calls, args.memory_calls, args.users, args.seed))
+        with open(args.child, "w") as f:
+            json.dump(result, f)
+        return
+
+    report = {
+        "benchmark": "bench_tools",
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "commit": subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip(),
+        "args": {"calls": args.calls, "memory_calls": args.memory_calls, "users": args.users, "seed": args.seed},
+        "datasets": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for dataset in args.datasets.split(","):
+            path = prepare_dataset(dataset, tmp)
+            result_file = os.path.join(tmp, "result.json")
+            env = {**os.environ, "DATABASE_URL": f"sqlite:///{path}", "HISTORY_REFRESH_INTERVAL_SECONDS": "0"}
+            print(f"running {dataset} ({path})", file=sys.stderr)
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_tools", "--child", result_file,
+                            "--calls", str(args.calls), "--memory-calls", str(args.memory_calls),
+                            "--users", str(args.users), "--seed", str(args.seed)],
+                           env=env, check=True, stdout=subprocess.DEVNULL)
+            with open(result_file) as f:
+                report["datasets"][dataset] = json.load(f)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.output}")
+    failed = [f"{dataset}/{tool}" for dataset, result in report["datasets"].items()
+              for tool, stats in result["tools"].items() if stats["all_failed"]]
+    if failed:
+        sys.exit(f"\nEvery call failed for {', '.join(failed)}; their latencies are not meaningful")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Offline check of the incremental asset history refresh.
+
+Runs refresh_history against a temporary copy of the database with a fake
+downloader that records every request and serves synthetic closes, and
+checks that:
+
+  * an up-to-date table downloads only the overlap window
+  * after a gap, each ticker is requested from its newest close minus the
+    overlap, with tickers sharing a start date in one multi-symbol request
+  * a ticker without history is requested for the whole retention window
+  * revised closes inside the overlap window overwrite the stored ones
+  * full mode requests the whole window for every ticker
+  * watermarks record the newest date per ticker
+
+No network access is needed. Run from the backend directory:
+
+    python -m benchmarks.check_incremental_refresh
+    python -m benchmarks.check_incremental_refresh --db /tmp/voicebot_10x.sqlite3
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from src.components.history_refresh import HISTORY_YEARS, refresh_history
+from src.database.database import create_sqlite_engine
+from src.database.migrations import apply_migrations
+from src.database.models import AssetHistory, AssetHistoryWatermark, AssetType
+
+DEFAULT_DB = os.path.join("src", "database", "voicebot.sqlite3")
+OVERLAP = 5
+
+
+class FakeDownloader:
+    """Serves a close of `bump + day ordinal` per business day and records the requests."""
+
+    def __init__(self, bump=0.0):
+        self.bump = bump
+        self.requests = []
+
+    def __call__(self, tickers, start, end):
+        self.requests.append((start, end, list(tickers)))
+        days = pd.bdate_range(start, end - timedelta(days=1))
+        closes = np.array([d.toordinal() for d in days], dtype=float) + self.bump
+        return {ticker: pd.DataFrame({"Close": closes}, index=days) for ticker in tickers}
+
+
+def last_dates(session):
+    rows = session.execute(
+        select(AssetType.asset_ticker, func.max(AssetHistory.date))
+        .join(AssetHistory, AssetHistory.asset_id == AssetType.asset_id)
+        .group_by(AssetType.asset_ticker)
+    ).all()
+    return dict(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DEFAULT_DB, help="Database to copy, e.g. one from generate_synthetic_db.py")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_path = os.path.join(tmp, "voicebot.sqlite3")
+        shutil.copyfile(args.db, copy_path)
+        engine = create_sqlite_engine(f"sqlite:///{copy_path}", echo=False, pool_size=1)
+        apply_migrations(engine)
+        session = sessionmaker(bind=engine)()
+
+        tickers = session.scalars(select(AssetType.asset_ticker).where(AssetType.asset_ticker != 'CASH')).all()
+        stored = last_dates(session)
+        newest = max(stored.values())
+
+        # 1. Nothing missing: only the overlap window is requested
+        fake = FakeDownloader()
+        refresh_history(session, fake, today=newest + timedelta(days=1), overlap_days=OVERLAP)
+        starts = {start for start, _, _ in fake.requests}
+        assert all(start >= newest - timedelta(days=OVERLAP + 7) for start in starts), fake.requests
+        print(f"up to date: {len(fake.requests)} request(s) starting {sorted(starts)}")
+
+        # 2. A ten day gap and one ticker without history
+        dropped = tickers[0]
+        dropped_id = session.scalar(select(AssetType.asset_id).where(AssetType.asset_ticker == dropped))
+        session.query(AssetHistory).filter(AssetHistory.asset_id == dropped_id).delete()
+        session.commit()
+        before = last_dates(session)
+        today = max(before.values()) + timedelta(days=10)
+
+        fake = FakeDownloader(bump=0.5)
+        result = refresh_history(session, fake, today=today, overlap_days=OVERLAP)
+        requested = {ticker: (start, end) for start, end, batch in fake.requests for ticker in batch}
+        assert set(requested) == set(tickers), "every ticker is requested"
+        for ticker, (start, end) in requested.items():
+            assert end == today
+            if ticker == dropped:
+                assert start == today - relativedelta(years=HISTORY_YEARS), (ticker, start)
+            else:
+                assert start == before[ticker] - timedelta(days=OVERLAP), (ticker, start, before[ticker])
+        distinct_starts = {before[t] - timedelta(days=OVERLAP) for t in tickers if t != dropped}
+        assert len(fake.requests) == len(distinct_starts) + 1, "one request per distinct start date"
+        print(f"gap: {len(fake.requests)} request(s) for {len(tickers)} tickers, {result.rows_written} rows written")
+
+        # Revised closes in the overlap window replaced the stored ones
+        some = tickers[1]
+        revised_day = before[some] - timedelta(days=1)
+        while revised_day.weekday() >= 5:
+            revised_day -= timedelta(days=1)
+        close = session.scalar(select(AssetHistory.close_price).join(AssetType).where(
+            AssetType.asset_ticker == some, AssetHistory.date == revised_day))
+        assert close == revised_day.toordinal() + 0.5, (revised_day, close)
+        # The ticker without history was refilled from the first business day of the window
+        window_start = today - relativedelta(years=HISTORY_YEARS)
+        assert window_start <= result.since <= window_start + timedelta(days=3), result.since
+
+        # Watermarks hold the newest date per ticker
+        marks = dict(session.execute(select(AssetHistoryWatermark.ticker, AssetHistoryWatermark.last_date)).all())
+        assert marks == last_dates(session), "watermarks match the table"
+        duplicates = session.execute(
+            select(AssetHistory.asset_id, AssetHistory.date).group_by(AssetHistory.asset_id, AssetHistory.date)
+            .having(func.count() > 1)
+        ).all()
+        assert not duplicates
+
+        # 3. Full mode requests the whole window in one request
+        fake = FakeDownloader()
+        refresh_history(session, fake, incremental=False, today=today, overlap_days=OVERLAP)
+        assert [(start, len(batch)) for start, _, batch in fake.requests] == \
+            [(today - relativedelta(years=HISTORY_YEARS), len(tickers))], fake.requests
+        print("full: 1 request for the whole window")
+
+        session.close()
+        engine.dispose()
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
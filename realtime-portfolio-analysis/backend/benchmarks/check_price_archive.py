@@ -0,0 +1,128 @@
+"""
+Round-trip check of the columnar price history archive.
+
+Against a temporary copy of the bundled demo database (demo/voicebot_clean.sqlite3
+at the repository root, or the one given with --db), checks that:
+
+  * a store with an archive path reads the table on first load and writes
+    the archive; a second store cold-starts from it
+  * every series loaded from the archive (memory-mapped and in memory)
+    equals the one read from asset_history: dates, closes and row ids
+  * frames built from either store are identical
+  * series loaded from the archive are read-only
+  * the archive is treated as stale once the table changes, including a
+    close revised in place, and is rewritten by the next load
+  * a missing or corrupt archive falls back to the table
+
+Run from the backend directory:
+
+    python -m benchmarks.check_price_archive
+    python -m benchmarks.check_price_archive --db src/database/voicebot.sqlite3
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, update
+from sqlalchemy.orm import sessionmaker
+
+from src.components import price_history_archive
+from src.components.price_history_store import PriceHistoryStore
+from src.database.database import create_sqlite_engine
+from src.database.migrations import apply_migrations
+from src.database.models import AssetHistory
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "demo", "voicebot_clean.sqlite3")
+
+
+def assert_same_series(expected, actual):
+    assert set(expected) == set(actual), "same assets"
+    for asset_id, series in expected.items():
+        other = actual[asset_id]
+        assert np.array_equal(series.dates, other.dates), asset_id
+        assert np.array_equal(series.closes, other.closes, equal_nan=True), asset_id
+        assert np.array_equal(series.ids, other.ids), asset_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DEFAULT_DB, help="Database to copy (default: the bundled demo database)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_path = os.path.join(tmp, "voicebot.sqlite3")
+        archive_path = os.path.join(tmp, "price_history")
+        shutil.copyfile(args.db, copy_path)
+        engine = create_sqlite_engine(f"sqlite:///{copy_path}", echo=False, pool_size=1)
+        apply_migrations(engine)
+        session_factory = sessionmaker(bind=engine)
+
+        reference = PriceHistoryStore(session_factory)
+        rows = reference.load()
+        expected = reference._series
+
+        # 1. First load reads the table and writes the archive; the next one uses it
+        first = PriceHistoryStore(session_factory, archive_path=archive_path)
+        assert first.load() == rows
+        assert first.stats()["last_load"]["source"] == "database"
+        assert first.stats()["archive_writes"] == 1
+        second = PriceHistoryStore(session_factory, archive_path=archive_path)
+        assert second.load() == rows
+        assert second.stats()["last_load"]["source"] == "archive", second.stats()
+        print(f"{rows} rows of {len(expected)} assets: database load {first.stats()['last_load']['ms']} ms, "
+              f"archive load {second.stats()['last_load']['ms']} ms")
+
+        # 2. Identical series, memory-mapped or not, and identical frames
+        assert_same_series(expected, second._series)
+        in_memory, _ = price_history_archive.load_series(archive_path, mmap=False)
+        assert_same_series(expected, in_memory)
+        asset_ids = sorted(expected)
+        pd.testing.assert_frame_equal(reference.frame(asset_ids), second.frame(asset_ids))
+        pd.testing.assert_frame_equal(reference.frame(asset_ids, "2023-01-01", "2023-06-30"),
+                                      second.frame(asset_ids, "2023-01-01", "2023-06-30"))
+        some = second.series(asset_ids[0])
+        try:
+            some.closes[0] = 0.0
+            raise AssertionError("archive series must be read-only")
+        except ValueError:
+            pass
+        print("round trip: series and frames identical")
+
+        # 3. A close revised in place makes the archive stale; the next load rewrites it
+        with session_factory() as session:
+            hist_id = session.scalar(select(AssetHistory.asset_hist_id).order_by(AssetHistory.asset_hist_id.desc()))
+            session.execute(update(AssetHistory).where(AssetHistory.asset_hist_id == hist_id)
+                            .values(close_price=AssetHistory.close_price + 1.0))
+            session.commit()
+        stale = PriceHistoryStore(session_factory, archive_path=archive_path)
+        stale.load()
+        assert stale.stats()["last_load"]["source"] == "database"
+        assert stale.stats()["archive_writes"] == 1
+        fresh = PriceHistoryStore(session_factory, archive_path=archive_path)
+        fresh.load()
+        assert fresh.stats()["last_load"]["source"] == "archive"
+        assert_same_series(stale._series, fresh._series)
+        print("stale archive detected and rewritten")
+
+        # 4. Corrupt or missing archives fall back to the table
+        with open(os.path.join(archive_path, "offsets.npy"), "wb") as f:
+            f.write(b"not an array")
+        broken = PriceHistoryStore(session_factory, archive_path=archive_path)
+        assert broken.load() == rows
+        assert broken.stats()["last_load"]["source"] == "database"
+        shutil.rmtree(archive_path)
+        missing = PriceHistoryStore(session_factory, archive_path=archive_path)
+        assert missing.load() == rows
+        assert missing.stats()["last_load"]["source"] == "database"
+        assert os.path.exists(os.path.join(archive_path, price_history_archive.MANIFEST))
+        print("corrupt and missing archives fall back to the table")
+
+        engine.dispose()
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Offline check that price history loads and refreshes are single-flight.
+
+Against a temporary copy of the database, with the store's reads slowed
+down so that callers overlap, checks that:
+
+  * 16 threads reading an empty store run a single load, and every one of
+    them gets the loaded series
+  * 16 threads reading an expired store run a single refresh, and the
+    others return the current snapshot without waiting for it
+  * an explicit refresh racing the expiry refresh does not run alongside it
+
+Run from the backend directory:
+
+    python -m benchmarks.check_price_history_store
+    python -m benchmarks.check_price_history_store --db /tmp/voicebot_10x.sqlite3
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from src.components import price_history_store as store_module
+from src.components.price_history_store import PriceHistoryStore
+from src.database.database import create_sqlite_engine
+from src.database.migrations import apply_migrations
+from src.database.models import AssetHistory
+
+DEFAULT_DB = os.path.join("src", "database", "voicebot.sqlite3")
+READERS = 16
+READ_DELAY = 0.2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DEFAULT_DB, help="Database to copy (default: the bundled database)")
+    args = parser.parse_args()
+
+    # Slow every table read down, and count how many run at once
+    fetch_rows = store_module._fetch_rows
+    in_flight = {"now": 0, "max": 0}
+    in_flight_lock = threading.Lock()
+
+    def slow_fetch_rows(*a, **kw):
+        with in_flight_lock:
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        try:
+            time.sleep(READ_DELAY)
+            return fetch_rows(*a, **kw)
+        finally:
+            with in_flight_lock:
+                in_flight["now"] -= 1
+
+    store_module._fetch_rows = slow_fetch_rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_path = os.path.join(tmp, "voicebot.sqlite3")
+        shutil.copyfile(args.db, copy_path)
+        engine = create_sqlite_engine(f"sqlite:///{copy_path}", echo=False, pool_size=READERS)
+        apply_migrations(engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as session:
+            asset_id = session.scalar(select(AssetHistory.asset_id).limit(1))
+
+        store = PriceHistoryStore(session_factory=session_factory, max_age_seconds=3600)
+        with ThreadPoolExecutor(READERS) as pool:
+            lengths = list(pool.map(lambda _: len(store.series(asset_id)), range(READERS)))
+        stats = store.stats()
+        assert stats["loads"] == 1, f"one load for {READERS} first readers, got {stats['loads']}"
+        assert len(set(lengths)) == 1 and lengths[0] > 0, lengths
+        assert in_flight["max"] == 1, in_flight
+        print(f"ok: {READERS} first readers ran 1 load")
+
+        store.max_age_seconds = 0.05
+        time.sleep(0.1)
+        in_flight["max"] = 0
+
+        def timed_read(_):
+            started = time.perf_counter()
+            store.series(asset_id)
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(READERS) as pool:
+            waits = sorted(pool.map(timed_read, range(READERS)))
+        stats = store.stats()
+        assert stats["refreshes"] == 1, f"one refresh for {READERS} readers of an expired store, got {stats['refreshes']}"
+        assert in_flight["max"] == 1, in_flight
+        # Only the refreshing reader pays for the table read
+        assert waits[-2] < READ_DELAY / 2, waits
+        print(f"ok: {READERS} readers of an expired store ran 1 refresh, the others waited at most "
+              f"{waits[-2] * 1000:.1f} ms")
+
+        store.max_age_seconds = 3600
+        in_flight["max"] = 0
+        threads = [threading.Thread(target=store.refresh) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert in_flight["max"] == 1, in_flight
+        print("ok: explicit refreshes run one at a time")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Check that a timed-out bulk quote request does not starve the next one.
+
+With 8 workers, a 1 s timeout and a 100 ms stubbed upstream, a 200-symbol
+request can price at most 80 symbols live and must fall back for the rest.
+A 5-symbol request made right after it must still be served live, well
+within the timeout, because the fetches the large request gave up on are
+cancelled instead of left queued on the shared pool. Runs offline; run from
+the backend directory:
+
+    python -m benchmarks.check_quote_engine
+"""
+import time
+
+from benchmarks.bench_quote_engine import make_stub_source, stub_fallback
+from src.components.quote_engine import QuoteEngine
+
+
+def main():
+    engine = QuoteEngine(source=make_stub_source(0.1), fallback=stub_fallback, max_workers=8, timeout=1.0)
+
+    large = engine.fetch([f"SYM{i:04d}" for i in range(200)])
+    assert large.stale, "the large request takes the timeout path"
+    assert len(large.prices) == 200 and not large.missing
+    print(f"ok: 200 symbols in {large.elapsed_ms:.0f} ms, {len(large.stale)} stale")
+
+    small = engine.fetch([f"NEXT{i}" for i in range(5)])
+    assert not small.stale, f"the next request is served live, got {len(small.stale)} stale"
+    assert small.elapsed_ms < 500, small.elapsed_ms
+    print(f"ok: 5 symbols right after in {small.elapsed_ms:.0f} ms, none stale")
+
+    # Give the fetches still running for the large request time to finish, then check the pool is idle
+    time.sleep(0.2)
+    assert engine._executor._work_queue.qsize() == 0, "no fetch left queued"
+    print("ok: nothing left queued on the pool")
+    engine.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Offline check of the span tree recorded for a bulk quote fetch.
+
+Runs a tool registered on a ToolExecutor, as the voice bot does, inside a
+session span. The tool prices symbols through a QuoteEngine whose stubbed
+source goes through a QuoteCache. Checks that:
+
+  * the tool span is a child of the session span
+  * every symbol fetched on the QuoteEngine pool is a "quote" span, a child
+    of the tool span, recorded on a quote worker thread
+  * a coalesced or cached lookup adds no span of its own
+  * with tracing disabled no span is created and no file is written
+
+Also prints the cost of one span on the calling thread, with export to the
+background writer. Run from the backend directory:
+
+    python -m benchmarks.check_tracing
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+
+from src.components.quote_cache import QuoteCache
+from src.components.quote_engine import QuoteEngine
+from src.components.tool_executor import ToolExecutor
+from src.pipeline import tracing
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL"]
+
+
+class FakeLLM:
+    """Stands in for the realtime LLM service: collects the registered handlers."""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def register_function(self, name, handler):
+        self.handlers[name] = handler
+
+
+def stub_loader(symbol):
+    time.sleep(0.05)
+    return {"regularMarketPrice": 100.0 + len(symbol)}
+
+
+async def run_session(session_id):
+    from pipecat.services.llm_service import FunctionCallParams
+
+    cache = QuoteCache(loader=stub_loader)
+    engine = QuoteEngine(source=lambda symbol: cache.get(symbol)["regularMarketPrice"], max_workers=4)
+    executor = ToolExecutor(max_workers=2)
+    llm = FakeLLM()
+
+    async def get_realtime_quotes_bulk(params):
+        result = engine.fetch(params.arguments["symbols"])
+        await params.result_callback({"prices": result.prices, "stale": sorted(result.stale)})
+
+    results = []
+
+    async def result_callback(result, **kwargs):
+        results.append(result)
+
+    executor.register(llm, "get_realtime_quotes_bulk", get_realtime_quotes_bulk)
+    with tracing.span("session", "session", trace_id=session_id):
+        for symbols in (SYMBOLS, SYMBOLS[:2]):
+            params = FunctionCallParams(function_name="get_realtime_quotes_bulk", tool_call_id=str(uuid.uuid4()),
+                                        arguments={"symbols": symbols}, llm=llm, context=None,
+                                        result_callback=result_callback)
+            await llm.handlers["get_realtime_quotes_bulk"](params)
+    executor.shutdown()
+    return results
+
+
+def check_spans(path):
+    session_id = uuid.uuid4().hex
+    tracing.span_exporter = tracing.SpanExporter(path)
+    results = asyncio.run(run_session(session_id))
+    tracing.span_exporter.flush()
+    assert len(results) == 2 and not results[0]["stale"], results
+
+    with open(path, encoding="utf-8") as f:
+        spans = [json.loads(line) for line in f]
+    assert all(span["trace_id"] == session_id for span in spans), "one trace"
+    (session,) = [span for span in spans if span["kind"] == "session"]
+    tools = [span for span in spans if span["kind"] == "tool"]
+    quotes = [span for span in spans if span["kind"] == "quote"]
+    assert len(tools) == 2 and all(tool["parent_id"] == session["span_id"] for tool in tools), tools
+
+    first_tool = min(tools, key=lambda span: span["start"])
+    assert len(quotes) == len(SYMBOLS), f"one quote span per symbol fetched upstream, got {len(quotes)}"
+    assert {quote["attributes"]["symbol"] for quote in quotes} == set(SYMBOLS)
+    assert all(quote["parent_id"] == first_tool["span_id"] for quote in quotes), "quote spans are children of the tool"
+    assert all(quote["thread"].startswith("quote") for quote in quotes), [quote["thread"] for quote in quotes]
+    assert all(quote["status"] == "ok" for quote in quotes)
+    print(f"ok: {len(spans)} spans; {len(quotes)} quote spans under the tool span on the QuoteEngine pool")
+    return tracing.span_exporter.stats()
+
+
+def check_disabled(path):
+    tracing.span_exporter = tracing.SpanExporter(None)
+    asyncio.run(run_session(uuid.uuid4().hex))
+    assert not os.path.exists(path), "no trace file when tracing is disabled"
+    assert tracing.span_exporter.stats()["exported"] == 0
+    print("ok: tracing disabled records nothing")
+
+
+def measure_overhead(path, spans=20000):
+    tracing.span_exporter = tracing.SpanExporter(path, max_queue=spans)
+    with tracing.span("session", "session"):
+        started = time.perf_counter()
+        for _ in range(spans):
+            with tracing.child_span("quote_fetch", "quote", symbol="AAPL"):
+                pass
+        elapsed = time.perf_counter() - started
+    tracing.span_exporter.flush()
+    print(f"span cost on the calling thread: {elapsed / spans * 1e6:.1f} us "
+          f"({tracing.span_exporter.stats()['exported']} spans written by the background writer)")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = check_spans(os.path.join(tmp, "traces.jsonl"))
+        assert stats["dropped"] == 0 and stats["errors"] == 0 and stats["queued"] == 0, stats
+        check_disabled(os.path.join(tmp, "disabled.jsonl"))
+        measure_overhead(os.path.join(tmp, "overhead.jsonl"))
+
+
+if __name__ == "__main__":
+    main()
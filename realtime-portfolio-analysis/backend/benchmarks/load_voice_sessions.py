@@ -0,0 +1,280 @@
+"""
+Capacity curve of one app worker under concurrent /ws voice sessions, fully offline.
+
+For each concurrency level it starts the app with uvicorn on a private copy
+of a database, with
+
+    VOICE_LLM_SERVICE=scripted  ScriptedLLMService replaces the realtime model
+                                and plays authenticate, holdings, aggregation,
+                                benchmark and trade tool calls
+    QUOTE_SOURCE=database       quotes come from asset_latest_price
+
+then opens that many websocket clients at once, each as a different user.
+Every client streams 20 ms of silent microphone audio in real time (so the
+VAD runs as in a real call) and records:
+
+    tool latency      per scripted call, reported by the stand-in
+    event-loop lag    p50/p95/max of the server loop during the session,
+                      sampled by the stand-in every 20 ms
+    frame gaps        time between consecutive bot audio frames received
+
+A level passes when every session completes its script and the p95 frame
+gap and p95 loop lag stay under --max-gap-ms and --max-lag-ms; the largest
+passing level is reported as the worker's capacity.
+
+The database defaults to a synthetic one from generate_synthetic_db.py with
+enough users for the largest level. Run from the backend directory:
+
+    python -m benchmarks.load_voice_sessions --levels 1,5,10,20,40 --output load_voice_sessions.json
+    python -m benchmarks.load_voice_sessions --levels 10,50,100 --scale 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import date, datetime, timezone
+
+import aiohttp
+import numpy as np
+
+SYNTHETIC_END = date(2025, 7, 15)
+MIC_CHUNK_MS = 20
+MIC_SAMPLE_RATE = 16000
+
+
+def percentiles(samples):
+    if not len(samples):
+        return {"p50": None, "p95": None, "max": None}
+    values = np.asarray(samples, dtype=float)
+    return {"p50": round(float(np.percentile(values, 50)), 2), "p95": round(float(np.percentile(values, 95)), 2),
+            "max": round(float(values.max()), 2)}
+
+
+def mic_frame() -> bytes:
+    """One protobuf audio frame of silence, as the web client sends it."""
+    import pipecat.frames.protobufs.frames_pb2 as frame_protos
+
+    frame = frame_protos.Frame()
+    frame.audio.audio = bytes(MIC_SAMPLE_RATE * MIC_CHUNK_MS // 1000 * 2)
+    frame.audio.sample_rate = MIC_SAMPLE_RATE
+    frame.audio.num_channels = 1
+    return frame.SerializeToString()
+
+
+def is_audio_frame(data: bytes) -> bool:
+    import pipecat.frames.protobufs.frames_pb2 as frame_protos
+
+    try:
+        return frame_protos.Frame.FromString(data).WhichOneof("frame") == "audio"
+    except Exception:
+        return False
+
+
+async def stream_microphone(ws):
+    frame = mic_frame()
+    next_at = time.monotonic()
+    while not ws.closed:
+        await ws.send_bytes(frame)
+        next_at += MIC_CHUNK_MS / 1000
+        await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+
+
+async def run_session(http, base_url, phone_number, timeout):
+    """One voice session; returns its tool events, frame gaps and the stand-in's final report."""
+    result = {"phone_number": phone_number, "tools": [], "gaps_ms": [], "done": None, "error": None,
+              "first_audio_ms": None}
+    started = time.perf_counter()
+    try:
+        async with http.ws_connect(f"{base_url.replace('http', 'ws', 1)}/ws?phonenumber={phone_number}") as ws:
+            microphone = asyncio.create_task(stream_microphone(ws))
+            last_audio = None
+            try:
+                async with asyncio.timeout(timeout):
+                    async for message in ws:
+                        now = time.perf_counter()
+                        if message.type == aiohttp.WSMsgType.BINARY and is_audio_frame(message.data):
+                            if last_audio is None:
+                                result["first_audio_ms"] = round((now - started) * 1000, 2)
+                            else:
+                                result["gaps_ms"].append((now - last_audio) * 1000)
+                            last_audio = now
+                        elif message.type == aiohttp.WSMsgType.TEXT:
+                            data = json.loads(message.data)
+                            if data.get("type") != "loadtest":
+                                continue
+                            if data["event"] == "tool":
+                                result["tools"].append(data)
+                            elif data["event"] == "done":
+                                result["done"] = data
+                                break
+                        elif message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            finally:
+                microphone.cancel()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    if result["done"] is None and result["error"] is None:
+        result["error"] = "session ended before its script finished"
+    return result
+
+
+def start_server(db_path, port, pause_seconds, log_path):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "VOICE_LLM_SERVICE": "scripted",
+        "SCRIPTED_LLM_PAUSE_SECONDS": str(pause_seconds),
+        "QUOTE_SOURCE": "database",
+        "HISTORY_REFRESH_INTERVAL_SECONDS": "0",
+    }
+    log = open(log_path, "w")
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+                               "--port", str(port), "--log-level", "warning"], env=env, stdout=log, stderr=log)
+    deadline = time.monotonic() + 180
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with {server.returncode}, see {log_path}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/session_setup/stats", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"server did not start within 180s, see {log_path}")
+
+
+def get_json(base_url, path):
+    with urllib.request.urlopen(f"{base_url}{path}", timeout=5) as response:
+        return json.load(response)
+
+
+async def run_level(base_url, phone_numbers, stagger, timeout):
+    async with aiohttp.ClientSession() as http:
+        tasks = []
+        for phone_number in phone_numbers:
+            tasks.append(asyncio.create_task(run_session(http, base_url, phone_number, timeout)))
+            await asyncio.sleep(stagger)
+        return await asyncio.gather(*tasks)
+
+
+def summarize(sessions, setup, max_gap_ms, max_lag_ms):
+    completed = [s for s in sessions if s["done"] is not None]
+    tool_events = [t for s in sessions for t in s["tools"]]
+    per_tool = {}
+    for event in tool_events:
+        per_tool.setdefault(event["tool"], []).append(event["ms"])
+    gaps = [g for s in sessions for g in s["gaps_ms"]]
+    lag_p95 = [s["done"]["loop_lag_ms"]["p95"] for s in completed if s["done"]["loop_lag_ms"]["p95"] is not None]
+    lag_max = [s["done"]["loop_lag_ms"]["max"] for s in completed if s["done"]["loop_lag_ms"]["max"] is not None]
+    summary = {
+        "sessions": len(sessions),
+        "completed": len(completed),
+        "errors": sorted({s["error"] for s in sessions if s["error"]}),
+        "tool_errors": sum(1 for t in tool_events if t.get("error")),
+        "tool_ms": percentiles([t["ms"] for t in tool_events]),
+        "per_tool_ms": {tool: percentiles(ms) for tool, ms in per_tool.items()},
+        "loop_lag_ms": {"p95_median": round(float(np.median(lag_p95)), 2) if lag_p95 else None,
+                        "p95_worst": max(lag_p95, default=None), "max": max(lag_max, default=None)},
+        "frame_gap_ms": percentiles(gaps),
+        "first_audio_ms": percentiles([s["first_audio_ms"] for s in sessions if s["first_audio_ms"] is not None]),
+        "session_setup": setup,
+    }
+    summary["passed"] = (
+        summary["completed"] == summary["sessions"]
+        and summary["frame_gap_ms"]["p95"] is not None and summary["frame_gap_ms"]["p95"] <= max_gap_ms
+        and summary["loop_lag_ms"]["p95_worst"] is not None and summary["loop_lag_ms"]["p95_worst"] <= max_lag_ms
+    )
+    return summary
+
+
+def prepare_database(args, tmp, users_needed):
+    path = os.path.join(tmp, "voicebot.sqlite3")
+    if args.db:
+        shutil.copyfile(args.db, path)
+    else:
+        from generate_synthetic_db import SyntheticConfig, generate
+
+        config = SyntheticConfig.scaled(args.scale, end=SYNTHETIC_END)
+        config.users = max(config.users, users_needed)
+        print(f"generating a synthetic database with {config.users} users and {config.assets} extra assets")
+        generate(path, config)
+    with sqlite3.connect(path) as conn:
+        phone_numbers = [row[0] for row in conn.execute("SELECT phone_number FROM users ORDER BY user_id")]
+    if len(phone_numbers) < users_needed:
+        raise SystemExit(f"{args.db} has {len(phone_numbers)} users; the largest level needs {users_needed}")
+    return path, phone_numbers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--levels", default="1,5,10,20,40", help="Comma-separated concurrent session counts")
+    parser.add_argument("--db", help="Database to copy (default: a synthetic one, see --scale)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Synthetic database scale when --db is not given")
+    parser.add_argument("--pause", type=float, default=1.0, help="Seconds the stand-in waits before each tool call")
+    parser.add_argument("--stagger", type=float, default=0.05, help="Seconds between session starts")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds a session may take")
+    parser.add_argument("--max-gap-ms", type=float, default=100.0, help="Highest passing p95 audio frame gap")
+    parser.add_argument("--max-lag-ms", type=float, default=50.0, help="Highest passing p95 event-loop lag")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Write the curve as JSON to this file")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(",")]
+    report = {
+        "benchmark": "load_voice_sessions",
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "args": vars(args),
+        "levels": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        source, phone_numbers = prepare_database(args, tmp, max(levels))
+        for level in levels:
+            # A fresh copy and server per level, so levels do not share caches or trades
+            db_path = os.path.join(tmp, f"level_{level}.sqlite3")
+            shutil.copyfile(source, db_path)
+            log_path = os.path.join(tmp, f"server_{level}.log")
+            server = start_server(db_path, args.port, args.pause, log_path)
+            base_url = f"http://127.0.0.1:{args.port}"
+            try:
+                sessions = asyncio.run(run_level(base_url, phone_numbers[:level], args.stagger, args.timeout))
+                setup = get_json(base_url, "/api/session_setup/stats")
+                executor = get_json(base_url, "/api/tool_executor/stats")
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            summary = summarize(sessions, {k: setup[k] for k in ("avg_ms", "max_ms")}, args.max_gap_ms, args.max_lag_ms)
+            summary["tool_executor"] = {k: executor[k] for k in ("max_workers", "avg_wait_ms", "avg_run_ms")}
+            report["levels"].append(summary)
+            print(f"{level:>4} sessions: {summary['completed']} completed, tool p95 {summary['tool_ms']['p95']} ms, "
+                  f"loop lag p95 {summary['loop_lag_ms']['p95_worst']} ms, frame gap p95 {summary['frame_gap_ms']['p95']} ms"
+                  f"{'' if summary['passed'] else '  FAIL'}")
+            if summary["errors"]:
+                print(f"      errors: {summary['errors'][:3]} (server log: {log_path})")
+                shutil.copyfile(log_path, os.path.join(tempfile.gettempdir(), f"load_voice_sessions_{level}.log"))
+
+    passing = [s["sessions"] for s in report["levels"] if s["passed"]]
+    report["capacity"] = max(passing, default=0)
+    print(f"\n{'sessions':>8} {'done':>5} {'tool p50':>9} {'tool p95':>9} {'lag p95':>8} {'lag max':>8} "
+          f"{'gap p50':>8} {'gap p95':>8} {'gap max':>8} {'wait ms':>8}")
+    for s in report["levels"]:
+        print(f"{s['sessions']:>8} {s['completed']:>5} {s['tool_ms']['p50'] or '-':>9} {s['tool_ms']['p95'] or '-':>9} "
+              f"{s['loop_lag_ms']['p95_worst'] or '-':>8} {s['loop_lag_ms']['max'] or '-':>8} "
+              f"{s['frame_gap_ms']['p50'] or '-':>8} {s['frame_gap_ms']['p95'] or '-':>8} "
+              f"{s['frame_gap_ms']['max'] or '-':>8} {s['tool_executor']['avg_wait_ms']:>8}")
+    print(f"\ncapacity: {report['capacity']} concurrent sessions "
+          f"(p95 frame gap <= {args.max_gap_ms} ms, p95 loop lag <= {args.max_lag_ms} ms)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
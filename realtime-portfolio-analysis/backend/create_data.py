@@ -9,7 +9,8 @@ import json
 from src.database.database import Base
 from src.database.database import SessionLocal
 from src.database.models import (AssetType, AssetSector, AssetHistory, User, UserPortfolio, 
-                   UserTransactions, DefaultBenchmarks, AssetClassRiskLevelMapping, RelativeBenchmark)
+                   UserTransactions, DefaultBenchmarks, AssetClassRiskLevelMapping, RelativeBenchmark,
+                   AssetLatestPrice, DataVersion)
 
 from curl_cffi import requests
 import bs4 as bs
@@ -377,6 +378,7 @@ def create_relative_benchmark_table():
             session.add(benchmark_entry)
             
         session.commit()
+        DataVersion.bump(session)
         print("Successfully created and populated the relative_benchmarks table")
         
     except Exception as e:
@@ -626,6 +628,10 @@ def fetch_and_insert_data():
             print(f"Warning: Asset ID not found for ticker {port['ticker']}")
     
     session.commit()
+
+    AssetLatestPrice.rebuild(session)
+    # Servers reload their reference catalog on the next version check
+    DataVersion.bump(session)
     print("Data insertion completed!")
 
 if __name__ == "__main__":
@@ -0,0 +1,400 @@
+"""
+Build a deterministic, synthetic voicebot database for load and benchmark testing.
+
+The reference universe (asset_type, asset_sector, benchmarks, risk mappings
+and relative benchmarks) is copied from a template database, by default the
+bundled voicebot.sqlite3, so every tool keeps working. On top of it the
+generator adds:
+
+    assets        synthetic stocks, ETFs and mutual funds spread over the
+                  concentrations the risk mapping knows, with sector splits
+                  drawn around the market's and a relative benchmark each
+    asset_history business-day closes for `years`, a geometric random walk
+                  per asset with drift and volatility by asset class
+    users         with 1-3 bank accounts, a cash balance, and holdings built
+                  from their own BUY/SELL transactions at historical closes
+    order_book    recent orders of each user on their holdings
+
+Everything is drawn from one seeded generator, so the same arguments (and
+end date) give the same database. Rows go in through executemany on the
+raw connection with journaling off, which builds 10,000 users x 2,000
+assets x 5 years in minutes.
+
+Sizes are given directly or as a multiple of SCALE_BASE (1x = 100 users,
+20 synthetic assets), so benchmarks can be run at 1x, 10x and 100x:
+
+    python generate_synthetic_db.py --scale 10 --out /tmp/voicebot_10x.sqlite3
+    python generate_synthetic_db.py --users 10000 --assets 2000 --years 5 --out /tmp/voicebot_big.sqlite3
+    python -m benchmarks.bench_price_archive --db /tmp/voicebot_10x.sqlite3
+
+Point the app at the result with DATABASE_URL=sqlite:////tmp/voicebot_10x.sqlite3.
+
+This stands apart from create_data.py and demo/generate_clean_db.py, which
+prepare the one-user demo universe: the latter copies the working database
+and resets its bank balances for demos. The clean demo database can serve
+as the template here, so synthetic data shares its reference tables:
+
+    python generate_synthetic_db.py --scale 10 --template ../../demo/voicebot_clean.sqlite3 --out /tmp/voicebot_10x.sqlite3
+"""
+import argparse
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.database.database import Base, create_sqlite_engine
+from src.database.models import (AssetClassRiskLevelMapping, AssetHistory, AssetLatestPrice, AssetSector, AssetType,
+                                 DataVersion, DefaultBenchmarks, OrderBook, RelativeBenchmark, User, UserBankAccount,
+                                 UserPortfolio, UserTransactions)
+
+DEFAULT_TEMPLATE = os.path.join("src", "database", "voicebot.sqlite3")
+REFERENCE_TABLES = [AssetType, AssetSector, DefaultBenchmarks, AssetClassRiskLevelMapping, RelativeBenchmark]
+SCALE_BASE = {"users": 100, "assets": 20}
+INSERT_CHUNK = 50000
+
+# (asset_class, concentration, share of synthetic assets, annual drift, annual volatility, relative benchmark)
+ASSET_PROFILES = [
+    ("Stock", "US Equity", 0.30, 0.08, 0.30, "SPX"),
+    ("Stock", "International Equity", 0.10, 0.06, 0.32, "ACWX"),
+    ("ETF", "US Equity", 0.15, 0.08, 0.18, "SPX"),
+    ("ETF", "International Equity", 0.08, 0.06, 0.20, "ACWX"),
+    ("ETF", "Global Equity", 0.04, 0.05, 0.19, "REET"),
+    ("ETF", "US Bond", 0.07, 0.02, 0.06, "AGG"),
+    ("ETF", "International Bond", 0.04, 0.02, 0.07, "AGG"),
+    ("Mutual Fund", "US Equity", 0.10, 0.07, 0.17, "SPX"),
+    ("Mutual Fund", "International Equity", 0.06, 0.05, 0.19, "ACWX"),
+    ("Mutual Fund", "US Bond", 0.06, 0.02, 0.05, "BND"),
+]
+# Sector split of a broad US equity fund (VTI in the template), the centre of the drawn splits
+MARKET_SECTORS = {
+    "Technology": 30.13, "Financial Services": 14.33, "Healthcare": 11.15, "Consumer Cyclical": 10.36,
+    "Industrials": 8.86, "Communication Services": 8.74, "Consumer Defensive": 5.82, "Energy": 3.26,
+    "Real Estate": 2.8, "Utilities": 2.49, "Basic Materials": 2.06,
+}
+MANAGERS = ["Vanguard", "Blackrock", "Fidelity", "Schwab", "T. Rowe Price", "Capital Group", "State Street"]
+SIMILAR_ASSETS = {
+    "US Equity": ["Large Blend", "Large Growth", "Mid-Cap Value", "Small Blend"],
+    "International Equity": ["Foreign Large Blend", "Diversified Emerging Mkts", "Foreign Small/Mid Value"],
+    "Global Equity": ["Global Real Estate", "Global Large-Stock Blend"],
+    "US Bond": ["Intermediate Core Bond", "Long Government", "Short-Term Bond"],
+    "International Bond": ["Global Bond-USD Hedged", "Emerging Markets Bond"],
+}
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Priya", "Wei"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Patel", "Chen"]
+BANKS = ["Chase Bank", "Wells Fargo", "Bank of America", "Citibank", "U.S. Bank", "PNC Bank", "Capital One"]
+ACCOUNT_TYPES = ["Checking", "Savings", "Money Market"]
+ORDER_STATUSES = (["Placed", "Cancelled", "Under Review"], [0.6, 0.3, 0.1])
+PASSWORD = "PortfolioAI@123"
+
+
+@dataclass
+class SyntheticConfig:
+    """
+    Sizes and seed of a synthetic database.
+
+    Args:
+        users: Users to create
+        assets: Synthetic assets added to the template's reference universe
+        years: Years of daily history per asset
+        transactions_per_user: BUY/SELL transactions per user
+        holdings_per_user: Distinct assets each user trades
+        orders_per_user: Order book entries per user
+        seed: Seed of the random generator
+        end: Last day of history (default: today)
+    """
+    users: int = SCALE_BASE["users"]
+    assets: int = SCALE_BASE["assets"]
+    years: int = 5
+    transactions_per_user: int = 60
+    holdings_per_user: int = 12
+    orders_per_user: int = 5
+    seed: int = 42
+    end: date = field(default_factory=date.today)
+
+    @classmethod
+    def scaled(cls, scale: float, **overrides) -> 'SyntheticConfig':
+        """Config with SCALE_BASE users and assets multiplied by `scale`."""
+        sizes = {name: max(1, int(round(base * scale))) for name, base in SCALE_BASE.items()}
+        return cls(**{**sizes, **overrides})
+
+
+def _walk(asset_class: str, concentration: str) -> tuple:
+    """(drift, volatility) of the first profile matching an asset, broad equity otherwise."""
+    for profile_class, profile_concentration, _, drift, vol, _ in ASSET_PROFILES:
+        if (profile_class, profile_concentration) == (asset_class, concentration):
+            return drift, vol
+    return 0.07, 0.16
+
+
+def _insert_rows(conn, table, columns: Sequence[str], rows: List[tuple]) -> int:
+    """executemany `rows` into `table` in chunks; values must already be SQLite types (dates as ISO strings)."""
+    sql = f"INSERT INTO {table.__tablename__} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    for start in range(0, len(rows), INSERT_CHUNK):
+        conn.exec_driver_sql(sql, rows[start:start + INSERT_CHUNK])
+    return len(rows)
+
+
+def _copy_reference_tables(conn, template: str) -> Dict[str, int]:
+    """Copy the reference tables of `template` into the new database."""
+    conn.exec_driver_sql("ATTACH DATABASE ? AS template", (template,))
+    counts = {}
+    for model in REFERENCE_TABLES:
+        table = model.__tablename__
+        template_columns = {row[1] for row in conn.exec_driver_sql(f"PRAGMA template.table_info({table})")}
+        columns = ", ".join(c.name for c in model.__table__.columns if c.name in template_columns)
+        counts[table] = conn.exec_driver_sql(
+            f"INSERT INTO main.{table} ({columns}) SELECT {columns} FROM template.{table}").rowcount
+    conn.commit()
+    conn.exec_driver_sql("DETACH DATABASE template")
+    return counts
+
+
+def _synthetic_assets(conn, rng: np.random.Generator, count: int) -> Dict[int, tuple]:
+    """
+    Insert `count` assets with their sectors and relative benchmarks.
+
+    Returns:
+        dict: asset_id -> (drift, volatility) of its price walk
+    """
+    first_id = conn.exec_driver_sql("SELECT coalesce(max(asset_id), 0) + 1 FROM asset_type").scalar()
+    shares = np.array([p[2] for p in ASSET_PROFILES])
+    picks = rng.choice(len(ASSET_PROFILES), size=count, p=shares / shares.sum())
+    sector_names = list(MARKET_SECTORS)
+    market = np.array(list(MARKET_SECTORS.values())) / 100
+
+    assets, sectors, benchmarks, walks = [], [], [], {}
+    for n, pick in enumerate(picks):
+        asset_class, concentration, _, drift, vol, benchmark = ASSET_PROFILES[pick]
+        asset_id = first_id + n
+        ticker = f"S{n:05d}"
+        manager = None if asset_class == "Stock" else str(rng.choice(MANAGERS))
+        if asset_class == "Stock":
+            name = f"{rng.choice(LAST_NAMES)} {rng.choice(['Holdings', 'Industries', 'Technologies', 'Group'])} {n}"
+        else:
+            name = f"{manager} {concentration} {'ETF' if asset_class == 'ETF' else 'Fund'} {n}"
+        is_bond = "Bond" in concentration
+        assets.append((
+            asset_id, ticker, name, asset_class,
+            round(float(rng.uniform(0.0003, 0.012)), 4) if asset_class == "Mutual Fund" else None,
+            round(float(vol * rng.uniform(0.7, 1.3)), 3) if asset_class == "Stock" else None,
+            str(rng.choice(SIMILAR_ASSETS[concentration])) if asset_class == "ETF" else None,
+            manager,
+            round(float(rng.uniform(14, 23)), 2) if is_bond else (0.0 if asset_class != "Stock" else None),
+            concentration,
+        ))
+        benchmarks.append((ticker, name, benchmark))
+        walks[asset_id] = (drift, vol * rng.uniform(0.7, 1.3))
+        if asset_class != "Stock":
+            weights = rng.dirichlet(market * 60) * 100
+            sectors.extend((asset_id, s, s, round(float(w), 2)) for s, w in zip(sector_names, weights))
+
+    _insert_rows(conn, AssetType, ["asset_id", "asset_ticker", "asset_name", "asset_class", "net_expense_ratio",
+                                   "one_yr_volatility", "similar_asset", "asset_manager", "bond_rating",
+                                   "concentration"], assets)
+    _insert_rows(conn, AssetSector, ["asset_id", "sector_symbol", "sector_name", "sector_weightage"], sectors)
+    _insert_rows(conn, RelativeBenchmark, ["asset_ticker", "asset_name", "relative_benchmark"], benchmarks)
+    return walks
+
+
+def _price_history(conn, rng: np.random.Generator, walks: Dict[int, tuple], days: pd.DatetimeIndex) -> Dict[int, np.ndarray]:
+    """
+    Insert a geometric random walk of closes per asset over `days`.
+
+    Returns:
+        dict: asset_id -> closes aligned with `days`
+    """
+    dt = 1 / 252
+    day_strings = days.strftime("%Y-%m-%d").tolist()
+    prices, rows = {}, []
+    for asset_id, (drift, vol) in walks.items():
+        steps = (drift - vol ** 2 / 2) * dt + vol * np.sqrt(dt) * rng.standard_normal(len(days))
+        closes = np.round(rng.uniform(10, 400) * np.exp(np.cumsum(steps)), 4)
+        prices[asset_id] = closes
+        rows.extend(zip([asset_id] * len(days), day_strings, closes.tolist()))
+        if len(rows) >= INSERT_CHUNK:
+            _insert_rows(conn, AssetHistory, ["asset_id", "date", "close_price"], rows)
+            rows = []
+    _insert_rows(conn, AssetHistory, ["asset_id", "date", "close_price"], rows)
+    return prices
+
+
+def _users(conn, rng: np.random.Generator, config: SyntheticConfig, cash_asset_id: int,
+           prices: Dict[int, np.ndarray], days: pd.DatetimeIndex) -> Dict[str, int]:
+    """Insert users, bank accounts, transactions, holdings and orders."""
+    first_id = conn.exec_driver_sql("SELECT coalesce(max(user_id), 0) + 1 FROM users").scalar()
+    tickers = dict(conn.exec_driver_sql("SELECT asset_id, asset_ticker FROM asset_type").all())
+    investable = np.array([asset_id for asset_id, in conn.exec_driver_sql(
+        "SELECT asset_id FROM asset_type WHERE asset_class NOT IN ('Cash', 'Index') ORDER BY asset_id").all()])
+    day_strings = days.strftime("%Y-%m-%d").tolist()
+    end = days[-1].to_pydatetime()
+
+    users, accounts, transactions, holdings, orders = [], [], [], [], []
+    for n in range(config.users):
+        user_id = first_id + n
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        dob = date(1950, 1, 1) + timedelta(days=int(rng.integers(0, 365 * 55)))
+        users.append((user_id, f"{first} {last}", f"user{user_id:06d}", f"{first}.{last}.{user_id}@example.com",
+                      PASSWORD, dob.isoformat(), f"1{user_id:010d}"))
+        for bank in rng.choice(len(BANKS), size=int(rng.integers(1, 4)), replace=False):
+            accounts.append((user_id, BANKS[bank], f"***{int(rng.integers(1000, 10000))}",
+                             str(rng.choice(ACCOUNT_TYPES)), round(float(rng.uniform(0, 50000)), 2), 1))
+
+        # Transactions in date order: an opening BUY per holding, then random BUYs and SELLs
+        held = rng.choice(investable, size=min(config.holdings_per_user, len(investable)), replace=False)
+        count = max(config.transactions_per_user, len(held))
+        picks = np.concatenate((held, rng.choice(held, size=count - len(held))))
+        opening = np.sort(rng.integers(0, len(days) // 2, size=len(held)))
+        trade_days = np.concatenate((opening, np.sort(rng.integers(opening[-1], len(days), size=count - len(held)))))
+        units = {int(a): 0.0 for a in held}
+        bought = {int(a): [0.0, 0.0] for a in held}  # units, cost of all BUYs
+        for asset_id, day in zip(picks.tolist(), trade_days.tolist()):
+            price = float(prices[asset_id][day])
+            if units[asset_id] > 0 and rng.random() < 0.25:
+                qty = float(max(1, int(units[asset_id] * rng.uniform(0.1, 0.5))))
+                units[asset_id] -= qty
+                transactions.append((user_id, asset_id, "SELL", day_strings[day], qty, price, round(qty * price, 2)))
+            else:
+                qty = float(max(1, int(rng.uniform(500, 5000) / price)))
+                units[asset_id] += qty
+                bought[asset_id][0] += qty
+                bought[asset_id][1] += qty * price
+                transactions.append((user_id, asset_id, "BUY", day_strings[day], qty, price, round(qty * price, 2)))
+
+        cash = round(float(rng.uniform(5000, 100000)), 2)
+        holdings.append((user_id, cash_asset_id, cash, 1.0, cash))
+        for asset_id, qty in units.items():
+            if qty > 0:
+                avg_cost = bought[asset_id][1] / bought[asset_id][0]
+                holdings.append((user_id, asset_id, qty, avg_cost, qty * avg_cost))
+
+        for asset_id in rng.choice(held, size=config.orders_per_user).tolist():
+            price = float(prices[asset_id][-1])
+            qty = float(rng.integers(1, 21))
+            side = "Buy" if rng.random() < 0.7 else "Sell"
+            limit = rng.random() < 0.3
+            placed = end - timedelta(days=int(rng.integers(0, 90)), seconds=int(rng.integers(0, 86400)))
+            orders.append((user_id, asset_id, "Limit" if limit else "Market", tickers[asset_id],
+                           f"{side} {int(qty)} units of {tickers[asset_id]}",
+                           side, price, round(price * rng.uniform(0.97, 1.03), 2) if limit else None, qty,
+                           round(qty * price, 2), placed.date().isoformat(),
+                           str(rng.choice(ORDER_STATUSES[0], p=ORDER_STATUSES[1])),
+                           placed.strftime("%Y-%m-%d %H:%M:%S.%f")))
+
+    return {
+        "users": _insert_rows(conn, User, ["user_id", "name", "username", "email", "password", "dob",
+                                           "phone_number"], users),
+        "user_bank_accounts": _insert_rows(conn, UserBankAccount, ["user_id", "bank_name", "account_number",
+                                                                   "account_type", "available_balance",
+                                                                   "is_active"], accounts),
+        "user_transactions": _insert_rows(conn, UserTransactions, ["user_id", "asset_id", "trans_type", "date",
+                                                                   "units", "price_per_unit", "cost"], transactions),
+        "user_portfolio": _insert_rows(conn, UserPortfolio, ["user_id", "asset_id", "asset_total_units",
+                                                             "avg_cost_per_unit", "investment_amount"], holdings),
+        "order_book": _insert_rows(conn, OrderBook, ["user_id", "asset_id", "order_type", "symbol", "description",
+                                                     "buy_sell", "unit_price", "limit_price", "qty", "amount",
+                                                     "settlement_date", "order_status", "order_date"], orders),
+    }
+
+
+def generate(path: str, config: SyntheticConfig, template: str = DEFAULT_TEMPLATE,
+             overwrite: bool = False) -> Dict[str, int]:
+    """
+    Write a synthetic database to `path`.
+
+    Args:
+        path: SQLite file to create
+        config: Sizes and seed
+        template: Database to copy the reference universe from
+        overwrite: Replace `path` when it exists
+
+    Returns:
+        dict: Rows written per table
+    """
+    if os.path.exists(path):
+        if not overwrite:
+            raise FileExistsError(f"{path} exists; pass overwrite=True (--force) to replace it")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    rng = np.random.default_rng(config.seed)
+    engine = create_sqlite_engine(f"sqlite:///{path}", echo=False, journal_mode="OFF", synchronous="OFF",
+                                  pool_size=1)
+    Base.metadata.create_all(engine)
+    try:
+        with engine.connect() as conn:
+            counts = _copy_reference_tables(conn, template)
+            cash_asset_id = conn.exec_driver_sql("SELECT asset_id FROM asset_type WHERE asset_ticker = 'CASH'").scalar()
+            walks = {
+                asset_id: _walk(asset_class, concentration)
+                for asset_id, asset_class, concentration in conn.exec_driver_sql(
+                    "SELECT asset_id, asset_class, concentration FROM asset_type WHERE asset_ticker != 'CASH'").all()
+            }
+            walks.update(_synthetic_assets(conn, rng, config.assets))
+            counts["asset_type"] += config.assets
+            counts["asset_sector"] = conn.exec_driver_sql("SELECT count(*) FROM asset_sector").scalar()
+            counts["relative_benchmarks"] += config.assets
+            conn.commit()
+
+            end = pd.Timestamp(config.end)
+            days = pd.bdate_range(end - relativedelta(years=config.years), end - pd.Timedelta(days=1))
+            prices = _price_history(conn, rng, walks, days)
+            counts["asset_history"] = len(prices) * len(days)
+            conn.commit()
+
+            counts.update(_users(conn, rng, config, cash_asset_id, prices, days))
+            conn.commit()
+            conn.execute(text("ANALYZE"))
+            conn.commit()
+
+        session = Session(bind=engine)
+        try:
+            counts["asset_latest_price"] = AssetLatestPrice.rebuild(session)
+            DataVersion.bump(session)
+        finally:
+            session.close()
+    finally:
+        engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a synthetic voicebot database for load and benchmark testing")
+    parser.add_argument("--out", required=True, help="SQLite file to write")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help=f"Multiple of {SCALE_BASE['users']} users and {SCALE_BASE['assets']} synthetic assets")
+    parser.add_argument("--users", type=int, help="Users to create (overrides --scale)")
+    parser.add_argument("--assets", type=int, help="Synthetic assets on top of the template's (overrides --scale)")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--transactions-per-user", type=int, default=60)
+    parser.add_argument("--holdings-per-user", type=int, default=12)
+    parser.add_argument("--orders-per-user", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="Last day of history, YYYY-MM-DD")
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE, help="Database to copy the reference universe from")
+    parser.add_argument("--force", action="store_true", help="Replace --out when it exists")
+    args = parser.parse_args()
+
+    overrides = {name: getattr(args, name) for name in SCALE_BASE if getattr(args, name) is not None}
+    config = SyntheticConfig.scaled(args.scale, years=args.years, transactions_per_user=args.transactions_per_user,
+                                    holdings_per_user=args.holdings_per_user, orders_per_user=args.orders_per_user,
+                                    seed=args.seed, end=args.end, **overrides)
+    print(f"Generating {args.out}: {asdict(config)}")
+    started = time.perf_counter()
+    counts = generate(args.out, config, template=args.template, overwrite=args.force)
+    for table, rows in counts.items():
+        print(f"  {table:<32} {rows:>12,}")
+    print(f"Done in {time.perf_counter() - started:.1f}s, {os.path.getsize(args.out) / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from src.components.controller import router as api_router1
 from src.components.yahoofinance import router as api_router2
+from src.components.price_history_store import price_history_store
+from src.components.reference_catalog import reference_catalog
+from src.components.refresh_scheduler import refresh_scheduler
+from src.components.tool_schemas import tool_schema_registry
+from src.database.async_database import connect_async_engines, dispose_async_engines
 from src.database.database import Base, engine
+from src.database.migrations import apply_migrations
+from src.pipeline import metrics
 from src.pipeline.exception import CustomException
 from src.pipeline.logger import logger
 import uvicorn
@@ -16,7 +23,8 @@ except ImportError:
     logger.warning("Custom patch module not found, proceeding without it.")    
 
 
-app = FastAPI()
+# Response bodies are encoded by TimedJSONResponse so their serialization time is measured
+app = FastAPI(default_response_class=metrics.TimedJSONResponse)
 
 # CORS middleware configuration
 origins = [
@@ -32,6 +40,9 @@ origins = [
     "https://rtpa.azurewebsites.net",
 ]
 
+# Per-endpoint latency histograms, exported on /metrics
+app.middleware("http")(metrics.http_metrics_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -43,6 +54,16 @@ app.add_middleware(
 # Create database tables
 # Base.metadata.create_all(bind=engine)
 
+# Add tables and indexes that the shipped database predates
+apply_migrations(engine)
+
+# Load asset price history into memory for the analytics tools, from the
+# PRICE_HISTORY_ARCHIVE directory when it is set and still current
+logger.info(f"Loaded {price_history_store.load()} price history rows from the {price_history_store.stats()['last_load']['source']}")
+logger.info(f"Loaded {reference_catalog.load()} assets into the reference catalog")
+tool_schema_registry.tools_schema()
+logger.info(f"Built voice tool schemas in {tool_schema_registry.stats()['last_build_ms']} ms")
+
 # Define static file directory
 # static_dir = os.path.join(os.path.dirname(__file__), "src\static")
 # print(static_dir)
@@ -54,6 +75,29 @@ app.add_middleware(
 app.include_router(api_router1)  
 app.include_router(api_router2)
 
+# Keep asset history current: incremental refreshes every HISTORY_REFRESH_INTERVAL_SECONDS
+@app.on_event("startup")
+async def start_refresh_scheduler():
+    refresh_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_refresh_scheduler():
+    await refresh_scheduler.stop()
+
+# Open the async engines before tool calls can race to make their first connection
+@app.on_event("startup")
+async def connect_tool_databases():
+    await connect_async_engines()
+
+@app.on_event("shutdown")
+async def close_tool_databases():
+    await dispose_async_engines()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Tool and endpoint latency histograms, error and cache counters in the Prometheus text format."""
+    return metrics.metrics_registry.render()
+
 @app.exception_handler(CustomException)
 async def custom_exception_handler(request: Request, exc: CustomException):
     logger.error(f"An error occurred: {exc.error_message}")
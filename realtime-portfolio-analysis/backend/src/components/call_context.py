@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass
+class CallContext:
+    """
+    State of one voice call, shared by every tool call made during it.
+
+    Created by websocket_endpoint for each connection and attached to the
+    call's LLM service, so tool handlers reach it through `params.llm` (see
+    get_call_context). authenticate_user_def fills in the user once the caller
+    is verified; later tool calls then know the user's phone number, cash
+    asset and websocket without querying the database.
+
+    Args:
+        connection_id: Unique id of the websocket connection
+        phone_number: Phone number the call was opened with
+        websocket: The call's FastAPI websocket
+    """
+    connection_id: str
+    phone_number: str
+    websocket: Any = None
+    user_id: Optional[int] = None
+    user_name: Optional[str] = None
+    cash_asset_id: Optional[int] = None
+
+    @property
+    def is_authenticated(self) -> bool:
+        return self.user_id is not None
+
+    def authenticate(self, user_id: int, user_name: str = None, cash_asset_id: int = None):
+        """Record the verified user of this call."""
+        self.user_id = int(user_id)
+        self.user_name = user_name
+        self.cash_asset_id = cash_asset_id
+
+    def owns(self, user_id) -> bool:
+        """Whether the call is authenticated as `user_id` (tool arguments may carry it as a string)."""
+        try:
+            return self.user_id is not None and int(user_id) == self.user_id
+        except (TypeError, ValueError):
+            return False
+
+
+def attach_call_context(llm, context: CallContext):
+    """Attach a call's context to its LLM service, which every FunctionCallParams references."""
+    llm.call_context = context
+
+
+def get_call_context(params) -> Optional[CallContext]:
+    """The CallContext of the call a tool is invoked from, or None outside a voice call."""
+    return getattr(getattr(params, "llm", None), "call_context", None)
@@ -4,12 +4,15 @@ from fastapi.websockets import WebSocketState
 from sqlalchemy.orm import Session
 # from passlib.context import CryptContext 
 from sqlalchemy import func, and_, or_, distinct, case, literal, text, desc
-from src.database.database import SessionLocal
+from src.database.database import SessionLocal, ReadSessionLocal
+from src.database.async_database import AsyncReadSessionLocal
+from src.database import async_queries
 from src.database.models import User
 from pydantic import BaseModel
 from typing import List
 from src.pipeline.exception import CustomException
 from src.pipeline.logger import logger
+from src.pipeline import metrics, tracing
 from src.components.prompt_data import PROMPT
 from src.database.models import *
 from src.components.helper_functions import *
@@ -17,8 +20,17 @@ from src.components.filter_helper_functions import *
 from src.components.benchmark_returns import get_index_returns
 from src.components.news_tool_functions import *
 from src.components.document_index import AsyncDocumentIndex
-from src.components.tool_schemas import PortfolioToolSchemas
-import update_asset_history_table as uaht
+from src.components.tool_schemas import tool_schema_registry
+from src.components.tool_executor import tool_executor, loop_bound
+from src.components.date_markers import mark_dates
+from src.components.portfolio_snapshot import PortfolioSnapshot, portfolio_snapshots
+from src.components.quote_cache import quote_cache
+from src.components.call_context import CallContext, attach_call_context, get_call_context
+from src.components.reference_catalog import reference_catalog
+from src.components.price_history_store import apply_sector_weights, get_holdings_history_async, get_sector_weights_async, price_history_store
+from src.components.refresh_scheduler import refresh_scheduler
+from src.components.scripted_llm import ScriptedLLMService
+from contextlib import ExitStack
 from datetime import datetime, timedelta, date
 from dotenv import load_dotenv
 from decimal import Decimal
@@ -26,6 +38,7 @@ from dateutil.relativedelta import relativedelta
 import pandas as pd
 import sys
 import asyncio
+import time
 import uuid
 import json
 import os
@@ -151,6 +164,10 @@ def get_portfolio_summary(user_id: int, use_realtime_prices: bool = True):
     """
     Get portfolio summary for a user with live stock prices.
 
+    Served from the user's cached portfolio snapshot; writes to holdings, cash or
+    orders invalidate it. Live prices are refetched once they are older than the
+    quote cache TTL.
+
     Args:
         user_id: User ID
         use_realtime_prices: If True, fetches live prices from yfinance (default: True)
@@ -162,136 +179,87 @@ def get_portfolio_summary(user_id: int, use_realtime_prices: bool = True):
     global portfolio_holding_flag
     portfolio_holding_flag = True
 
-    db = SessionLocal()
+    snapshot = portfolio_snapshots.get(user_id, load_portfolio_snapshot)
 
-    # If using real-time prices, fetch them first
-    realtime_prices = {}
-    if use_realtime_prices:
-        # Get all tickers for this user
-        tickers = db.query(AssetType.asset_ticker).join(
-            UserPortfolio, AssetType.asset_id == UserPortfolio.asset_id
-        ).filter(
-            UserPortfolio.user_id == user_id,
-            AssetType.asset_ticker != 'CASH'
-        ).all()
-        symbols = [ticker[0] for ticker in tickers]
+    # If using real-time prices, refresh them unless the snapshot's are still fresh
+    if use_realtime_prices and not snapshot.prices_fresh(quote_cache.ttl_seconds):
+        symbols = snapshot.symbols
         if symbols:
-            realtime_prices = get_realtime_prices_bulk(symbols)
+            quotes = get_realtime_quotes_bulk(symbols)
+            snapshot.apply_prices(quotes.prices, full_refresh=True)
+            if quotes.stale or quotes.missing:
+                logger.warning(f"Portfolio summary for user {user_id} served in {quotes.elapsed_ms}ms with stale prices for {quotes.stale} and no price for {quotes.missing}")
 
-    latest_price_subquery = (
-    db.query(
-        AssetHistory.asset_id,
-        func.max(AssetHistory.date).label('latest_date')
-    )
-    .group_by(AssetHistory.asset_id)
-    .subquery()
-    )
+    return snapshot.summary(use_realtime_prices=use_realtime_prices)
 
-    # Main query with rounding
-    query = (
-        db.query(
-            User.user_id.label('Account Number'),
-            AssetType.asset_name.label('Asset Name'),
-            AssetType.asset_class.label('Investment Type'),
-            AssetType.concentration.label('Concentration'),
-            AssetType.asset_ticker.label('Ticker'),
-            func.round(UserPortfolio.asset_total_units,2).label('Quantity'),
-            case(
-                (AssetType.asset_class == 'Cash', literal(1.0)),
-                else_=func.round(UserPortfolio.avg_cost_per_unit, 2)
-            ).label('Avg. Cost'),
-            func.round(UserPortfolio.investment_amount, 2).label('Purchase Cost'),
-            case(
-                (AssetType.asset_class == 'Cash', literal(1.0)),
-                else_=func.round(AssetHistory.close_price, 2)
-            ).label('Current Price'),
-            case(
-                (AssetType.asset_class == 'Cash', UserPortfolio.investment_amount),
-                else_=func.round(UserPortfolio.asset_total_units * AssetHistory.close_price, 2)
-            ).label('Current Value'),
-            case(
-                (AssetType.asset_class == 'Cash', literal(0.0)),
-                else_=func.round((UserPortfolio.asset_total_units * AssetHistory.close_price) - 
-                        UserPortfolio.investment_amount, 2)
-            ).label('P&L'),
-            case(
-                (AssetType.asset_class == 'Cash', literal(0.0)),
-                else_=func.round(((AssetHistory.close_price / UserPortfolio.avg_cost_per_unit) - 1) * 100, 2)
-            ).label('Percentage Change')
-        )
-        .join(UserPortfolio, User.user_id == UserPortfolio.user_id)
-        .join(AssetType, UserPortfolio.asset_id == AssetType.asset_id)
-        .outerjoin(latest_price_subquery, AssetType.asset_id == latest_price_subquery.c.asset_id)
-        .outerjoin(AssetHistory, (AssetHistory.asset_id == latest_price_subquery.c.asset_id) & 
-                            (AssetHistory.date == latest_price_subquery.c.latest_date))
-        .filter(User.user_id == user_id)
-        .order_by(
-            AssetType.asset_class,
-            AssetType.concentration,
-            AssetType.asset_name
+def load_portfolio_snapshot(user_id: int):
+    """Load a user's holdings, cost basis and available cash from the database into a PortfolioSnapshot."""
+    db = SessionLocal()
+    try:
+        # Main query with rounding
+        query = (
+            db.query(
+                User.user_id.label('Account Number'),
+                AssetType.asset_name.label('Asset Name'),
+                AssetType.asset_class.label('Investment Type'),
+                AssetType.concentration.label('Concentration'),
+                AssetType.asset_ticker.label('Ticker'),
+                func.round(UserPortfolio.asset_total_units,2).label('Quantity'),
+                case(
+                    (AssetType.asset_class == 'Cash', literal(1.0)),
+                    else_=func.round(UserPortfolio.avg_cost_per_unit, 2)
+                ).label('Avg. Cost'),
+                func.round(UserPortfolio.investment_amount, 2).label('Purchase Cost'),
+                case(
+                    (AssetType.asset_class == 'Cash', literal(1.0)),
+                    else_=func.round(AssetLatestPrice.close_price, 2)
+                ).label('Current Price'),
+                case(
+                    (AssetType.asset_class == 'Cash', UserPortfolio.investment_amount),
+                    else_=func.round(UserPortfolio.asset_total_units * AssetLatestPrice.close_price, 2)
+                ).label('Current Value'),
+                case(
+                    (AssetType.asset_class == 'Cash', literal(0.0)),
+                    else_=func.round((UserPortfolio.asset_total_units * AssetLatestPrice.close_price) - 
+                            UserPortfolio.investment_amount, 2)
+                ).label('P&L'),
+                case(
+                    (AssetType.asset_class == 'Cash', literal(0.0)),
+                    else_=func.round(((AssetLatestPrice.close_price / UserPortfolio.avg_cost_per_unit) - 1) * 100, 2)
+                ).label('Percentage Change')
+            )
+            .join(UserPortfolio, User.user_id == UserPortfolio.user_id)
+            .join(AssetType, UserPortfolio.asset_id == AssetType.asset_id)
+            .outerjoin(AssetLatestPrice, AssetType.asset_id == AssetLatestPrice.asset_id)
+            .filter(User.user_id == user_id)
+            .order_by(
+                AssetType.asset_class,
+                AssetType.concentration,
+                AssetType.asset_name
+            )
         )
-    )
 
-    # Execute the query and get the results
-    rows = query.all()
-
-    # Convert query results to list of dictionaries
-    table_data = [dict(row._mapping) for row in rows]
-
-    # Fix CASH row to show available balance (subtract pending buy orders)
-    for row_data in table_data:
-        if row_data.get('Ticker') == 'CASH':
-            # Use centralized cash balance calculation
-            available_cash = calculate_available_cash_balance(user_id, db)
-            logger.info(f"Portfolio Summary CASH fix - User {user_id}: Available cash = ${available_cash:.2f}")
-            row_data['Quantity'] = available_cash
-            row_data['Purchase Cost'] = available_cash
-            row_data['Current Value'] = available_cash
-            logger.info(f"Updated CASH row: Quantity={row_data['Quantity']}, Current Value={row_data['Current Value']}")
-            break
-
-    # Update with real-time prices if available
-    if use_realtime_prices and realtime_prices:
-        for row_data in table_data:
-            ticker = row_data.get('Ticker')
-            if ticker in realtime_prices and ticker != 'CASH':
-                rt_price = realtime_prices[ticker]
-                quantity = row_data.get('Quantity', 0)
-                avg_cost = row_data.get('Avg. Cost', 0)
-
-                # Update current price and recalculate values
-                row_data['Current Price'] = rt_price
-                row_data['Current Value'] = round(quantity * rt_price, 2)
-                row_data['P&L'] = round((quantity * rt_price) - row_data.get('Purchase Cost', 0), 2)
-                if avg_cost > 0:
-                    row_data['Percentage Change'] = round(((rt_price / avg_cost) - 1) * 100, 2)
-
-    # Calculate totals
-    total_purchase_cost = sum(row.get('Purchase Cost', 0) for row in table_data)
-    total_current_value = sum(row.get('Current Value', 0) for row in table_data)
-    total_pnl = total_current_value - total_purchase_cost
-    total_percentage_change = (total_current_value / total_purchase_cost - 1) * 100 if total_purchase_cost != 0 else 0
-
-    result = {}
-    result["table"] = table_data
-
-    # Add overall totals to the result dictionary
-    result["total"] = {
-        'total_purchase_cost': round(total_purchase_cost, 2),
-        'total_current_value': round(total_current_value, 2),
-        'total_pnl': round(total_pnl, 2),
-        'total_percentage_change': round(total_percentage_change, 2)
-        }
+        # Execute the query and convert the results to list of dictionaries
+        table_data = [dict(row._mapping) for row in query.all()]
 
-    db.close()
-    return result
+        # Fix CASH row to show available balance (subtract pending buy orders)
+        for row_data in table_data:
+            if row_data.get('Ticker') == 'CASH':
+                # Use centralized cash balance calculation
+                available_cash = calculate_available_cash_balance(user_id, db)
+                logger.info(f"Portfolio Summary CASH fix - User {user_id}: Available cash = ${available_cash:.2f}")
+                row_data['Quantity'] = available_cash
+                row_data['Purchase Cost'] = available_cash
+                row_data['Current Value'] = available_cash
+                logger.info(f"Updated CASH row: Quantity={row_data['Quantity']}, Current Value={row_data['Current Value']}")
+                break
+
+        return PortfolioSnapshot(user_id, table_data)
+    finally:
+        db.close()
 
 def get_order_book_status(user_id: int, db):
-    order_status_order = {
-            'Under Review': 1,
-            'Placed': 2,
-            'Cancelled': 3
-        }
+    order_status_order = async_queries.ORDER_STATUS_ORDER
     order_details = db.query(OrderBook).filter(OrderBook.user_id == user_id).order_by(
         case(
             {status: order_status_order[status] for status in order_status_order},
@@ -300,6 +268,13 @@ def get_order_book_status(user_id: int, db):
         )
     ).all()
 
+    return serialize_order_book(order_details)
+
+async def get_order_book_status_async(user_id: int, db):
+    """get_order_book_status for an AsyncSession."""
+    return serialize_order_book(await async_queries.get_order_book(db, user_id))
+
+def serialize_order_book(order_details):
     order_details_json = [
         {c.name: serialize_value(getattr(order, c.name)) for c in order.__table__.columns if c.name not in ['asset_id', 'user_id','unit_price','description']}
         for order in order_details
@@ -367,16 +342,17 @@ async def reset_database(user_id: int,db: Session = Depends(get_db)):
     try:
         db.query(OrderBook).delete()
 
-        cash_asset_id = db.query(AssetType.asset_id).filter(AssetType.asset_ticker == 'CASH').scalar()
+        cash_asset_id = reference_catalog.cash_asset_id
 
         user_portfolio = db.query(UserPortfolio).filter(UserPortfolio.user_id == user_id, UserPortfolio.asset_id == cash_asset_id).first()
 
         user_portfolio.investment_amount = 3025
         user_portfolio.asset_total_units = 3025
         db.commit()
+        portfolio_snapshots.invalidate()  # order book was cleared for every user
 
         logger.bind(frontend=True).info("Starting refresh_asset_history_table asynchronously...")  
-        asyncio.create_task(run_refresh_asset_history_table())  # Run the function asynchronously
+        refresh_scheduler.trigger("reset_db")  # Runs in the background, joins a refresh already running
 
         logger.bind(frontend=True).info("Database reset successfully, asset history table refresh in progress.")
         return {"message": "success"}
@@ -384,10 +360,6 @@ async def reset_database(user_id: int,db: Session = Depends(get_db)):
         logger.error(f"Error resetting database: {str(e)}")
         raise CustomException(error_message="Failed to reset database", error_details=e)
 
-async def run_refresh_asset_history_table():  
-    """Async wrapper for refresh_asset_history_table."""  
-    await asyncio.to_thread(uaht.refresh_asset_history_table) 
-
 @router.get("/api/cash_balance")
 def get_cash_balance(user_id: int, db: Session = Depends(get_db)):
     """
@@ -484,7 +456,7 @@ def transfer_funds(user_id: int, bank_account_id: int, amount: float, db: Sessio
             )
 
         # Get the cash asset
-        cash_asset_id = db.query(AssetType.asset_id).filter(AssetType.asset_ticker == 'CASH').scalar()
+        cash_asset_id = reference_catalog.cash_asset_id
         if not cash_asset_id:
             raise HTTPException(status_code=404, detail="Cash asset not found")
 
@@ -514,6 +486,7 @@ def transfer_funds(user_id: int, bank_account_id: int, amount: float, db: Sessio
 
         # Commit the transaction
         db.commit()
+        portfolio_snapshots.invalidate(user_id)
 
         logger.info(f"Transferred ${amount} from bank account {bank_account_id} to brokerage for user {user_id}")
 
@@ -535,28 +508,16 @@ def transfer_funds(user_id: int, bank_account_id: int, amount: float, db: Sessio
 def get_stock_quote(symbol: str):
     try:
         import yfinance as yf
-        from curl_cffi import requests
-        from datetime import datetime
-
-        # Create session with browser impersonation
-        session = requests.Session(impersonate="chrome")
-        ticker = yf.Ticker(symbol, session=session)
 
-        # Get ticker info
-        info = ticker.info
+        # Get ticker info through the shared quote cache
+        info = get_ticker_info(symbol)
 
         # Get current price - try multiple sources
-        current_price = None
-        if 'currentPrice' in info and info['currentPrice']:
-            current_price = info['currentPrice']
-        elif 'regularMarketPrice' in info and info['regularMarketPrice']:
-            current_price = info['regularMarketPrice']
-        elif 'previousClose' in info and info['previousClose']:
-            current_price = info['previousClose']
+        current_price = extract_price_from_info(info)
 
         if current_price is None:
             # Fallback: try to get from history
-            hist = ticker.history(period="1d")
+            hist = yf.Ticker(symbol, session=yfinance_session()).history(period="1d")
             if not hist.empty:
                 current_price = hist['Close'].iloc[-1]
 
@@ -578,6 +539,7 @@ def get_stock_quote(symbol: str):
         }
 
         logger.info(f"Retrieved stock quote for {symbol}: ${current_price}")
+        portfolio_snapshots.apply_price_tick(quote_data["symbol"], quote_data["current_price"])
         return quote_data
 
     except HTTPException:
@@ -587,12 +549,27 @@ def get_stock_quote(symbol: str):
         raise CustomException(error_message=f"Failed to fetch stock quote for {symbol}", error_details=e)
 
 # Function to send JSON data through a specific WebSocket connection
-async def send_json_to_websocket(phonenumber: str, data: dict):
+# (loop_bound: tool handlers call this from the tool executor's worker threads)
+@loop_bound
+async def send_json_to_websocket(target, data: dict):
+    """
+    Send `data` to a client websocket.
+
+    Args:
+        target: The call's CallContext (see get_call_target), or a phone number
+            to look the connection up in active_connections
+        data: JSON-serializable payload
+    """
+    if isinstance(target, CallContext):
+        phonenumber, websocket = target.phone_number, target.websocket
+    else:
+        phonenumber, websocket = target, active_connections.get(target)
     print("Sending data to WebSocket for phone number:", phonenumber)
-    if phonenumber in active_connections:
-        websocket = active_connections[phonenumber]
+    if websocket is not None:
         if websocket.client_state == WebSocketState.CONNECTED:
-            await websocket.send_json(data)
+            text = metrics.dumps_json(data)
+            with metrics.phase("ws_send"):
+                await websocket.send_text(text)
         else:
             print(f"WebSocket for {phonenumber} is not in a connected state")
     else:
@@ -600,6 +577,94 @@ async def send_json_to_websocket(phonenumber: str, data: dict):
 
 ##################################################################
 
+# Time from accepting a websocket to starting its pipeline
+session_setup_stats = {"sessions": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": None}
+
+def record_session_setup(started: float) -> float:
+    """Record the setup latency of a session started at perf_counter() value `started`, in ms."""
+    setup_ms = (time.perf_counter() - started) * 1000
+    session_setup_stats["sessions"] += 1
+    session_setup_stats["total_ms"] += setup_ms
+    session_setup_stats["max_ms"] = max(session_setup_stats["max_ms"], setup_ms)
+    session_setup_stats["last_ms"] = round(setup_ms, 2)
+    return setup_ms
+
+def register_voice_tools(llm):
+    """
+    Register every voice tool handler on `llm` through the tool executor.
+
+    Offloaded handlers run on the tool executor's thread pool so their blocking
+    DB/pandas/HTTP work never stalls the audio pipelines sharing this event loop.
+    The fact sheet RAG tool is natively async and stays on the loop.
+    """
+    voice_tools = [
+        # (tool name, handler, offload)
+        ("authenticate_user_tool", authenticate_user_def, True),
+        ("user_holding_tool", get_user_holdings, True),
+        ("aggregation_tool", get_aggregation_info, True),
+        ("portfolio_benchmark_tool", get_portfolio_benchmark, True),
+        ("relative_performance_tool", get_relative_performance, True),
+        ("risk_score_tool", get_risk_score, True),
+        ("attribution_returns_tool", get_attribution_return, True),
+        ("news_tool", get_news, True),
+        ("fund_fact_sheet_download_tool", get_fund_fact_sheet, True),
+        ("fund_fact_sheet_query_tool", get_fact_sheet_query_answer, False),
+        ("place_trade_tool", place_trade, True),
+        ("update_trade_tool", update_trade, True),
+        ("confirm_trade_tool", confirm_trade, True),
+        ("check_order_status_tool", check_order_status, True),
+        ("cancel_order_tool", cancel_order, True),
+        ("update_cash_balance_tool", update_cash_balance, True),
+        ("get_bank_accounts_tool", get_bank_accounts, True),
+        ("transfer_from_bank_tool", transfer_from_bank, True),
+        ("dismiss_fund_transfer_tool", dismiss_fund_transfer, True),
+        ("get_price_trend_tool", get_price_trend, True),
+    ]
+    for tool_name, handler, offload in voice_tools:
+        tool_executor.register(llm, tool_name, handler, offload=offload)
+
+@router.get("/api/portfolio_snapshot/stats")
+def get_portfolio_snapshot_stats():
+    """Return hit/miss/invalidation counters of the per-user portfolio snapshot cache."""
+    return portfolio_snapshots.stats()
+
+@router.get("/api/price_history/stats")
+def get_price_history_stats():
+    """Size and refresh counters of the in-memory price history store."""
+    return price_history_store.stats()
+
+@router.get("/api/reference_catalog/stats")
+def get_reference_catalog_stats():
+    """Version, size and reload counters of the in-memory reference tables."""
+    return reference_catalog.stats()
+
+@router.get("/api/session_setup/stats")
+def get_session_setup_stats():
+    """Websocket session setup latency and tool schema build counters."""
+    sessions = session_setup_stats["sessions"]
+    return {
+        "sessions": sessions,
+        "avg_ms": round(session_setup_stats["total_ms"] / sessions, 2) if sessions else 0.0,
+        "max_ms": round(session_setup_stats["max_ms"], 2),
+        "last_ms": session_setup_stats["last_ms"],
+        "tool_schemas": tool_schema_registry.stats(),
+    }
+
+@router.get("/api/admin/refresh_status")
+def get_refresh_status():
+    """Last asset history refresh: trigger, timing, rows written, failed tickers, and the schedule."""
+    return refresh_scheduler.status()
+
+@router.get("/api/tool_executor/stats")
+def get_tool_executor_stats():
+    """Return queue depth, concurrency and latency counters of the voice tool pool."""
+    return tool_executor.stats()
+
+@router.get("/api/tracing/stats")
+def get_tracing_stats():
+    """Trace file path and size, and counters of exported, queued and dropped spans."""
+    return tracing.span_exporter.stats()
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     connection_uuid = str(uuid.uuid4())
@@ -613,7 +678,15 @@ async def websocket_endpoint(websocket: WebSocket):
         await websocket.close(code=1008, reason="Phone number is required")
         return
     await websocket.accept()
+    setup_started = time.perf_counter()
     active_connections[phonenumber] = websocket
+    call_context = CallContext(connection_id=connection_uuid, phone_number=phonenumber, websocket=websocket)
+    # Log records and trace spans of this session carry its connection_uuid; both live in
+    # contextvars, so they follow this task and its tool calls without leaking into other sessions
+    session_scope = ExitStack()
+    session_scope.enter_context(logger.contextualize(uuid=connection_uuid, model="gpt-4o-realtime"))
+    session_span = tracing.start_span("session", "session", trace_id=connection_uuid, realtime=realtime, voice=voice_id)
+    session_error = None
      # --- Real-time logger Setup ---
     log_sink_id = None
     
@@ -653,57 +726,16 @@ async def websocket_endpoint(websocket: WebSocket):
     log_sink_id = logger.add(
         websocket_log_sink,
         level="DEBUG",
-        filter=frontend_log_filter, # Apply our custom filter
+        # Frontend records of this session only (records from outside any session have no uuid)
+        filter=lambda record: frontend_log_filter(record) and record["extra"].get("uuid", connection_uuid) == connection_uuid,
         enqueue=True,
         serialize=True
     )
     logger.info(f"Added *frontend* log sink ID: {log_sink_id} for client {websocket.client}")
     logger.bind(frontend=True).info(f"Starting session for {phonenumber}")  
 
-    schemas = PortfolioToolSchemas()
-
-    authenticate_user_tool_function = schemas.authenticate_user_tool()
-    user_holding_tool_function = schemas.user_holding_tool()
-    aggregation_tool_function = schemas.aggregation_tool()
-    portfolio_benchmark_tool_function = schemas.portfolio_benchmark_tool()
-    relative_performance_tool_function = schemas.relative_performance_tool()
-    risk_score_tool_function = schemas.risk_score_tool()
-    attribution_returns_tool_function = schemas.attribution_returns_tool()
-    news_tool_function = schemas.news_tool()
-    fund_fact_sheet_download_tool_function = schemas.fund_fact_sheet_download_tool()
-    fact_sheet_query_tool_function = schemas.fund_fact_sheet_query_tool()
-    place_trade_tool_function = schemas.place_trade_tool()
-    update_trade_tool_function = schemas.update_trade_tool()
-    confirm_trade_tool_function = schemas.confirm_trade_tool()
-    check_order_status_tool_function = schemas.check_order_status_tool()
-    cancel_order_tool_function = schemas.cancel_order_tool()
-    update_cash_balance_tool_function = schemas.update_cash_balance_tool()
-    get_bank_accounts_tool_function = schemas.get_bank_accounts_tool()
-    transfer_from_bank_tool_function = schemas.transfer_from_bank_tool()
-    dismiss_fund_transfer_tool_function = schemas.dismiss_fund_transfer_tool()
-    get_price_trend_tool_function = schemas.get_price_trend_tool()
-
-    tools = ToolsSchema(
-            standard_tools=[authenticate_user_tool_function,
-                             user_holding_tool_function, 
-                             aggregation_tool_function, 
-                             portfolio_benchmark_tool_function,
-                             relative_performance_tool_function,
-                             risk_score_tool_function,
-                             attribution_returns_tool_function,
-                             news_tool_function,
-                             fund_fact_sheet_download_tool_function,
-                             fact_sheet_query_tool_function,
-                             place_trade_tool_function,
-                             update_trade_tool_function,
-                             confirm_trade_tool_function,
-                             check_order_status_tool_function,
-                             cancel_order_tool_function,
-                             update_cash_balance_tool_function,
-                             get_bank_accounts_tool_function,
-                             transfer_from_bank_tool_function,
-                             dismiss_fund_transfer_tool_function,
-                             get_price_trend_tool_function],)
+    # Built once per reference data version and shared by every connection
+    tools = tool_schema_registry.tools_schema()
 
     # Configure transport
     transport = FastAPIWebsocketTransport(
@@ -732,7 +764,10 @@ async def websocket_endpoint(websocket: WebSocket):
             instructions=PROMPT,
         )
 
-        if realtime == "true":
+        if os.getenv("VOICE_LLM_SERVICE", "azure").lower() == "scripted":
+            # Offline stand-in playing scripted tool calls, for load tests (benchmarks/load_voice_sessions.py)
+            llm = ScriptedLLMService(pause_seconds=float(os.getenv("SCRIPTED_LLM_PAUSE_SECONDS", "1.0")))
+        elif realtime == "true":
 
             # Initialize the Gemini Multimodal Live model
             llm = AzureRealtimeBetaLLMService(
@@ -747,29 +782,9 @@ async def websocket_endpoint(websocket: WebSocket):
                 endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
                 model="gpt-4o",
             )    
-        logger.configure(extra={"uuid": connection_uuid,
-                            "model":"gpt-4o-realtime"})
         # llm.register_function("fund_information_tool", get_answers_from_rag)
-        llm.register_function("authenticate_user_tool", authenticate_user_def)
-        llm.register_function("user_holding_tool", get_user_holdings)
-        
-        llm.register_function("aggregation_tool", get_aggregation_info)
-        llm.register_function("portfolio_benchmark_tool", get_portfolio_benchmark)
-        llm.register_function("relative_performance_tool", get_relative_performance)
-        llm.register_function("risk_score_tool", get_risk_score)
-        llm.register_function("attribution_returns_tool", get_attribution_return)
-        llm.register_function("news_tool", get_news)
-        llm.register_function("fund_fact_sheet_download_tool", get_fund_fact_sheet)
-        llm.register_function("fund_fact_sheet_query_tool", get_fact_sheet_query_answer)
-        llm.register_function("place_trade_tool", place_trade)
-        llm.register_function("update_trade_tool", update_trade)
-        llm.register_function("confirm_trade_tool", confirm_trade)
-        llm.register_function("cancel_order_tool", cancel_order)
-        llm.register_function("update_cash_balance_tool", update_cash_balance)
-        llm.register_function("get_bank_accounts_tool", get_bank_accounts)
-        llm.register_function("transfer_from_bank_tool", transfer_from_bank)
-        llm.register_function("dismiss_fund_transfer_tool", dismiss_fund_transfer)
-        llm.register_function("get_price_trend_tool", get_price_trend)
+        attach_call_context(llm, call_context)
+        register_voice_tools(llm)
 
         message = [{"role": "system", "content": f"""Start by introducing yourself.
                 User's phone number is '{phonenumber}'. Ask him for his date of birth for authentication."""}]
@@ -778,7 +793,7 @@ async def websocket_endpoint(websocket: WebSocket):
         
         context_aggregator = llm.create_context_aggregator(context)
 
-        if realtime == "true":
+        if realtime == "true" or isinstance(llm, ScriptedLLMService):
             # Use in pipeline
             pipeline = Pipeline([
                 transport.input(),  # Speech-to-text
@@ -849,16 +864,24 @@ async def websocket_endpoint(websocket: WebSocket):
         async def on_session_timeout(transport, client):
             logger.info("Session timeout")
 
+        setup_ms = record_session_setup(setup_started)
+        logger.info(f"Session setup for {phonenumber} took {setup_ms:.1f} ms")
+        if session_span is not None:
+            session_span.set(setup_ms=round(setup_ms, 2), llm=type(llm).__name__)
+
         # Run the pipeline
         await PipelineRunner(handle_sigint=False, force_gc=True).run(task)
     except WebSocketDisconnect as e:
          logger.warning(f"Client {websocket.client} disconnected forcefully: {e.code} {e.reason}")
     except Exception as e:
+        session_error = e
         logger.error(f"An error occurred in websocket endpoint: {e}")
         logger.bind(frontend=True).critical(f"Session error: {e}")
         if 'task' in locals() and not task.has_finished():
             await task.cancel()
     finally:
+        if active_connections.get(phonenumber) is websocket:
+            del active_connections[phonenumber]
         # --- Logging Cleanup ---
         if log_sink_id is not None:
             try:
@@ -867,27 +890,60 @@ async def websocket_endpoint(websocket: WebSocket):
             except ValueError:
                 logger.warning(f"Log sink {log_sink_id} already removed or invalid.")
         # --- End Logging Cleanup ---    
+        tracing.end_span(session_span, session_error)
+        session_scope.close()
+
+async def get_user_phone_number(user_id):
+    """Phone number keying the user's websocket, read on the async database path."""
+    async with AsyncReadSessionLocal() as db:
+        return await async_queries.get_phone_number(db, user_id)
+
+async def get_call_target(params: FunctionCallParams, user_id):
+    """
+    Where a tool pushes UI updates for `user_id`: the call's CallContext when the
+    call is authenticated as that user, otherwise the user's phone number.
+    """
+    context = get_call_context(params)
+    if context is not None and context.owns(user_id):
+        return context
+    return await get_user_phone_number(user_id)
+
+async def get_user_cash_balance(params: FunctionCallParams, user_id):
+    """Available cash balance (see calculate_available_cash_balance), read on the async database path."""
+    context = get_call_context(params)
+    if context is not None and context.owns(user_id) and context.cash_asset_id:
+        cash_asset_id = context.cash_asset_id
+    else:
+        cash_asset_id = reference_catalog.cash_asset_id
+    async with AsyncReadSessionLocal() as db:
+        return await async_queries.get_available_cash_balance(db, user_id, cash_asset_id=cash_asset_id)
 
 async def authenticate_user_def(params:FunctionCallParams):
     phonenumber = params.arguments['phonenumber']
     dob = params.arguments['date_of_birth']
-    session = SessionLocal()
     if not phonenumber:
         await params.result_callback("Invalid input: Phone number is required")
     logger.info(f"Authenticating user with phone number: {phonenumber}")
     logger.bind(frontend=True).info(f"Authenticating user {phonenumber}...") # Log to frontend
 
-    user = session.query(User).filter(User.phone_number == phonenumber).first()
+    async with AsyncReadSessionLocal() as db:
+        user = await async_queries.get_user_by_phone(db, phonenumber)
     if user:
         # if str(user.dob) != dob:
         #     logger.bind(frontend=True).error(f"User authentication failed for phone number: {phonenumber}")
         #     await params.result_callback("User authentication failed")
         #     return
         
-        user_id = session.query(User.user_id).filter(User.phone_number == phonenumber).scalar()
+        user_id = user.user_id
+        # Later tool calls in this call read the user's identity from the call context
+        client = get_call_context(params)
+        if client is not None and client.phone_number == phonenumber:
+            client.authenticate(user_id, user.name, reference_catalog.cash_asset_id)
+        else:
+            client = phonenumber
         result = get_portfolio_summary(user_id=user_id)
 
-        await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"table","query_type":"user_portfolio","data": result})
+        await send_json_to_websocket(client, {"type":"log","type_of_data":"table","query_type":"user_portfolio","data": result})
         
         logger.info(f"User authenticated successfully: with user_id - {user.user_id}, Name - {user.name}")
         # logger.bind(frontend=True).success(json.loads(result_json))
@@ -898,15 +954,15 @@ async def authenticate_user_def(params:FunctionCallParams):
 
 async def get_user_holdings(params: FunctionCallParams):
     try:
-        session = SessionLocal()
         user_id = params.arguments['user_id']
-        phonenumber = session.query (User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
 
         result = get_portfolio_summary(user_id=user_id)
         
-        await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"table","query_type":"user_portfolio","data": result})
+        await send_json_to_websocket(client, {"type":"log","type_of_data":"table","query_type":"user_portfolio","data": result})
         
-        result_json = json.dumps(result)
+        with metrics.phase("serialization"):
+            result_json = json.dumps(result)
         
         formatted_message = f"Showing user holdings table."
         await params.result_callback(f"{formatted_message} Results: {json.loads(result_json)}. Do not read out the result and use only for the context of the call")
@@ -916,7 +972,7 @@ async def get_user_holdings(params: FunctionCallParams):
         raise CustomException(error_message="Failed to fetch user holdings", error_details=sys)
     
 async def get_aggregation_info(params: FunctionCallParams):
-    session = SessionLocal()
+    session = ReadSessionLocal()
     user_id = params.arguments['user_id']
     aggregation_metric = params.arguments['aggregation_metric']
     dimension_levels = params.arguments.get("dimension_levels", ["Asset Class"])
@@ -927,28 +983,14 @@ async def get_aggregation_info(params: FunctionCallParams):
     dimension_levels = get_standardized_filter_dimesions(dimension_levels, tool_type="aggregation") #getting the standized values of dimension levels
 
     if filter_values!=None:
-        filter_levels_dict = get_filter_levels_dict(session)
+        filter_levels_dict = get_filter_levels_dict()
         filters = get_filters_dict(filter_levels_dict, filter_values) #getting the filters dictionary
-    phonenumber = session.query (User.phone_number).filter(User.user_id == user_id).scalar()
+    client = await get_call_target(params, user_id)
 
     try:
         if aggregation_metric == 'total portfolio value':
-            # Subquery to get the latest closing price for each asset
-            latest_price_subquery = session.query(
-                AssetHistory.asset_id,
-                func.max(AssetHistory.date).label('max_date')
-            ).group_by(AssetHistory.asset_id).subquery()
-
-            latest_price = session.query(
-                    AssetHistory.asset_id,
-                    AssetHistory.close_price
-                ).join(
-                    latest_price_subquery,
-                    and_(
-                        AssetHistory.asset_id == latest_price_subquery.c.asset_id,
-                        AssetHistory.date == latest_price_subquery.c.max_date
-                    )
-                ).subquery()
+            # Latest closing price for each asset
+            latest_price = AssetLatestPrice.__table__
 
             query = session.query(
                 UserPortfolio.user_id,
@@ -1019,7 +1061,7 @@ async def get_aggregation_info(params: FunctionCallParams):
             query_df = query_to_dataframe(query)
             
             if len(query_df) == 0:
-                # await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"table","query_type":"aggregation_level_1","data": []})
+                # await send_json_to_websocket(client, {"type":"log","type_of_data":"table","query_type":"aggregation_level_1","data": []})
                 await params.result_callback("No data found for the given filters.")
                 return
 
@@ -1059,7 +1101,7 @@ async def get_aggregation_info(params: FunctionCallParams):
                                     title = "Portfolio Distribution by " + format_dimension(dimension_levels[0]),
                                     description = "Distribution by " + format_dimension(dimension_levels[0])
                                 )
-                await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"chart","query_type":"aggregation_level_1","data": chart_data})
+                await send_json_to_websocket(client, {"type":"log","type_of_data":"chart","query_type":"aggregation_level_1","data": chart_data})
                 # logger.bind(frontend=True).bind(log_type="Json").bind(log_type_of_data="chart").success(chart_data)
             elif len(dimension_levels) == 2:
                 chart_data = transform_to_donut_chart_format_double_level(
@@ -1072,18 +1114,13 @@ async def get_aggregation_info(params: FunctionCallParams):
                                     description = f"Distribution by {format_dimension(dimension_levels[0])} and {format_dimension(dimension_levels[1])}"
                                 )
                 print(f"Chart data for 2 levels {dimension_levels}: {chart_data}")  # Debugging line to see the chart data structure
-                await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"chart","query_type":"aggregation_level_2","data": chart_data})
+                await send_json_to_websocket(client, {"type":"log","type_of_data":"chart","query_type":"aggregation_level_2","data": chart_data})
                 # logger.bind(frontend=True).bind(log_type="Json").bind(log_type_of_data="chart").success(chart_data) 
 
         elif aggregation_metric == 'percentage returns':
-            # Get extended data for the user
-            extended_data = AssetHistory.get_extended_data(session, user_id)
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(extended_data, columns=[
-                'asset_hist_id', 'asset_id', 'date', 'close_price', 'asset_class', 'asset_name','concentration',
-                'asset_manager', 'category', 'ticker', 'sector', 'sector_weightage', 'asset_total_units'
-            ])
+            # Get the price history of the user's holdings from the in-memory store
+            async with AsyncReadSessionLocal() as db:
+                df = await get_holdings_history_async(db, user_id)
             # df.to_excel('extended_data.xlsx', index=False)
 
             # Ensure 'date' is in datetime format
@@ -1094,10 +1131,10 @@ async def get_aggregation_info(params: FunctionCallParams):
             # Calculate daily stock value
             if "sector" in dimension_levels:
                 print("Calculating portfolio with sector weightage")
+                async with AsyncReadSessionLocal() as db:
+                    df = apply_sector_weights(df, await get_sector_weights_async(db, df['asset_id'].unique()))
                 df['portfolio'] = df['close_price'] * df['asset_total_units'] * df['sector_weightage']/100
             else:
-                df = df.drop(columns=['sector','sector_weightage'], errors='ignore')
-                df = df.drop_duplicates(subset=['asset_hist_id'], keep='last')
                 df['portfolio'] = df['close_price'] * df['asset_total_units']    
 
             # Add quarter and year columns
@@ -1161,10 +1198,11 @@ async def get_aggregation_info(params: FunctionCallParams):
                         description="Portfolio returns by "+dimension_levels[0]+" across quarters"
                     )
 
-            await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"chart","data": result})
+            await send_json_to_websocket(client, {"type":"log","type_of_data":"chart","data": result})
             # logger.bind(frontend=True).bind(log_type="Json").bind(log_type_of_data="chart").success(json.dumps(result)) 
 
-        formatted_results_json = json.dumps(formatted_results)
+        with metrics.phase("serialization"):
+            formatted_results_json = json.dumps(formatted_results)
 
         # The rest of your code remains the same
         result = {
@@ -1174,9 +1212,10 @@ async def get_aggregation_info(params: FunctionCallParams):
             'data': json.loads(formatted_results_json)
         }
      
-        result_json = json.dumps(result)
+        with metrics.phase("serialization"):
+            result_json = json.dumps(result)
 
-        # await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"chart","data": json.loads(formatted_results_json)})
+        # await send_json_to_websocket(client, {"type":"log","type_of_data":"chart","data": json.loads(formatted_results_json)})
         # logger.bind(frontend=True).success(json.loads(result_json))
         await params.result_callback(f"Your results are ready and on your screen. Results: {json.loads(result_json)}. Do not read out the result and use only for the context of the call")
     except Exception as e:
@@ -1199,7 +1238,7 @@ def calculate_line_chart_return(group):
     return group
 
 async def get_portfolio_benchmark(params: FunctionCallParams):
-    session = SessionLocal()
+    session = ReadSessionLocal()
 
     try:
         user_id = params.arguments["user_id"]
@@ -1241,25 +1280,27 @@ async def get_portfolio_benchmark(params: FunctionCallParams):
             await params.result_callback("Invalid input parameters.")
             return
         
-        phonenumber = session.query(User.phone_number).filter(User.user_id == user_id).scalar()    
+        client = await get_call_target(params, user_id)
 
-        extended_data = AssetHistory.get_extended_data(session, user_id)
-            
-        # Convert to DataFrame
-        df = pd.DataFrame(extended_data, columns=[
-            'asset_hist_id', 'asset_id', 'date', 'close_price', 'asset_class','asset_name', 'concentration',
-            'asset_manager', 'category', 'ticker', 'sector', 'sector_weightage', 'asset_total_units'
-        ])
+        # Get the price history of the user's holdings from the in-memory store
+        async with AsyncReadSessionLocal() as db:
+            df = await get_holdings_history_async(db, user_id)
+        filters = {}
         if len(filter_values) > 0:
             # Get filter levels dictionary
-            filter_levels_dict = get_filter_levels_dict(session)
+            filter_levels_dict = get_filter_levels_dict()
             filters = get_filters_dict(filter_levels_dict, filter_values) #getting the filters dictionary
-            if filters:
-                for column, values in filters.items():
-                    if column in df.columns:
-                        df = df[df[column].isin(values)]
-                    else:
-                        print(f"Warning: Column '{column}' not found in DataFrame")
+
+        # Sector weights split every price row per sector, so only join them when grouping or filtering by sector
+        if "sector" in dimension_levels or "sector" in filters:
+            async with AsyncReadSessionLocal() as db:
+                df = apply_sector_weights(df, await get_sector_weights_async(db, df['asset_id'].unique()))
+
+        for column, values in filters.items():
+            if column in df.columns:
+                df = df[df[column].isin(values)]
+            else:
+                print(f"Warning: Column '{column}' not found in DataFrame")
 
         # Ensure 'date' is in datetime format
         df['date'] = pd.to_datetime(df['date'])
@@ -1269,8 +1310,10 @@ async def get_portfolio_benchmark(params: FunctionCallParams):
         if "sector" in dimension_levels:
             df['portfolio'] = df['close_price'] * df['asset_total_units'] * df['sector_weightage']/100
         else:
-            df = df.drop(columns=['sector','sector_weightage'], errors='ignore')
-            df = df.drop_duplicates(subset=['asset_hist_id'], keep='last')
+            if 'sector' in df.columns:
+                # Rows were only split by sector to filter on it
+                df = df.drop(columns=['sector','sector_weightage'])
+                df = df.drop_duplicates(subset=['asset_hist_id'], keep='last')
             df['portfolio'] = df['close_price'] * df['asset_total_units']    
 
         if "all" in dimension_levels and len(filter_values) == 0:
@@ -1323,28 +1366,14 @@ async def get_portfolio_benchmark(params: FunctionCallParams):
         ### For Index Daily Returns
         index_asset = ['SPX', 'VTSAX', 'VBTLX']
         # Get the list of index_id for some asset type
-        index_ids = session.query(AssetType.asset_id, AssetType.asset_ticker).filter(AssetType.asset_ticker.in_(index_asset)).all()
-
-        # Extract just the asset_ids from the tuples
-        asset_ids = [id_tuple[0] for id_tuple in index_ids]
-
-        query = (session.query(AssetHistory.asset_id,
-                            AssetHistory.date,
-                            AssetHistory.close_price,
-                            # Add other columns you need here
-                            )
-                .filter(AssetHistory.asset_id.in_(asset_ids))
-                .filter(AssetHistory.date >= date_mark)
-                .order_by(AssetHistory.date.desc()))
-
-        # Execute the query and fetch all results
-        results = query.all()
+        index_ids = reference_catalog.asset_ids(index_asset)
+        asset_ids = list(index_ids.values())
 
-        # Convert the results to a DataFrame
-        index_data= pd.DataFrame(results, columns=['asset_id', 'date', 'close_price'])  # Add other column names here
+        # Index prices since date_mark from the price history store
+        index_data = price_history_store.frame(asset_ids, start=date_mark)[['asset_id', 'date', 'close_price']]
 
         # Add asset_ticker to the DataFrame
-        id_to_ticker = {id_tuple[0]: id_tuple[1] for id_tuple in index_ids}
+        id_to_ticker = {asset_id: ticker for ticker, asset_id in index_ids.items()}
         index_data['asset_ticker'] = index_data['asset_id'].map(id_to_ticker)
         index_data['date'] = pd.to_datetime(index_data['date'], errors='coerce')
         index_data = index_data[index_data['date'] >= date_mark]
@@ -1359,52 +1388,11 @@ async def get_portfolio_benchmark(params: FunctionCallParams):
         final_line_chart_df['portfolio_return'] = round(final_line_chart_df['portfolio_return'],2)
         final_line_chart_df = final_line_chart_df.fillna(0)
         
-        def is_working_day(date):  
-            """Check if the given date is a working day (Monday to Friday)."""  
-            return date.weekday() < 5  # 0 = Monday, ..., 4 = Friday  
-  
-        def is_month_end(date):  
-            """Check if the date is the last day of the month and a working day."""  
-            next_day = date + timedelta(days=1)  
-            return next_day.month != date.month and is_working_day(date)  
-        
-        def is_quarter_end(date):  
-            """Check if the date is the last day of a quarter and a working day."""  
-            # Quarters end in March, June, September, December  
-            if is_month_end(date) and date.month in (3, 6, 9, 12):  
-                return True  
-            return False  
-        
-        def is_year_end(date):  
-            """Check if the date is the last day of the year and a working day."""  
-            return is_month_end(date) and date.month == 12 
-
-        def is_week_end(row, df):
-            current_date = row['date']  
-            for day in range(4, -1, -1):  # 4 (Friday) to 0 (Monday)  
-            # Check if the current date matches this weekday  
-                if current_date.weekday() == day:  
-                    # Check if there is a next day in the DataFrame  
-                    next_day = current_date + pd.Timedelta(days=1)  
-                    if next_day in df['date'].values:  
-                        # If the next day exists in the DataFrame, it's not the last working day of the week  
-                        return False  
-                    # If no next day exists, this is the last working day of the week  
-                    return True  
-            return False  
-
-        # Create the date_marker column
-        final_line_chart_df['date_marker'] = ''
-
-        final_line_chart_df['date_marker'] = final_line_chart_df.apply(  
-            lambda row: 'Weekly' if is_week_end(row, final_line_chart_df) else '',  
-            axis=1  
-        ) 
+        # Mark the last available working day of each week across all line chart series
+        final_line_chart_df['date_marker'] = mark_dates(final_line_chart_df['date'], markers=('Weekly',))
 
         # Mark quarterly dates (overrides weekly if it's also a quarter end)
-        # final_line_chart_df.loc[final_line_chart_df['date'].apply(is_quarter_end), 'date_marker'] = 'Quarterly'
-        # final_line_chart_df.loc[final_line_chart_df['date'].apply(is_month_end), 'date_marker'] = 'Monthly'
-        # final_line_chart_df.loc[final_line_chart_df['date'].apply(is_year_end), 'date_marker'] = 'Yearly'
+        # final_line_chart_df['date_marker'] = mark_dates(final_line_chart_df['date'], markers=('Weekly', 'Quarterly', 'Monthly', 'Yearly'))
 
 
         # if interval == 'weekly':
@@ -1427,26 +1415,12 @@ async def get_portfolio_benchmark(params: FunctionCallParams):
         # Set date as index
         df.set_index('date', inplace=True)
     
-        all_data = []
-
         if 'all' not in dimension_levels:
-            dimension_levels_copy = dimension_levels.copy()
-            if 'sector' in dimension_levels_copy:
-                dimension_levels_copy[dimension_levels_copy.index('sector')] = 'sector_name'
-            if 'ticker' in dimension_levels_copy:
-                dimension_levels_copy[dimension_levels_copy.index('ticker')] = 'asset_ticker' 
-            #get the unique values of the dimension level column from database
-            query = session.query(text(f"DISTINCT {dimension_levels_copy[0]}")).select_from(AssetType)
-            unique_elements = [row[0] for row in query.all()]
-
-            for ele in unique_elements:
-                asset_data = df[df[dimension_levels[0]] == ele]
-                if not asset_data.empty:
-                    all_data.append(process_time_period_data(asset_data,dimension_levels, interval,time_history))
+            # Summarize every value of the dimension column in one pass
+            all_data = process_time_period_data(df, dimension_levels, interval, time_history, group_by=dimension_levels[0])
         else:
             # If dimension_levels is 'all', process the entire DataFrame
-            all_data.append(process_time_period_data(df, dimension_levels, interval, time_history))
-        all_data = pd.DataFrame(pd.concat(all_data, ignore_index=True))
+            all_data = process_time_period_data(df, dimension_levels, interval, time_history)
 
         all_data = all_data.sort_values(['year', 'freq', 'index_name'], ascending=[False, False, True]).reset_index(drop=True)
         # all_data.to_excel("check_all_data.xlsx", index=False)
@@ -1510,10 +1484,11 @@ async def get_portfolio_benchmark(params: FunctionCallParams):
 
         chart_data = json.loads(chart_data)
 
-        await send_json_to_websocket(phonenumber, chart_data)
+        await send_json_to_websocket(client, chart_data)
         # logger.bind(frontend=True).bind(log_type="Json").bind(log_type_of_data="chart").success(json.dumps(result)) 
 
-        formatted_results_json = json.dumps(formatted_results)
+        with metrics.phase("serialization"):
+            formatted_results_json = json.dumps(formatted_results)
 
         # The rest of your code remains the same
         result = {
@@ -1525,9 +1500,10 @@ async def get_portfolio_benchmark(params: FunctionCallParams):
         # df_output = df_output.dropna()
         # df_output.to_excel('portfolio_performance.xlsx', index=False)
         
-        result_json = json.dumps(result)
+        with metrics.phase("serialization"):
+            result_json = json.dumps(result)
 
-        # await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"chart","query_type":"performance","data": json.loads(result_json)})
+        # await send_json_to_websocket(client, {"type":"log","type_of_data":"chart","query_type":"performance","data": json.loads(result_json)})
         # logger.bind(frontend=True).success(json.loads(result_json))
         await params.result_callback(f"Your results are ready and on your screen. Results: {json.loads(result_json)}. Do not read out the result and use only for the context of the call")
     except Exception as e:
@@ -1549,7 +1525,7 @@ async def get_relative_performance(params: FunctionCallParams):
     Returns:
         List of dictionaries with holding info, benchmark info, and comparative returns
     """
-    session = SessionLocal()
+    session = ReadSessionLocal()
     try:
 
         user_id = params.arguments["user_id"]
@@ -1600,7 +1576,7 @@ async def get_relative_performance(params: FunctionCallParams):
         #checking if filter values are provided
         if len(filter_values) > 0:
             # Get filter levels dictionary
-            filter_levels_dict = get_filter_levels_dict(session)
+            filter_levels_dict = get_filter_levels_dict()
             filters = get_filters_dict(filter_levels_dict, filter_values) #getting the filters dictionary
             print(f"Filter values: {filters}")
             #check if filters is empty
@@ -1630,21 +1606,6 @@ async def get_relative_performance(params: FunctionCallParams):
             await params.result_callback("No Data found for the filters.")
             return []
             
-        # Get benchmark mappings from RelativeBenchmark table
-        benchmark_mappings = {
-            ticker: benchmark for ticker, benchmark in 
-            session.query(
-                RelativeBenchmark.asset_ticker,
-                RelativeBenchmark.relative_benchmark
-            ).all()
-        }
-        
-        # Dictionary to store ticker to asset_id mapping
-        ticker_to_asset_id = {
-            asset.asset_ticker: asset.asset_id for asset in 
-            session.query(AssetType.asset_ticker, AssetType.asset_id).all()
-        }
-        
         results = []
         
         for holding in user_holdings:
@@ -1653,47 +1614,32 @@ async def get_relative_performance(params: FunctionCallParams):
             asset_name = holding.asset_name
             
             # Skip if this asset doesn't have a benchmark mapping
-            if asset_ticker not in benchmark_mappings:
+            benchmark_ticker = reference_catalog.relative_benchmark(asset_ticker)
+            if benchmark_ticker is None:
                 continue
                 
-            benchmark_ticker = benchmark_mappings[asset_ticker]
-            benchmark_asset_id = ticker_to_asset_id.get(benchmark_ticker)
+            benchmark_asset_id = reference_catalog.asset_id(benchmark_ticker)
             
             if not benchmark_asset_id:
                 continue
                 
-            # Get benchmark name
-            benchmark_name = session.query(AssetType.asset_name).filter(
-                AssetType.asset_id == benchmark_asset_id
-            ).scalar()
+            benchmark_name = reference_catalog.asset_name(benchmark_asset_id)
             
-            # Get historical price data for the holding
-            holding_prices = session.query(
-                AssetHistory.date,
-                AssetHistory.close_price
-            ).filter(
-                AssetHistory.asset_id == asset_id,
-                AssetHistory.date >= start_date
-            ).order_by(AssetHistory.date).all()
-            
-            # Get historical price data for the benchmark
-            benchmark_prices = session.query(
-                AssetHistory.date,
-                AssetHistory.close_price
-            ).filter(
-                AssetHistory.asset_id == benchmark_asset_id,
-                AssetHistory.date >= start_date
-            ).order_by(AssetHistory.date).all()
+            # Get historical price data for the holding and the benchmark
+            holding_series = price_history_store.series(asset_id)
+            benchmark_series = price_history_store.series(benchmark_asset_id)
+            holding_prices = holding_series.slice(start=start_date).closes if holding_series is not None else []
+            benchmark_prices = benchmark_series.slice(start=start_date).closes if benchmark_series is not None else []
             
             # Skip if we don't have enough price data
-            if not holding_prices or not benchmark_prices:
+            if not len(holding_prices) or not len(benchmark_prices):
                 continue
                 
             # Calculate returns
-            holding_start_price = holding_prices[0].close_price
-            holding_end_price = holding_prices[-1].close_price
-            benchmark_start_price = benchmark_prices[0].close_price
-            benchmark_end_price = benchmark_prices[-1].close_price
+            holding_start_price = holding_prices[0]
+            holding_end_price = holding_prices[-1]
+            benchmark_start_price = benchmark_prices[0]
+            benchmark_end_price = benchmark_prices[-1]
             
             if holding_start_price <= 0 or benchmark_start_price <= 0:
                 continue
@@ -1716,12 +1662,13 @@ async def get_relative_performance(params: FunctionCallParams):
             })
         chart_data = format_relative_performance_chart(results, range=time_history, title=f"Relative Performance of Holdings vs Benchmarks for {time_history}")
 
-        phonenumber = session.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
 
         # Send chart data via WebSocket
-        await send_json_to_websocket(phonenumber, chart_data)
+        await send_json_to_websocket(client, chart_data)
         
-        result_json = json.dumps(results)
+        with metrics.phase("serialization"):
+            result_json = json.dumps(results)
         
         formatted_message = f"Showing relative performance for {len(results)} holdings over {time_history} period."
         await params.result_callback(f"{formatted_message} Results: {json.loads(result_json)}. Do not read out the result and use only for the context of the call. Just say any variation of 'your chart is on the screen.'")  
@@ -1744,7 +1691,7 @@ async def get_relative_performance(params: FunctionCallParams):
 #     return filtered_data
 
 async def get_risk_score(params: FunctionCallParams):
-    session = SessionLocal()
+    session = ReadSessionLocal()
     try:
 
         user_id = params.arguments["user_id"]
@@ -1779,7 +1726,7 @@ async def get_risk_score(params: FunctionCallParams):
 
         if len(filter_values) > 0:
             # Get filter levels dictionary
-            filter_levels_dict = get_filter_levels_dict(session)
+            filter_levels_dict = get_filter_levels_dict()
             filters = get_filters_dict(filter_levels_dict, filter_values) #getting the filters dictionary
 
             if filters:
@@ -1810,36 +1757,18 @@ async def get_risk_score(params: FunctionCallParams):
             return
         # Step 3: Get current prices for each holding
         result = []
+        latest_prices = AssetLatestPrice.get_prices(session, {holding.asset_id for holding in holdings})
         
         for holding in holdings:
-            # Get the latest price for this asset
-            latest_price = (
-                session.query(AssetHistory.close_price)
-                .filter(AssetHistory.asset_id == holding.asset_id)
-                .order_by(AssetHistory.date.desc())
-                .first()
-            )
-            if not latest_price:
-                latest_price = [1]
-                # continue  # Skip if no price history
-            
-            current_price = latest_price[0]
+            # Get the latest price for this asset (1 when it has no price history)
+            current_price = latest_prices.get(holding.asset_id, 1)
             
             # Step 4: Calculate holding value
             holding_value = holding.asset_total_units * current_price
             
             # Step 5: Get risk score for this asset class based on asset_class and concentration
             # Find matching risk level from asset_class_risk_level_mapping
-            risk_mapping = (
-                session.query(AssetClassRiskLevelMapping.risk_score)  # Use risk_score (renamed from risk_level)
-                .filter(
-                    AssetClassRiskLevelMapping.asset_type == holding.asset_class,  # Use asset_type (renamed from invst_type)
-                    AssetClassRiskLevelMapping.concentration == holding.concentration  # Added concentration filter
-                )
-                .first()
-            )
-            
-            risk_score = risk_mapping[0] if risk_mapping else None
+            risk_score = reference_catalog.risk_score(holding.asset_class, holding.concentration)
             
             # Compile results
             result.append({
@@ -1887,11 +1816,12 @@ async def get_risk_score(params: FunctionCallParams):
 
         chart_data = generate_risk_analysis_visualization_json(simplified_data, weighted_risk_score,dimension_levels[0])
 
-        phonenumber = session.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
 
-        await send_json_to_websocket(phonenumber, chart_data)
+        await send_json_to_websocket(client, chart_data)
 
-        result_json = json.dumps(result)
+        with metrics.phase("serialization"):
+            result_json = json.dumps(result)
         
         formatted_message = f"Showing risk analysis for {len(result)} holdings."
         await params.result_callback(f"{formatted_message} Results: {json.loads(result_json)}. Do not read out the result and use only for the context of the call")
@@ -1903,7 +1833,7 @@ async def get_risk_score(params: FunctionCallParams):
         session.close()    
 
 async def get_attribution_return(params: FunctionCallParams):
-    session = SessionLocal()
+    session = ReadSessionLocal()
     try:
 
         user_id = params.arguments["user_id"]
@@ -1917,7 +1847,7 @@ async def get_attribution_return(params: FunctionCallParams):
             await params.result_callback(f"Currently available dimensions are {dimension_levels}. Please select only one of them.")
             return
         
-        phonenumber = session.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
 
         # Get reference date based on time period
         today = datetime.now().date()
@@ -1940,22 +1870,8 @@ async def get_attribution_return(params: FunctionCallParams):
         
         print(f"Reference date for attribution return calculation: {reference_date}")
         
-        # Subquery to get the latest closing price for each asset
-        latest_price_subquery = session.query(
-            AssetHistory.asset_id,
-            func.max(AssetHistory.date).label('max_date')
-        ).group_by(AssetHistory.asset_id).subquery()
-
-        latest_price = session.query(
-                AssetHistory.asset_id,
-                AssetHistory.close_price
-            ).join(
-                latest_price_subquery,
-                and_(
-                    AssetHistory.asset_id == latest_price_subquery.c.asset_id,
-                    AssetHistory.date == latest_price_subquery.c.max_date
-                )
-            ).subquery()
+        # Latest closing price for each asset
+        latest_price = AssetLatestPrice.__table__
         
         # Subquery to get the historical price closest to the reference date
         if time_period != "current":
@@ -2024,7 +1940,7 @@ async def get_attribution_return(params: FunctionCallParams):
         # Checking if filter values are provided
         if len(filter_values) > 0:
             # Get filter levels dictionary
-            filter_levels_dict = get_filter_levels_dict(session)
+            filter_levels_dict = get_filter_levels_dict()
             filters = get_filters_dict(filter_levels_dict, filter_values) #getting the filters dictionary
             # Check if filters is empty
             if filters:
@@ -2101,7 +2017,7 @@ async def get_attribution_return(params: FunctionCallParams):
 
         chart_data = generate_returns_attribution_visualization_format(result, range=time_period, dimension_level=dimension_levels[0])
 
-        await send_json_to_websocket(phonenumber, chart_data)
+        await send_json_to_websocket(client, chart_data)
         await params.result_callback(f"Your attribution return results are ready and on your screen. Results: {json.loads(json.dumps(chart_data))}. Do not read out the result and use only for the context of the call. Just say any variation of: 'your chart is on the screen.'")
     except Exception as e:
         logger.error(f"Error in get_returns: {str(e)}")
@@ -2126,9 +2042,9 @@ async def get_news(params: FunctionCallParams):
         # Fetch and display news
         news_items = get_company_news(ticker, week_ago.isoformat(), today.isoformat())
 
-        phonenumber = session.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
 
-        await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"text","query_type":"news","data": news_items[:3]})
+        await send_json_to_websocket(client, {"type":"log","type_of_data":"text","query_type":"news","data": news_items[:3]})
         await params.result_callback(f"Here's what I found about '{ticker}':\n\n{news_items[:3]}. Please say this response in short and concise manner.")
     
     except Exception as e:
@@ -2233,9 +2149,9 @@ async def get_fund_fact_sheet(params: FunctionCallParams):
             await params.result_callback("Please provide a valid ticker symbol.")
         session = SessionLocal()
 
-        phonenumber = session.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
         # Fetch the fund fact sheet from the azure blob storage
-        await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"text","query_type":"fund_fact_sheet","data": {"message":f"Fund Document for:{ticker}", "file_link": f"https://rtpastorage.blob.core.windows.net/fund-sheets/{ticker}-AR.pdf"}})
+        await send_json_to_websocket(client, {"type":"log","type_of_data":"text","query_type":"fund_fact_sheet","data": {"message":f"Fund Document for:{ticker}", "file_link": f"https://rtpastorage.blob.core.windows.net/fund-sheets/{ticker}-AR.pdf"}})
 
         await params.result_callback(f"Say I have fetched the fund fact sheet for {ticker}. You can download it from the link on the screen.")
     except Exception as e:
@@ -2259,7 +2175,7 @@ async def get_fact_sheet_query_answer(params: FunctionCallParams):
             await params.result_callback("Please provide a valid ticker symbol.")
             return
         session = SessionLocal()
-        phonenumber = session.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
         # logger.bind(frontend=True).info(f"Searching knowledge base for: '{query[:50]}'")
 
         # await params.result_callback("Please wait while I search the knowledge base for your query...")
@@ -2313,7 +2229,7 @@ async def get_fact_sheet_query_answer(params: FunctionCallParams):
 
         logger.bind(frontend=True).info("RAG context retrieved.")
 
-        # await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"string","query_type":"session_logs","data": {"type": "INFO", "datetime":""}})
+        # await send_json_to_websocket(client, {"type":"log","type_of_data":"string","query_type":"session_logs","data": {"type": "INFO", "datetime":""}})
 
         if top_k_results:
             print("\n--- Generating Multimodal RAG Response ---")
@@ -2326,7 +2242,7 @@ async def get_fact_sheet_query_answer(params: FunctionCallParams):
         else:
             final_answer = json.loads(json.dumps({"Answer from RAG": "No results found for your query."})) 
         
-        await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"text","query_type":"rag_response","data": final_answer,"file_link": f"https://rtpastorage.blob.core.windows.net/fund-sheets/{ticker}-AR.pdf"})
+        await send_json_to_websocket(client, {"type":"log","type_of_data":"text","query_type":"rag_response","data": final_answer,"file_link": f"https://rtpastorage.blob.core.windows.net/fund-sheets/{ticker}-AR.pdf"})
 
         await params.result_callback(f"This is the answer from the RAG. {final_answer}")
     except Exception as e:
@@ -2357,10 +2273,10 @@ async def place_trade(params: FunctionCallParams):
         }
 
         user_id = params.arguments.get("user_id")
-        phonenumber = db.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
 
         #get the cash balance of the user using centralized function
-        cash_balance = calculate_available_cash_balance(user_id, db)
+        cash_balance = await get_user_cash_balance(params, user_id)
         response_data["cash_balance"] = cash_balance
 
         # Update response_data with initial values
@@ -2372,7 +2288,7 @@ async def place_trade(params: FunctionCallParams):
 
         if not response_data["symbol"] or not response_data["quantity"]:
             error_msg = "Please provide a valid symbol and quantity to place a trade."
-            await send_json_to_websocket(phonenumber, {
+            await send_json_to_websocket(client, {
                 "type": "log",
                 "type_of_data": "text",
                 "query_type": "trade_response",
@@ -2384,7 +2300,7 @@ async def place_trade(params: FunctionCallParams):
 
         if not response_data["quantity"] or int(response_data["quantity"]) <= 0:
             error_msg = "Please provide a valid quantity to place a trade."
-            await send_json_to_websocket(phonenumber, {
+            await send_json_to_websocket(client, {
                 "type": "log",
                 "type_of_data": "text",
                 "query_type": "trade_response",
@@ -2396,7 +2312,7 @@ async def place_trade(params: FunctionCallParams):
 
         if response_data["order_type"] not in ["market", "limit"]:
             error_msg = "Please provide a valid order type (market or limit)."
-            await send_json_to_websocket(phonenumber, {
+            await send_json_to_websocket(client, {
                 "type": "log",
                 "type_of_data": "text",
                 "query_type": "trade_response",
@@ -2408,7 +2324,7 @@ async def place_trade(params: FunctionCallParams):
 
         if response_data["order_type"] == "limit" and response_data["limit_price"] is None:
             error_msg = "Please provide a valid limit price for limit orders."
-            await send_json_to_websocket(phonenumber, {
+            await send_json_to_websocket(client, {
                 "type": "log",
                 "type_of_data": "text",
                 "query_type": "trade_response",
@@ -2420,7 +2336,7 @@ async def place_trade(params: FunctionCallParams):
 
         if response_data["action"] not in ["buy", "sell"]:
             error_msg = "Please provide a valid action (buy or sell)."
-            await send_json_to_websocket(phonenumber, {
+            await send_json_to_websocket(client, {
                 "type": "log",
                 "type_of_data": "text",
                 "query_type": "trade_response",
@@ -2434,7 +2350,7 @@ async def place_trade(params: FunctionCallParams):
         asset = db.query(AssetType).filter(AssetType.asset_ticker == response_data["symbol"]).first()
         if not asset:
             error_msg = f"Asset with symbol {response_data['symbol']} not found."
-            await send_json_to_websocket(phonenumber, {
+            await send_json_to_websocket(client, {
                 "type": "log",
                 "type_of_data": "text",
                 "query_type": "trade_response",
@@ -2450,7 +2366,7 @@ async def place_trade(params: FunctionCallParams):
         if not current_price:
             error_msg = f"Unable to fetch current price for {response_data['symbol']}. Please try again."
             logger.bind(frontend=True).error(f"Trade failed: {error_msg}")
-            await send_json_to_websocket(phonenumber, {
+            await send_json_to_websocket(client, {
                 "type": "log",
                 "type_of_data": "text",
                 "query_type": "trade_response",
@@ -2495,11 +2411,12 @@ async def place_trade(params: FunctionCallParams):
         # Add the new order to the database
         db.add(new_order)
         db.commit()
+        portfolio_snapshots.invalidate(user_id)
 
         # If order was cancelled due to insufficient funds, send error message
         if order_status == "Cancelled":
             error_msg = f"Insufficient cash balance to place the trade. Your cash balance is ${cash_balance:.2f}, but the required amount is ${amount:.2f}. Order has been cancelled."
-            await send_json_to_websocket(phonenumber, {
+            await send_json_to_websocket(client, {
                 "type": "log",
                 "type_of_data": "text",
                 "query_type": "trade_response",
@@ -2510,7 +2427,7 @@ async def place_trade(params: FunctionCallParams):
             return
 
         # Send the trade response
-        await send_json_to_websocket(phonenumber, {
+        await send_json_to_websocket(client, {
             "type": "log",
             "type_of_data": "text",
             "query_type": "trade_response",
@@ -2526,7 +2443,7 @@ async def place_trade(params: FunctionCallParams):
         db.rollback()
         logger.error(f"Error placing trade: {e}")
         error_msg = f"Sorry, I encountered an error while placing your trade: {str(e)}"
-        await send_json_to_websocket(phonenumber, {
+        await send_json_to_websocket(client, {
             "type": "log",
             "type_of_data": "text",
             "query_type": "trade_response",
@@ -2550,9 +2467,9 @@ async def update_trade(params: FunctionCallParams):
         limit_price = params.arguments.get("limit_price")  
         action = params.arguments.get("action")  
 
-        phonenumber = db.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
         #get the cash balance of the user using centralized function
-        cash_balance = calculate_available_cash_balance(user_id, db)
+        cash_balance = await get_user_cash_balance(params, user_id)
 
         if action == "buy":
             if order_id is None:
@@ -2628,7 +2545,7 @@ async def update_trade(params: FunctionCallParams):
 
         if cash_balance < order.amount and action == "buy":
             error_msg = f"Insufficient cash balance for buy order. Available: {cash_balance}, Required: {order.amount}"
-            await send_json_to_websocket(phonenumber, {
+            await send_json_to_websocket(client, {
                 "type": "log",
                 "type_of_data": "text",
                 "query_type": "trade_response",
@@ -2646,9 +2563,10 @@ async def update_trade(params: FunctionCallParams):
 
         # Commit changes to the database
         db.commit()
+        portfolio_snapshots.invalidate(user_id)
 
         #Send the trade response
-        await send_json_to_websocket(phonenumber, {
+        await send_json_to_websocket(client, {
             "type": "log",
             "type_of_data": "text",
             "query_type": "trade_response",
@@ -2673,7 +2591,7 @@ async def confirm_trade(params: FunctionCallParams):
     try:  
         order_id = params.arguments.get("order_id")  
         user_id = params.arguments.get("user_id")
-        phonenumber = db.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
 
         if order_id is None:  
             order = db.query(OrderBook).filter(OrderBook.order_status == "Under Review", OrderBook.user_id == user_id).order_by(OrderBook.order_date.desc()).first()
@@ -2689,7 +2607,7 @@ async def confirm_trade(params: FunctionCallParams):
 
         if raw_cash_balance < order.amount and order.buy_sell == "Buy":
             error_msg = f"Insufficient cash balance to confirm the trade. Your cash balance is {raw_cash_balance}, but the required amount is {order.amount}."
-            await send_json_to_websocket(phonenumber, {
+            await send_json_to_websocket(client, {
                 "type": "log",
                 "type_of_data": "text",
                 "query_type": "trade_response",
@@ -2720,7 +2638,7 @@ async def confirm_trade(params: FunctionCallParams):
             # Verify we have enough available cash (this check is redundant but kept for safety)
             if available_cash < 0:
                 error_msg = f"Insufficient available cash to confirm the trade. Available cash: ${available_cash:.2f}, Required: ${order.amount:.2f}"
-                await send_json_to_websocket(phonenumber, {
+                await send_json_to_websocket(client, {
                     "type": "log",
                     "type_of_data": "text",
                     "query_type": "trade_response",
@@ -2746,7 +2664,7 @@ async def confirm_trade(params: FunctionCallParams):
             print("Total quantity after sell action:", total_qty)
             if order.qty > total_qty:
                 error_msg = f"Invalid quantity for sell action. Quantity cannot be more than the available quantity for the symbol {order.symbol}."
-                await send_json_to_websocket(phonenumber, {
+                await send_json_to_websocket(client, {
                     "type": "log",
                     "type_of_data": "text",
                     "query_type": "trade_response",
@@ -2757,7 +2675,7 @@ async def confirm_trade(params: FunctionCallParams):
                 return
 
         # Execute the trade by updating UserPortfolio
-        cash_asset_id = db.query(AssetType.asset_id).filter(AssetType.asset_ticker == 'CASH').scalar()
+        cash_asset_id = reference_catalog.cash_asset_id
 
         if order.buy_sell == "Buy":
             # Deduct cash from user's cash balance
@@ -2850,12 +2768,13 @@ async def confirm_trade(params: FunctionCallParams):
 
         # Commit all changes
         db.commit()
+        portfolio_snapshots.invalidate(user_id)
 
         # Get updated cash balance after execution using centralized function
         updated_cash_balance = calculate_available_cash_balance(user_id, db)
         response_data["cash_balance"] = updated_cash_balance
 
-        await send_json_to_websocket(phonenumber, {
+        await send_json_to_websocket(client, {
             "type": "log",
             "type_of_data": "text",
             "query_type": "trade_response",
@@ -2877,17 +2796,13 @@ async def confirm_trade(params: FunctionCallParams):
 
 async def check_order_status(params: FunctionCallParams):
     # Implement the logic to check an order's status
-    db = SessionLocal()
+    db = AsyncReadSessionLocal()
     try:
         order_id = params.arguments.get("order_id")
         user_id = params.arguments.get("user_id")
 
-        if not order_id:
-            order = db.query(OrderBook).filter(OrderBook.user_id == user_id).order_by(OrderBook.order_date.desc()).first()
-
-        else:
-            # Fetch the order
-            order = db.query(OrderBook).filter(OrderBook.order_id == order_id, OrderBook.user_id == user_id).first()
+        # Fetch the order, or the latest one when no order id is given
+        order = await async_queries.get_order(db, user_id, order_id)
 
         if not order:
             await params.result_callback(f"No order found with ID {order_id} for user {user_id}.")
@@ -2905,13 +2820,13 @@ async def check_order_status(params: FunctionCallParams):
             "order_date": order.order_date.strftime("%Y-%m-%d %H:%M:%S"),
         }
 
-        phonenumber = db.query(User.phone_number).filter(User.user_id == user_id).scalar()
-        await send_json_to_websocket(phonenumber, {
+        client = await get_call_target(params, user_id)
+        await send_json_to_websocket(client, {
             "type": "log",
             "type_of_data": "text",
             "query_type": "trade_response",
             "data": response_data,
-            "all_data": get_order_book_status(user_id, db)
+            "all_data": await get_order_book_status_async(user_id, db)
         })
 
         await params.result_callback(f"Order status for ID {order.order_id}: {order.order_status}")
@@ -2921,7 +2836,7 @@ async def check_order_status(params: FunctionCallParams):
         await params.result_callback(f"Sorry, I encountered an error while checking the order status: {str(e)}")
         raise CustomException(error_message="Failed to check order status", error_details=sys.exc_info())
     finally:
-        db.close()
+        await db.close()
 
 async def cancel_order(params: FunctionCallParams):
     # Implement the logic to cancel an order
@@ -2944,6 +2859,7 @@ async def cancel_order(params: FunctionCallParams):
         # Update the order status to "Cancelled"
         order.order_status = "Cancelled"
         db.commit()
+        portfolio_snapshots.invalidate(user_id)
 
         response_data = {
             "order_id": order.order_id,
@@ -2957,8 +2873,8 @@ async def cancel_order(params: FunctionCallParams):
             "order_date": order.order_date.strftime("%Y-%m-%d %H:%M:%S"),
         }
 
-        phonenumber = db.query(User.phone_number).filter(User.user_id == user_id).scalar()
-        await send_json_to_websocket(phonenumber, {
+        client = await get_call_target(params, user_id)
+        await send_json_to_websocket(client, {
             "type": "log",
             "type_of_data": "text",
             "query_type": "trade_response",
@@ -2986,7 +2902,7 @@ async def update_cash_balance(params: FunctionCallParams):
             await params.result_callback("Please provide a valid cash balance.")
             return
 
-        cash_asset_id = db.query(AssetType.asset_id).filter(AssetType.asset_ticker == 'CASH').scalar()
+        cash_asset_id = reference_catalog.cash_asset_id
         # Update the user's cash balance
         user_portfolio = db.query(UserPortfolio).filter(UserPortfolio.user_id == user_id, UserPortfolio.asset_id == cash_asset_id).first()
         if not user_portfolio:
@@ -3001,11 +2917,12 @@ async def update_cash_balance(params: FunctionCallParams):
             user_portfolio.asset_total_units -= amount
 
         db.commit()
-        phonenumber = db.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        portfolio_snapshots.invalidate(user_id)
+        client = await get_call_target(params, user_id)
 
         result = get_portfolio_summary(user_id=user_id)
         
-        await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"table","query_type":"user_portfolio","data": result})
+        await send_json_to_websocket(client, {"type":"log","type_of_data":"table","query_type":"user_portfolio","data": result})
         
         await params.result_callback(f"Cash balance updated to {user_portfolio.investment_amount}.")
     except Exception as e:
@@ -3016,15 +2933,12 @@ async def update_cash_balance(params: FunctionCallParams):
         db.close()
 
 async def get_bank_accounts(params: FunctionCallParams):
-    db = SessionLocal()
+    db = AsyncReadSessionLocal()
     try:
         user_id = params.arguments.get("user_id")
         show_ui = params.arguments.get("show_ui", False)  # Default to verbal response
 
-        bank_accounts = db.query(UserBankAccount).filter(
-            UserBankAccount.user_id == user_id,
-            UserBankAccount.is_active == 1
-        ).all()
+        bank_accounts = await async_queries.get_active_bank_accounts(db, user_id)
 
         if not bank_accounts:
             await params.result_callback("You don't have any bank accounts linked. Please contact support to add a bank account.")
@@ -3037,7 +2951,7 @@ async def get_bank_accounts(params: FunctionCallParams):
                 f"with available balance of ${account.available_balance:,.2f}"
             )
 
-        phonenumber = db.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
 
         accounts_data = {
             "bank_accounts": [
@@ -3055,7 +2969,7 @@ async def get_bank_accounts(params: FunctionCallParams):
         # Check if UI should be shown or verbal response given
         if show_ui:
             # Send UI trigger to open the fund transfer modal
-            await send_json_to_websocket(phonenumber, {
+            await send_json_to_websocket(client, {
                 "type": "ui_action",
                 "query_type": "trigger_fund_transfer_modal",
                 "data": {
@@ -3077,7 +2991,7 @@ async def get_bank_accounts(params: FunctionCallParams):
         await params.result_callback(f"Sorry, I encountered an error while retrieving your bank accounts: {str(e)}")
         raise CustomException(error_message="Failed to retrieve bank accounts", error_details=sys.exc_info())
     finally:
-        db.close()
+        await db.close()
 
 async def transfer_from_bank(params: FunctionCallParams):
     db = SessionLocal()
@@ -3088,7 +3002,7 @@ async def transfer_from_bank(params: FunctionCallParams):
         amount = params.arguments.get("amount")
 
         # Get phone number early for WebSocket notifications
-        phonenumber = db.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
 
         if amount is None or amount <= 0:
             await params.result_callback("Please provide a valid transfer amount greater than zero.")
@@ -3190,7 +3104,7 @@ async def transfer_from_bank(params: FunctionCallParams):
             )
 
             # Send fund transfer error event to update modal state
-            await send_json_to_websocket(phonenumber, {
+            await send_json_to_websocket(client, {
                 "type": "log",
                 "query_type": "fund_transfer_complete",
                 "success": False,
@@ -3201,7 +3115,7 @@ async def transfer_from_bank(params: FunctionCallParams):
             return
 
         # Get the cash asset
-        cash_asset_id = db.query(AssetType.asset_id).filter(AssetType.asset_ticker == 'CASH').scalar()
+        cash_asset_id = reference_catalog.cash_asset_id
         if not cash_asset_id:
             await params.result_callback("Cash asset not found in system.")
             return
@@ -3232,10 +3146,11 @@ async def transfer_from_bank(params: FunctionCallParams):
 
         # Commit the transaction
         db.commit()
+        portfolio_snapshots.invalidate(user_id)
 
         # Send updated portfolio
         result = get_portfolio_summary(user_id=user_id)
-        await send_json_to_websocket(phonenumber, {
+        await send_json_to_websocket(client, {
             "type": "log",
             "type_of_data": "table",
             "query_type": "user_portfolio",
@@ -3249,7 +3164,7 @@ async def transfer_from_bank(params: FunctionCallParams):
         )
 
         # Send fund transfer completion event to update modal state
-        await send_json_to_websocket(phonenumber, {
+        await send_json_to_websocket(client, {
             "type": "log",
             "query_type": "fund_transfer_complete",
             "success": True,
@@ -3266,8 +3181,8 @@ async def transfer_from_bank(params: FunctionCallParams):
         error_message = f"Sorry, I encountered an error while transferring funds: {str(e)}"
 
         # Send fund transfer error event to update modal state
-        if phonenumber:
-            await send_json_to_websocket(phonenumber, {
+        if client:
+            await send_json_to_websocket(client, {
                 "type": "log",
                 "query_type": "fund_transfer_complete",
                 "success": False,
@@ -3284,12 +3199,12 @@ async def dismiss_fund_transfer(params: FunctionCallParams):
     db = SessionLocal()
     try:
         user_id = params.arguments.get("user_id")
-        phonenumber = db.query(User.phone_number).filter(User.user_id == user_id).scalar()
+        client = await get_call_target(params, user_id)
 
         logger.info(f"User {user_id} dismissed fund transfer panel")
 
         # Send WebSocket message to close panel with cancelled status
-        await send_json_to_websocket(phonenumber, {
+        await send_json_to_websocket(client, {
             "type": "ui_action",
             "query_type": "dismiss_fund_transfer_panel",
             "cancelled": True
@@ -3303,7 +3218,7 @@ async def dismiss_fund_transfer(params: FunctionCallParams):
         db.close()
 
 async def get_price_trend(params: FunctionCallParams):
-    session = SessionLocal()
+    session = ReadSessionLocal()
 
     try:
         user_id = params.arguments["user_id"]
@@ -3318,27 +3233,22 @@ async def get_price_trend(params: FunctionCallParams):
         elif time_history > 1:
             interval = "quarterly"
 
-        if not all(item in PortfolioToolSchemas.get_dynamic_ticker_values() for item in ticker_value):
+        known_tickers = tool_schema_registry.tickers()
+        if not all(item in known_tickers for item in ticker_value):
            await params.result_callback(f"Invalid ticker value: {ticker_value}. Please select from the available options.")
            return
 
-        phonenumber = session.query(User.phone_number).filter(User.user_id == user_id).scalar()    
+        client = await get_call_target(params, user_id)
 
-        extended_data = AssetHistory.get_extended_data(session, user_id)
-            
-        # Convert to DataFrame
-        df = pd.DataFrame(extended_data, columns=[
-            'asset_hist_id', 'asset_id', 'date', 'close_price', 'asset_class','asset_name', 'concentration',
-            'asset_manager', 'category', 'ticker', 'sector', 'sector_weightage', 'asset_total_units'
-        ])
+        # Get the price history of the user's holdings from the in-memory store
+        async with AsyncReadSessionLocal() as db:
+            df = await get_holdings_history_async(db, user_id)
         df = df[df['ticker'].isin(ticker_value)]  # Filter by the selected ticker value
         # Ensure 'date' is in datetime format
         df['date'] = pd.to_datetime(df['date'])
         df['year'] = df['date'].dt.year
 
-        df['sector_weightage'] = df['sector_weightage'].fillna(100)  # Fill NaN with 100 for sector weightage
-        df = df.drop_duplicates(subset=['asset_hist_id'], keep='last')
-        df['portfolio'] = df['close_price'] * df['asset_total_units'] * df['sector_weightage']/100   
+        df['portfolio'] = df['close_price'] * df['asset_total_units']
         
         ################################# For daily returns line chart ########################
         df['date'] = pd.to_datetime(df['date'], errors='coerce')
@@ -3366,15 +3276,8 @@ async def get_price_trend(params: FunctionCallParams):
         # Set date as index
         df.set_index('date', inplace=True)
     
-        all_data = []
-
-        for ele in ticker_value:
-            asset_data = df[df['ticker'] == ele]
-            if not asset_data.empty:
-                all_data.append(process_time_period_data(asset_data,["ticker"], interval,time_history))
-
-        # all_data.append(process_time_period_data(df, ["ticker"], interval, time_history))
-        all_data = pd.DataFrame(pd.concat(all_data, ignore_index=True))
+        # df only holds the selected tickers; summarize all of them in one pass
+        all_data = process_time_period_data(df, ["ticker"], interval, time_history, group_by='ticker')
 
         all_data = all_data.sort_values(['year', 'freq', 'index_name'], ascending=[False, False, True]).reset_index(drop=True)
         # all_data.to_excel("check_all_data.xlsx", index=False)
@@ -3414,10 +3317,11 @@ async def get_price_trend(params: FunctionCallParams):
 
         chart_data = json.loads(chart_data)
 
-        await send_json_to_websocket(phonenumber, chart_data)
+        await send_json_to_websocket(client, chart_data)
         # logger.bind(frontend=True).bind(log_type="Json").bind(log_type_of_data="chart").success(json.dumps(result)) 
 
-        formatted_results_json = json.dumps(formatted_results)
+        with metrics.phase("serialization"):
+            formatted_results_json = json.dumps(formatted_results)
 
         # The rest of your code remains the same
         result = {
@@ -3425,9 +3329,10 @@ async def get_price_trend(params: FunctionCallParams):
         }
 
         
-        result_json = json.dumps(result)
+        with metrics.phase("serialization"):
+            result_json = json.dumps(result)
 
-        # await send_json_to_websocket(phonenumber, {"type":"log","type_of_data":"chart","query_type":"performance","data": json.loads(result_json)})
+        # await send_json_to_websocket(client, {"type":"log","type_of_data":"chart","query_type":"performance","data": json.loads(result_json)})
         # logger.bind(frontend=True).success(json.loads(result_json))
         await params.result_callback(f"Your results are ready and on your screen. Results: {json.loads(result_json)}. Do not read out the result and use only for the context of the call")
     except Exception as e:
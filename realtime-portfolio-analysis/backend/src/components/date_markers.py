@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+# 1970-01-01, day zero of datetime64[D], was a Thursday (weekday 3)
+_EPOCH_WEEKDAY = 3
+
+
+def _to_days(dates) -> np.ndarray:
+    """Convert dates, datetimes or datetime64 values to a datetime64[D] array (NaT kept)."""
+    return pd.to_datetime(pd.Series(dates), errors='coerce').to_numpy(dtype='datetime64[D]')
+
+
+def _weekdays(days: np.ndarray) -> np.ndarray:
+    """Weekday per day, Monday=0 ... Sunday=6, matching `date.weekday()`."""
+    return (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7
+
+
+def week_end_mask(dates) -> np.ndarray:
+    """
+    Mark the last available working day of each week.
+
+    A date is a week end when it falls Monday to Friday and the next calendar
+    day is not itself among `dates`, so a Friday is marked, and so is a
+    Thursday followed by a market holiday. Membership is checked against all
+    of `dates`, so pass the combined series when several share one chart.
+
+    Args:
+        dates: Sequence or Series of dates, datetimes or datetime64 values
+
+    Returns:
+        np.ndarray: Boolean mask aligned with `dates`
+    """
+    days = _to_days(dates)
+    valid = ~np.isnat(days)
+    available = np.unique(days[valid])
+    next_days = days + np.timedelta64(1, 'D')
+    idx = np.searchsorted(available, next_days)
+    next_available = (idx < len(available)) & (available[np.minimum(idx, len(available) - 1)] == next_days) \
+        if len(available) else np.zeros(len(days), dtype=bool)
+    return valid & (_weekdays(days) < 5) & ~next_available
+
+
+def month_end_mask(dates) -> np.ndarray:
+    """Mark dates that are the last calendar day of their month and a working day."""
+    days = _to_days(dates)
+    valid = ~np.isnat(days)
+    months = days.astype('datetime64[M]')
+    next_months = (days + np.timedelta64(1, 'D')).astype('datetime64[M]')
+    return valid & (_weekdays(days) < 5) & (next_months != months)
+
+
+def quarter_end_mask(dates) -> np.ndarray:
+    """Mark month ends falling in March, June, September or December."""
+    days = _to_days(dates)
+    month_numbers = days.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    return month_end_mask(dates) & np.isin(month_numbers, (3, 6, 9, 12))
+
+
+def year_end_mask(dates) -> np.ndarray:
+    """Mark month ends falling in December."""
+    days = _to_days(dates)
+    month_numbers = days.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    return month_end_mask(dates) & (month_numbers == 12)
+
+
+MARKERS = {
+    'Weekly': week_end_mask,
+    'Monthly': month_end_mask,
+    'Quarterly': quarter_end_mask,
+    'Yearly': year_end_mask,
+}
+
+
+def mark_dates(dates, markers=('Weekly',)) -> np.ndarray:
+    """
+    Label each date with the markers it satisfies, e.g. for thinning line charts.
+
+    Args:
+        dates: Sequence or Series of dates, datetimes or datetime64 values
+        markers: Names from MARKERS; a later marker overrides an earlier one on
+            dates matching both (e.g. ('Weekly', 'Quarterly'))
+
+    Returns:
+        np.ndarray: Object array of marker labels, '' where no marker applies
+    """
+    labels = np.full(len(dates), '', dtype=object)
+    for marker in markers:
+        labels[MARKERS[marker](dates)] = marker
+    return labels
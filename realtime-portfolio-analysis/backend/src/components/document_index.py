@@ -22,6 +22,8 @@ import base64 # Needed for image encoding
 import mimetypes # To determine image type for base64 encoding
 from azure.search.documents.models import VectorizedQuery
 
+from src.pipeline import tracing
+
 # --- Configuration ---
 # Azure AI Search Configuration
 AZURE_SEARCH_SERVICE_ENDPOINT = "https://aeon-aisearch.search.windows.net" # e.g., https://your-search-service.search.windows.net
@@ -131,10 +133,11 @@ class AsyncDocumentIndex:
         """Generates embeddings for the given text using Azure OpenAI."""
         try:
             # Use await for the async client call [5]
-            response = await self.openai_client.embeddings.create(
-                input=text_to_embed,
-                model=EMBEDDING_MODEL_NAME
-            )
+            with tracing.child_span("rag_embedding", "rag", model=EMBEDDING_MODEL_NAME):
+                response = await self.openai_client.embeddings.create(
+                    input=text_to_embed,
+                    model=EMBEDDING_MODEL_NAME
+                )
             embedding_vector = response.data[0].embedding
             # Ensure embedding is list of floats
             if isinstance(embedding_vector, list) and all(isinstance(x, float) for x in embedding_vector):
@@ -163,27 +166,29 @@ class AsyncDocumentIndex:
         print(f"Performing async vector search for: '{query_text}' (top {k})")
         try:
             # Use await for the async search call [3]
-            results = await self.search_client.search(
-                search_text=None, # Use None for vector-only search
-                vector_queries=[vector_query],
-                select=["id", "content", "file_name", "page_info", "source_type", "image_path"]
-            )
-
-            retrieved_results = []
-            # Use 'async for' to iterate over async results [3]
-            async for result in results:
-                print("Image Path:", result.get("image_path", "No image path"))
-                if ticker and ticker.lower() not in result.get("file_name", "").lower():
-                    continue
-                retrieved_results.append({
-                    "id": result["id"],
-                    "score": result["@search.score"],
-                    "content": result["content"],
-                    "file_name": result["file_name"],
-                    "page_info": result["page_info"],
-                    "source_type": result["source_type"],
-                    "image_path": result.get("image_path", None) # Use .get for safety
-                })
+            # Search results are paged in while iterating, so the span covers the loop
+            with tracing.child_span("rag_search", "rag", ticker=ticker, k=k):
+                results = await self.search_client.search(
+                    search_text=None, # Use None for vector-only search
+                    vector_queries=[vector_query],
+                    select=["id", "content", "file_name", "page_info", "source_type", "image_path"]
+                )
+
+                retrieved_results = []
+                # Use 'async for' to iterate over async results [3]
+                async for result in results:
+                    print("Image Path:", result.get("image_path", "No image path"))
+                    if ticker and ticker.lower() not in result.get("file_name", "").lower():
+                        continue
+                    retrieved_results.append({
+                        "id": result["id"],
+                        "score": result["@search.score"],
+                        "content": result["content"],
+                        "file_name": result["file_name"],
+                        "page_info": result["page_info"],
+                        "source_type": result["source_type"],
+                        "image_path": result.get("image_path", None) # Use .get for safety
+                    })
 
             print(f"Retrieved {len(retrieved_results)} results asynchronously.")
             return retrieved_results
@@ -281,12 +286,13 @@ class AsyncDocumentIndex:
             print(f"Sending async query, {len([s for s in sources_summary if 'Text:' in s])} text sources, and {image_sources_added} images to GPT-4o...")
 
             # Use await for the async chat completion call [2][4][5]
-            response = await self.openai_client.chat.completions.create(
-                model=AZURE_OPENAI_CHAT_DEPLOYMENT,
-                messages=messages,
-                temperature=0.1,
-                max_tokens=1500
-            )
+            with tracing.child_span("rag_completion", "rag", model=AZURE_OPENAI_CHAT_DEPLOYMENT):
+                response = await self.openai_client.chat.completions.create(
+                    model=AZURE_OPENAI_CHAT_DEPLOYMENT,
+                    messages=messages,
+                    temperature=0.1,
+                    max_tokens=1500
+                )
 
             if response.choices and response.choices[0].message.content:
                 return response.choices[0].message.content.strip()
@@ -1,5 +1,6 @@
 from sqlalchemy import func, and_, or_, distinct
 from src.database.models import *
+from src.components.reference_catalog import reference_catalog
 
 def get_dimension_lst():
     dimension_lst = ["Security","Instrument","Underlying", "Holding", "Ticker", "Holdings", "Asset Ticker", #Ticker
@@ -10,34 +11,15 @@ def get_dimension_lst():
         ]
     return dimension_lst
 
-def get_filter_levels_dict(session: Session):
-    filter_levels_dict = {}
-
-    # Query distinct asset classes
-    asset_classes = session.query(distinct(AssetType.asset_class)).all()
-    for (asset_class,) in asset_classes:
-        filter_levels_dict[asset_class] = "asset_class"
-    
-    # Query distinct concentrations
-    concentrations = session.query(distinct(AssetType.concentration)).all()
-    for (concentration,) in concentrations:
-        filter_levels_dict[concentration] = "concentration"
-
-    # Query distinct sectors
-    sectors = session.query(distinct(AssetSector.sector_name)).all()
-    for (sector,) in sectors:
-        filter_levels_dict[sector] = "sector"
-
-    # Query distinct asset names
-    asset_names = session.query(distinct(AssetType.asset_name)).all()
-    for (asset_name,) in asset_names:
-        filter_levels_dict[asset_name] = "asset_name"
-
-    asset_tickers = session.query(distinct(AssetType.asset_ticker)).all()
-    for (asset_ticker,) in asset_tickers:
-        filter_levels_dict[asset_ticker] = "ticker"    
+def get_filter_levels_dict(session: Session = None):
+    """
+    Map every filter value (asset class, concentration, sector, asset name and
+    ticker) to its dimension, e.g. {"Equity": "asset_class", "AAPL": "ticker"}.
 
-    return filter_levels_dict
+    Served from the reference catalog; `session` is no longer used and kept
+    for existing callers.
+    """
+    return reference_catalog.filter_levels()
 
 def get_standardized_filter_dimesions(dimension_levels, tool_type="aggregation"):
     """
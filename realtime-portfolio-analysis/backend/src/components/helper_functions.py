@@ -1,10 +1,17 @@
 import json
+import os
 import random
+import numpy as np
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 from collections import defaultdict
+from functools import lru_cache
 from src.database.database import SessionLocal
 from src.database.models import *
+from src.components.quote_engine import QuoteEngine
+from src.components.quote_cache import get_ticker_info, yfinance_session
+from src.components.portfolio_snapshot import portfolio_snapshots
+from src.components.reference_catalog import reference_catalog
 
 class DateEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -44,9 +51,7 @@ def calculate_available_cash_balance(user_id, db_session):
     from sqlalchemy import func
 
     # Get the cash asset ID
-    cash_asset_id = db_session.query(AssetType.asset_id).filter(
-        AssetType.asset_ticker == 'CASH'
-    ).scalar()
+    cash_asset_id = reference_catalog.cash_asset_id
 
     if not cash_asset_id:
         raise Exception("Cash asset not found in database")
@@ -72,7 +77,7 @@ def calculate_available_cash_balance(user_id, db_session):
 
 def get_latest_db_price(symbol):
     """
-    Fetch the latest price for a symbol from the asset_history table.
+    Fetch the latest price for a symbol from the asset_latest_price table.
     This is used as a fallback when the YahooFinance API fails.
 
     Args:
@@ -83,19 +88,12 @@ def get_latest_db_price(symbol):
     """
     db = SessionLocal()
     try:
-        # Get the asset ID for the symbol
-        asset = db.query(AssetType).filter(AssetType.asset_ticker == symbol).first()
+        latest_price = db.query(AssetLatestPrice.close_price, AssetLatestPrice.date).join(
+            AssetType, AssetType.asset_id == AssetLatestPrice.asset_id
+        ).filter(AssetType.asset_ticker == symbol).first()
 
-        if not asset:
-            return None, None
-
-        # Get the most recent price from asset_history
-        latest_history = db.query(AssetHistory).filter(
-            AssetHistory.asset_id == asset.asset_id
-        ).order_by(AssetHistory.date.desc()).first()
-
-        if latest_history:
-            return round(float(latest_history.close_price), 2), latest_history.date
+        if latest_price:
+            return round(float(latest_price.close_price), 2), latest_price.date
 
         return None, None
     except Exception as e:
@@ -104,6 +102,71 @@ def get_latest_db_price(symbol):
     finally:
         db.close()
 
+def extract_price_from_info(info):
+    """Pick the best available price out of a yfinance `info` payload."""
+    if 'currentPrice' in info and info['currentPrice']:
+        return info['currentPrice']
+    elif 'regularMarketPrice' in info and info['regularMarketPrice']:
+        return info['regularMarketPrice']
+    elif 'previousClose' in info and info['previousClose']:
+        return info['previousClose']
+    return None
+
+def fetch_live_price(symbol):
+    """
+    Fetch a live price for a single symbol from yfinance, without any fallback.
+    The `info` payload is served through the shared quote cache.
+
+    Args:
+        symbol: Stock ticker symbol (e.g., 'AAPL', 'TSLA')
+
+    Returns:
+        float: Current price, or None if yfinance returned no usable price
+    """
+    import yfinance as yf
+
+    current_price = extract_price_from_info(get_ticker_info(symbol))
+
+    if current_price is None:
+        # Fallback to history
+        hist = yf.Ticker(symbol, session=yfinance_session()).history(period="1d")
+        if not hist.empty:
+            current_price = hist['Close'].iloc[-1]
+
+    return current_price
+
+_quote_engine = None
+
+def get_quote_engine():
+    """
+    Return the process-wide QuoteEngine, creating it on first use.
+
+    Pool size and timeout can be tuned with QUOTE_ENGINE_MAX_WORKERS and
+    QUOTE_ENGINE_TIMEOUT_SECONDS.
+    """
+    global _quote_engine
+    if _quote_engine is None:
+        _quote_engine = QuoteEngine(
+            source=fetch_live_price,
+            fallback=get_latest_db_price,
+            max_workers=int(os.getenv("QUOTE_ENGINE_MAX_WORKERS", "8")),
+            timeout=float(os.getenv("QUOTE_ENGINE_TIMEOUT_SECONDS", "3")),
+        )
+    return _quote_engine
+
+def get_realtime_quotes_bulk(symbols):
+    """
+    Fetch real-time prices for multiple symbols concurrently.
+    Symbols that time out or fail are priced from the database and reported as stale.
+
+    Args:
+        symbols: List of ticker symbols
+
+    Returns:
+        QuoteResult: prices, stale symbols and missing symbols
+    """
+    return get_quote_engine().fetch(symbols)
+
 def get_realtime_prices_bulk(symbols):
     """
     Fetch real-time prices for multiple symbols using yfinance.
@@ -115,49 +178,7 @@ def get_realtime_prices_bulk(symbols):
     Returns:
         dict: Mapping of symbol to current price {symbol: price}
     """
-    import yfinance as yf
-    from curl_cffi import requests
-
-    prices = {}
-    session = requests.Session(impersonate="chrome")
-
-    for symbol in symbols:
-        try:
-            ticker = yf.Ticker(symbol, session=session)
-            info = ticker.info
-
-            # Try multiple price sources
-            current_price = None
-            if 'currentPrice' in info and info['currentPrice']:
-                current_price = info['currentPrice']
-            elif 'regularMarketPrice' in info and info['regularMarketPrice']:
-                current_price = info['regularMarketPrice']
-            elif 'previousClose' in info and info['previousClose']:
-                current_price = info['previousClose']
-
-            if current_price is None:
-                # Fallback to history
-                hist = ticker.history(period="1d")
-                if not hist.empty:
-                    current_price = hist['Close'].iloc[-1]
-
-            if current_price:
-                prices[symbol] = round(float(current_price), 2)
-            else:
-                # API failed, try database fallback
-                db_price, price_date = get_latest_db_price(symbol)
-                if db_price is not None:
-                    prices[symbol] = db_price
-                    print(f"WARNING: Using stale database price for {symbol}: ${db_price} (from {price_date})")
-        except Exception as e:
-            print(f"Error fetching price for {symbol}: {e}")
-            # Try database fallback
-            db_price, price_date = get_latest_db_price(symbol)
-            if db_price is not None:
-                prices[symbol] = db_price
-                print(f"WARNING: Using stale database price for {symbol}: ${db_price} (from {price_date})")
-
-    return prices
+    return get_realtime_quotes_bulk(symbols).prices
 
 def get_realtime_stock_price(symbol):
     """
@@ -174,31 +195,14 @@ def get_realtime_stock_price(symbol):
         price = get_realtime_stock_price('AAPL')
         # Returns: 211.14
     """
-    import yfinance as yf
-    from curl_cffi import requests
-
     try:
-        session = requests.Session(impersonate="chrome")
-        ticker = yf.Ticker(symbol, session=session)
-        info = ticker.info
-
-        # Try multiple price sources
-        current_price = None
-        if 'currentPrice' in info and info['currentPrice']:
-            current_price = info['currentPrice']
-        elif 'regularMarketPrice' in info and info['regularMarketPrice']:
-            current_price = info['regularMarketPrice']
-        elif 'previousClose' in info and info['previousClose']:
-            current_price = info['previousClose']
-
-        if current_price is None:
-            # Fallback to history
-            hist = ticker.history(period="1d")
-            if not hist.empty:
-                current_price = hist['Close'].iloc[-1]
+        current_price = fetch_live_price(symbol)
 
         if current_price:
-            return round(float(current_price), 2)
+            current_price = round(float(current_price), 2)
+            # Keep cached portfolio snapshots holding this symbol up to date
+            portfolio_snapshots.apply_price_tick(symbol, current_price)
+            return current_price
         else:
             # API failed, try database fallback
             print(f"Warning: Could not fetch live price for {symbol}, trying database fallback...")
@@ -235,75 +239,141 @@ def format_dimension(dimension):
     else:
         return dimension.capitalize()
     
-def process_time_period_data(asset_data, dimension_levels, interval, time_history):
-    asset_data = asset_data.copy()
-    
-    # Add a column for the last available date
-    asset_data['last_available_date'] = asset_data.index
-
-    # Get the last date in the data
-    last_date = asset_data.index.max()
-    interval_str = interval
-    # Define the interval based on interval
-    if interval == 'weekly':
-        interval = relativedelta(weeks=1)
-    elif interval == 'monthly':
-        interval = relativedelta(months=1)
-    elif interval == 'quarterly':
-        interval = relativedelta(months=3)
-    else:  # yearly
-        interval = relativedelta(years=1)
-
-    # Calculate the start date based on time_history, adding one extra interval
-    start_date = last_date - relativedelta(years=time_history) - interval
-
-    # Create a list of target dates for resampling
+PERIOD_INTERVALS = {
+    'weekly': relativedelta(weeks=1),
+    'monthly': relativedelta(months=1),
+    'quarterly': relativedelta(months=3),
+    'yearly': relativedelta(years=1),
+}
+
+@lru_cache(maxsize=256)
+def _period_target_dates(last_date, interval, time_history):
+    """Target dates stepping back from `last_date` one interval at a time, one interval past `time_history` years."""
+    step = PERIOD_INTERVALS.get(interval, PERIOD_INTERVALS['yearly'])
+    start_date = last_date - relativedelta(years=time_history) - step
     target_dates = []
     current_date = last_date
     while current_date >= start_date:
         target_dates.append(current_date)
-        current_date -= interval
+        current_date -= step
+    target_dates = np.array(target_dates, dtype='datetime64[ns]')
+    target_dates.flags.writeable = False  # Shared between callers through the cache
+    return target_dates
+
+def _period_windows(unique_dates, target_dates):
+    """
+    Resolve each pair of consecutive target dates to its (start_actual, end_actual] window.
 
-    # Resample the data
-    result = pd.DataFrame()
-    for i in range(len(target_dates) - 1):
-        end_target = target_dates[i]
-        start_target = target_dates[i + 1]
+    end_actual is the latest available date not exceeding the period's end target and
+    start_actual the latest available date not exceeding its start target that is also
+    before end_actual (or the earliest date when there is none).
+    """
+    end_targets, start_targets = target_dates[:-1], target_dates[1:]
+    end_idx = np.searchsorted(unique_dates, end_targets, side='right') - 1
+    has_data = end_idx >= 0
+    end_targets, start_targets, end_idx = end_targets[has_data], start_targets[has_data], end_idx[has_data]
+    end_actual = unique_dates[end_idx]
+    start_idx = np.minimum(np.searchsorted(unique_dates, start_targets, side='right'), end_idx) - 1
+    start_actual = np.where(start_idx >= 0, unique_dates[np.maximum(start_idx, 0)], unique_dates[0])
+    return end_targets, start_actual, end_actual
+
+def process_time_period_data(asset_data, dimension_levels, interval, time_history, group_by=None):
+    """
+    Summarize daily close prices into weekly, monthly, quarterly or yearly periods.
 
-        # Find the actual end date (latest available date not exceeding the target)
-        end_actual = asset_data[asset_data.index <= end_target].index.max()
-        if pd.isnull(end_actual):
-            continue  # Skip this period if no data is available
+    Periods are anchored on the last available date and step back one interval at a
+    time for `time_history` years (plus one extra interval). Each period covers the
+    rows dated after the previous period's actual end date up to its own actual end
+    date. All groups are summarized in one pass over date-sorted arrays.
 
-        # Find the actual start date (latest available date not exceeding the target)
-        start_actual = asset_data[(asset_data.index <= start_target) & (asset_data.index < end_actual)].index.max()
-        if pd.isnull(start_actual):
-            start_actual = asset_data.index.min()  # Use the earliest date if no earlier data is available
+    Args:
+        asset_data: DataFrame indexed by date with a `close_price` column
+        dimension_levels: Dimension columns; the first one names each period's index
+            ('portfolio' when 'all' is among them)
+        interval: 'weekly', 'monthly', 'quarterly' or 'yearly'
+        time_history: Number of years to cover
+        group_by: Optional column; periods are then computed separately per value,
+            each anchored on that group's own last date
 
-        period_data = asset_data[(asset_data.index > start_actual) & (asset_data.index <= end_actual)]
-        
-        if not period_data.empty:
-            period_result = pd.DataFrame({
-                'aligned_date': [end_target],  # Keep the target date for alignment
-                'actual_date': [end_actual],   # Add the actual date used
-                'year': [end_target.year],     # Use end_target.year
-                'index_name': [period_data[dimension_levels[0]].iloc[-1]] if 'all' not in dimension_levels else "portfolio",
-                'open_price': [period_data['close_price'].iloc[0]],
-                'high_price': [period_data['close_price'].max()],
-                'low_price': [period_data['close_price'].min()],
-                'close_price': [period_data['close_price'].iloc[-1]],
-                'average_price': [period_data['close_price'].mean()],
-                'number_of_records': [len(period_data)],
-                'last_date': [period_data.index[-1]]
-            })
-            result = pd.concat([result, period_result], ignore_index=True)
+    Returns:
+        DataFrame: One row per non-empty period with aligned_date, actual_date, year,
+        index_name, open/high/low/close/average price, number_of_records, last_date
+        and freq
+    """
+    dates = pd.DatetimeIndex(asset_data.index).values.astype('datetime64[ns]')
+    closes = asset_data['close_price'].to_numpy(dtype=float)
+    if group_by is None:
+        codes = np.zeros(len(asset_data), dtype=np.int64)
+    else:
+        codes = pd.factorize(asset_data[group_by])[0]
+
+    # Sort rows by group then date; ties keep their original order
+    positions = np.arange(len(asset_data))
+    order = np.lexsort((positions, dates, codes))
+    order = order[codes[order] >= 0]
+    sorted_codes, sorted_dates = codes[order], dates[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(order) else np.array([], dtype=int)
+    group_ends = np.r_[group_starts[1:], len(order)]
+
+    aligned, actual, lo, hi = [], [], [], []
+    for start, end in zip(group_starts, group_ends):
+        group_dates = sorted_dates[start:end]
+        unique_dates = np.unique(group_dates)
+        target_dates = _period_target_dates(pd.Timestamp(unique_dates[-1]), interval, time_history)
+        end_targets, start_actual, end_actual = _period_windows(unique_dates, target_dates)
+        aligned.append(end_targets)
+        actual.append(end_actual)
+        lo.append(start + np.searchsorted(group_dates, start_actual, side='right'))
+        hi.append(start + np.searchsorted(group_dates, end_actual, side='right'))
+
+    aligned = np.concatenate(aligned) if aligned else np.array([], dtype='datetime64[ns]')
+    actual = np.concatenate(actual) if actual else np.array([], dtype='datetime64[ns]')
+    lo = np.concatenate(lo) if lo else np.array([], dtype=np.int64)
+    hi = np.concatenate(hi) if hi else np.array([], dtype=np.int64)
+    non_empty = hi > lo
+    aligned, actual, lo, hi = aligned[non_empty], actual[non_empty], lo[non_empty], hi[non_empty]
+
+    # reduceat over interleaved [lo, hi) bounds: even slots hold each window's reduction.
+    # A trailing sentinel keeps hi == len(order) a valid index.
+    bounds = np.empty(2 * len(lo), dtype=np.int64)
+    bounds[0::2], bounds[1::2] = lo, hi
+    window_positions = np.r_[order, 0]
+    window_closes = np.r_[closes[order], np.nan]
+    valid = ~np.isnan(window_closes)
+
+    def reduce(ufunc, values):
+        return ufunc.reduceat(values, bounds)[0::2] if len(bounds) else values[:0]
+
+    first_pos = reduce(np.minimum, window_positions)
+    last_pos = reduce(np.maximum, window_positions)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average_price = reduce(np.add, np.where(valid, window_closes, 0.0)) / reduce(np.add, valid.astype(np.int64))
+
+    if 'all' in dimension_levels:
+        index_name = "portfolio"
+    else:
+        index_name = asset_data[dimension_levels[0]].to_numpy()[last_pos]
+
+    result = pd.DataFrame({
+        'aligned_date': aligned,  # Keep the target date for alignment
+        'actual_date': actual,    # Add the actual date used
+        'year': pd.DatetimeIndex(aligned).year.astype(np.int64),
+        'index_name': index_name,
+        'open_price': closes[first_pos],
+        'high_price': reduce(np.fmax, window_closes),
+        'low_price': reduce(np.fmin, window_closes),
+        'close_price': closes[last_pos],
+        'average_price': average_price,
+        'number_of_records': (hi - lo).astype(np.int64),
+        'last_date': dates[last_pos]
+    })
 
     # Add interval column with correct formatting
-    if interval_str == 'weekly':
+    if interval == 'weekly':
         result['freq'] = result['actual_date'].dt.strftime('%Y-W%W')
-    elif interval_str == 'monthly':
+    elif interval == 'monthly':
         result['freq'] = result['actual_date'].dt.strftime('%Y-%m')
-    elif interval_str == 'quarterly':
+    elif interval == 'quarterly':
         result['freq'] = result['actual_date'].dt.to_period('Q').astype(str)
     else:  # yearly
         result['freq'] = result['actual_date'].dt.strftime('%Y')
@@ -0,0 +1,144 @@
+import os
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import func
+
+from src.components.market_data_downloader import TickerReport, default_downloader
+from src.database.bulk_upsert import close_price_rows, upsert_asset_history
+from src.database.models import AssetHistory, AssetHistoryWatermark, AssetType
+
+HISTORY_YEARS = 5
+# Days before the newest stored close that are downloaded again, to pick up late or revised closes
+OVERLAP_DAYS = int(os.getenv("HISTORY_REFRESH_OVERLAP_DAYS", "5"))
+
+# downloader(tickers, start, end) -> {ticker: frame indexed by date with a 'Close' column},
+# covering start <= date < end; tickers without data are left out
+Downloader = Callable[[List[str], date, date], Dict[str, pd.DataFrame]]
+
+
+def plan_downloads(tickers: List[str], last_dates: Dict[str, date], today: date, incremental: bool = True,
+                   overlap_days: int = OVERLAP_DAYS, years: int = HISTORY_YEARS) -> Dict[date, List[str]]:
+    """
+    Group tickers by the first day to download.
+
+    In incremental mode a ticker with stored history starts `overlap_days`
+    before its newest close; tickers without history, and every ticker in
+    full mode, start at the beginning of the `years` retention window.
+
+    Returns:
+        dict: start date -> tickers to download from that date
+    """
+    window_start = today - relativedelta(years=years)
+    plan = {}
+    for ticker in tickers:
+        last_date = last_dates.get(ticker) if incremental else None
+        start = window_start if last_date is None else max(window_start, last_date - timedelta(days=overlap_days))
+        plan.setdefault(start, []).append(ticker)
+    return plan
+
+
+@dataclass
+class HistoryRefreshResult:
+    """
+    Outcome of refresh_history.
+
+    Args:
+        since: Earliest date inserted or updated, None when nothing was written
+        rows_written: Rows inserted or updated
+        rows_deleted: Rows dropped for falling out of the retention window
+        requests: (start, end, tickers) of every download made
+        last_dates: Newest date written per ticker
+        downloads: Per-ticker download report, when the downloader provides one
+    """
+    since: Optional[date] = None
+    rows_written: int = 0
+    rows_deleted: int = 0
+    requests: List[Tuple[date, date, List[str]]] = field(default_factory=list)
+    last_dates: Dict[str, date] = field(default_factory=dict)
+    downloads: Dict[str, TickerReport] = field(default_factory=dict)
+
+
+def refresh_history(session, downloader: Downloader = None, incremental: bool = True,
+                    today: date = None, overlap_days: int = OVERLAP_DAYS,
+                    years: int = HISTORY_YEARS) -> HistoryRefreshResult:
+    """
+    Bring asset_history up to date for every non-cash asset.
+
+    Deletes rows older than the retention window, reads the newest stored
+    date per asset, and downloads only the missing days (plus the overlap)
+    with one downloader call per distinct start date, normally a single one;
+    the default downloader spreads it over parallel, retried requests.
+    All tickers are written up to their most recent common date, through the
+    bulk upsert, and a watermark is recorded per ticker.
+
+    Args:
+        session: SQLAlchemy session
+        downloader: Callable fetching closes, see Downloader (default: a
+            MarketDataDownloader configured from the environment)
+        incremental: Download only missing days; False re-downloads the whole window
+        today: Day the refresh runs for (default: date.today()); downloads end before it
+        overlap_days: Days re-downloaded before each ticker's newest close
+        years: Retention window in years
+
+    Returns:
+        HistoryRefreshResult: What was requested and written
+    """
+    today = today or date.today()
+    downloader = downloader or default_downloader()
+    result = HistoryRefreshResult()
+
+    assets = session.query(AssetType.asset_id, AssetType.asset_ticker).filter(AssetType.asset_ticker != "CASH").all()
+    if not assets:
+        print("No non-cash assets found in AssetType table.")
+        return result
+    ticker_to_id = {ticker: asset_id for asset_id, ticker in assets}
+
+    window_start = today - relativedelta(years=years)
+    result.rows_deleted = session.query(AssetHistory).filter(AssetHistory.date < window_start).delete()
+    session.commit()
+
+    stored = dict(session.query(AssetHistory.asset_id, func.max(AssetHistory.date)).group_by(AssetHistory.asset_id).all())
+    last_dates = {ticker: stored[asset_id] for ticker, asset_id in ticker_to_id.items() if asset_id in stored}
+
+    plan = plan_downloads(list(ticker_to_id), last_dates, today, incremental, overlap_days, years)
+    frames, requested_from = {}, {}
+    for start, tickers in sorted(plan.items()):
+        if start >= today:
+            continue
+        result.requests.append((start, today, tickers))
+        try:
+            frames.update(downloader(tickers, start, today))
+        except Exception as e:
+            print(f"Failed to download data for {', '.join(tickers)}: {str(e)}")
+        result.downloads.update(getattr(downloader, "last_report", {}))
+        requested_from.update({ticker: start for ticker in tickers})
+
+    if not frames:
+        print("No new historical data was downloaded.")
+        return result
+
+    # Align every ticker on the most recent day all of them have
+    cutoff = min(frame.index.max() for frame in frames.values())
+    watermarks = []
+    for ticker, frame in frames.items():
+        rows = close_price_rows(ticker_to_id[ticker], frame.loc[:cutoff])
+        upsert_asset_history(session, rows)
+        result.rows_written += len(rows)
+        if rows:
+            first, last = rows[0]["date"], rows[-1]["date"]
+            result.since = first if result.since is None else min(result.since, first)
+            result.last_dates[ticker] = last
+        watermarks.append({
+            "asset_id": ticker_to_id[ticker],
+            "ticker": ticker,
+            "last_date": max(filter(None, [result.last_dates.get(ticker), last_dates.get(ticker)]), default=None),
+            "requested_from": requested_from[ticker],
+            "rows_written": len(rows),
+        })
+        print(f"Wrote {len(rows)} historical records for {ticker}")
+    AssetHistoryWatermark.record(session, watermarks)
+    return result
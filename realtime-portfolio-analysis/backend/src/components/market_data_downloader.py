@@ -0,0 +1,155 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.components.quote_cache import yfinance_session
+
+# Tickers stored under a different symbol than Yahoo Finance uses
+YAHOO_SYMBOLS = {'SPX': '^SPX'}
+
+# fetch(tickers, start, end, timeout) -> {ticker: frame indexed by date with a 'Close' column}
+Fetch = Callable[[List[str], date, date, float], Dict[str, pd.DataFrame]]
+
+
+def yfinance_fetch(tickers: List[str], start: date, end: date, timeout: float) -> Dict[str, pd.DataFrame]:
+    """Daily closes of `tickers` from one multi-symbol yf.download; tickers without data are left out."""
+    import yfinance as yf
+
+    symbols = [YAHOO_SYMBOLS.get(ticker, ticker) for ticker in tickers]
+    data = yf.download(" ".join(symbols), start=start, end=end, session=yfinance_session(),
+                       timeout=timeout, progress=False, threads=False)
+    if data is None or data.empty:
+        return {}
+    close = data['Close']
+    if isinstance(close, pd.Series):
+        close = close.to_frame(symbols[0])
+
+    frames = {}
+    for ticker, symbol in zip(tickers, symbols):
+        if symbol in close.columns:
+            series = close[symbol].dropna()
+            if not series.empty:
+                frames[ticker] = series.to_frame('Close')
+    return frames
+
+
+@dataclass
+class TickerReport:
+    """
+    How the download of one ticker went.
+
+    Args:
+        ticker: Stored ticker
+        rows: Daily closes received, 0 when it failed
+        seconds: Wall time from its first attempt to its last
+        attempts: Requests made for it
+        error: Last error when every attempt failed, else None
+    """
+    ticker: str
+    rows: int = 0
+    seconds: float = 0.0
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+class MarketDataDownloader:
+    """
+    Downloads daily closes for many tickers on a bounded worker pool.
+
+    Tickers are split into chunks of `chunk_size` (one symbol each by
+    default), each fetched with one request on one of `max_workers` threads,
+    so the wall time of a refresh follows the slowest ticker rather than the
+    sum of all of them. yfinance fetches the symbols of a multi-symbol chunk
+    one after another, so larger chunks trade latency for fewer requests.
+    A request that raises, or a ticker missing from an otherwise successful
+    response, is retried up to `retries` times with exponential backoff
+    (`backoff_seconds`, doubling per retry, with jitter). Every call leaves a
+    per-ticker TickerReport in `last_report`.
+
+    Instances are Downloader callables for history_refresh.refresh_history;
+    pass a different `fetch` to read from a local or fake source.
+
+    Args:
+        fetch: Callable doing one request, see Fetch
+        max_workers: Requests in flight at once
+        chunk_size: Tickers per request
+        timeout: Per-request timeout in seconds, handed to `fetch`
+        retries: Extra attempts per ticker after the first one
+        backoff_seconds: Delay before the first retry
+    """
+
+    def __init__(self, fetch: Fetch = yfinance_fetch, max_workers: int = 8, chunk_size: int = 1,
+                 timeout: float = 20.0, retries: int = 3, backoff_seconds: float = 1.0):
+        self.fetch = fetch
+        self.max_workers = max_workers
+        self.chunk_size = max(1, chunk_size)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.last_report: Dict[str, TickerReport] = {}
+        self._lock = threading.Lock()
+
+    def _download_chunk(self, tickers: List[str], start: date, end: date, report: Dict[str, TickerReport]):
+        frames = {}
+        pending = list(tickers)
+        started = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = self.backoff_seconds * 2 ** (attempt - 1)
+                time.sleep(delay + random.uniform(0, delay / 2))
+            for ticker in pending:
+                report[ticker].attempts += 1
+            try:
+                fetched = self.fetch(pending, start, end, self.timeout)
+                error = "no data returned"
+            except Exception as e:
+                fetched, error = {}, f"{type(e).__name__}: {e}"
+            for ticker in pending:
+                frame = fetched.get(ticker)
+                if frame is not None and not frame.empty:
+                    frames[ticker] = frame
+                    report[ticker].rows = len(frame)
+                    report[ticker].error = None
+                else:
+                    report[ticker].error = error
+            pending = [ticker for ticker in pending if ticker not in frames]
+            if not pending:
+                break
+        elapsed = time.perf_counter() - started
+        for ticker in tickers:
+            report[ticker].seconds = round(elapsed, 3)
+        return frames
+
+    def __call__(self, tickers: List[str], start: date, end: date) -> Dict[str, pd.DataFrame]:
+        """Download closes of `tickers` for start <= date < end; failed tickers are left out and reported."""
+        report = {ticker: TickerReport(ticker) for ticker in tickers}
+        chunks = [tickers[i:i + self.chunk_size] for i in range(0, len(tickers), self.chunk_size)]
+        frames = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="market-data") as pool:
+            for chunk_frames in pool.map(lambda chunk: self._download_chunk(chunk, start, end, report), chunks):
+                frames.update(chunk_frames)
+        with self._lock:
+            self.last_report = report
+        return frames
+
+    def failures(self) -> Dict[str, str]:
+        """Tickers of the last call that failed every attempt, with their error."""
+        with self._lock:
+            return {ticker: r.error for ticker, r in self.last_report.items() if r.error}
+
+
+def default_downloader() -> MarketDataDownloader:
+    """Downloader configured from the environment (HISTORY_DOWNLOAD_* variables)."""
+    return MarketDataDownloader(
+        max_workers=int(os.getenv("HISTORY_DOWNLOAD_WORKERS", "8")),
+        chunk_size=int(os.getenv("HISTORY_DOWNLOAD_CHUNK_SIZE", "1")),
+        timeout=float(os.getenv("HISTORY_DOWNLOAD_TIMEOUT_SECONDS", "20")),
+        retries=int(os.getenv("HISTORY_DOWNLOAD_RETRIES", "3")),
+    )
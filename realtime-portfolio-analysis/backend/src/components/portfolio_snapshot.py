@@ -0,0 +1,177 @@
+import copy
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.pipeline import metrics
+
+
+class PortfolioSnapshot:
+    """
+    In-memory copy of one user's portfolio summary.
+
+    Holds the holdings rows as loaded from the database (database close prices,
+    cost basis and the available cash balance already applied to the CASH row)
+    plus an overlay of live prices. Live prices are applied incrementally, so a
+    price tick only touches the rows holding that ticker.
+
+    Args:
+        user_id: User the snapshot belongs to
+        rows: Portfolio summary rows as produced by the database query
+    """
+
+    def __init__(self, user_id: int, rows: List[Dict[str, Any]]):
+        self.user_id = user_id
+        self._rows = rows
+        self._live_prices = {}  # ticker -> live price
+        self._lock = threading.Lock()
+        self.built_at = time.monotonic()
+        self.prices_at = None  # monotonic time of the last full live price refresh
+
+    @property
+    def symbols(self) -> List[str]:
+        """Non-cash tickers held in the portfolio."""
+        return [row['Ticker'] for row in self._rows if row.get('Ticker') != 'CASH']
+
+    def apply_prices(self, prices: Dict[str, float], full_refresh: bool = False) -> bool:
+        """
+        Record live prices for the tickers in `prices` that this portfolio holds.
+
+        Args:
+            prices: Mapping of ticker to live price
+            full_refresh: True when `prices` is a fresh quote for every holding
+
+        Returns:
+            bool: Whether any held ticker was updated
+        """
+        held = set(self.symbols)
+        with self._lock:
+            updated = {ticker: price for ticker, price in prices.items() if ticker in held and price}
+            self._live_prices.update(updated)
+            if full_refresh:
+                self.prices_at = time.monotonic()
+        return bool(updated)
+
+    def prices_fresh(self, max_age_seconds: float) -> bool:
+        """Whether live prices were fully refreshed within `max_age_seconds`."""
+        return self.prices_at is not None and time.monotonic() - self.prices_at < max_age_seconds
+
+    def summary(self, use_realtime_prices: bool = True) -> Dict[str, Any]:
+        """
+        Build the portfolio summary dict ('table' rows and 'total' aggregates).
+
+        Rows are copies, so callers may modify the result freely.
+        """
+        with self._lock:
+            table_data = copy.deepcopy(self._rows)
+            live_prices = dict(self._live_prices) if use_realtime_prices else {}
+
+        # Update with real-time prices if available
+        for row_data in table_data:
+            ticker = row_data.get('Ticker')
+            if ticker in live_prices and ticker != 'CASH':
+                rt_price = live_prices[ticker]
+                quantity = row_data.get('Quantity', 0)
+                avg_cost = row_data.get('Avg. Cost', 0)
+
+                # Update current price and recalculate values
+                row_data['Current Price'] = rt_price
+                row_data['Current Value'] = round(quantity * rt_price, 2)
+                row_data['P&L'] = round((quantity * rt_price) - row_data.get('Purchase Cost', 0), 2)
+                if avg_cost > 0:
+                    row_data['Percentage Change'] = round(((rt_price / avg_cost) - 1) * 100, 2)
+
+        # Calculate totals
+        total_purchase_cost = sum(row.get('Purchase Cost', 0) for row in table_data)
+        total_current_value = sum(row.get('Current Value', 0) for row in table_data)
+        total_pnl = total_current_value - total_purchase_cost
+        total_percentage_change = (total_current_value / total_purchase_cost - 1) * 100 if total_purchase_cost != 0 else 0
+
+        return {
+            "table": table_data,
+            "total": {
+                'total_purchase_cost': round(total_purchase_cost, 2),
+                'total_current_value': round(total_current_value, 2),
+                'total_pnl': round(total_pnl, 2),
+                'total_percentage_change': round(total_percentage_change, 2)
+            },
+        }
+
+
+def _user_key(user_id):
+    """Tool arguments may carry the user id as a string; key the cache on the int."""
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return user_id
+
+
+class PortfolioSnapshotCache:
+    """
+    Process-wide cache of PortfolioSnapshot objects keyed by user_id.
+
+    Every code path that writes holdings, cash or orders must call `invalidate`
+    for the affected user after committing. Snapshots also expire after
+    `max_age_seconds` as a safety net for writes made outside this process
+    (e.g. the refresh scripts or another worker).
+
+    Args:
+        max_age_seconds: Maximum lifetime of a snapshot before it is rebuilt
+    """
+
+    def __init__(self, max_age_seconds: float = 300.0):
+        self.max_age_seconds = max_age_seconds
+        self._snapshots = {}  # user_id -> PortfolioSnapshot
+        self._generations = {}  # user_id -> invalidation count, None -> invalidate-all count
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0, "price_ticks": 0}
+
+    def get(self, user_id: int, loader: Callable[[int], PortfolioSnapshot]) -> PortfolioSnapshot:
+        """Return the user's snapshot, building it with `loader(user_id)` when absent or expired."""
+        user_id = _user_key(user_id)
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot is not None and time.monotonic() - snapshot.built_at < self.max_age_seconds:
+                self._counters["hits"] += 1
+                metrics.count_cache("portfolio_snapshot", hit=True)
+                return snapshot
+            self._counters["misses"] += 1
+            metrics.count_cache("portfolio_snapshot", hit=False)
+            generation = (self._generations.get(None, 0), self._generations.get(user_id, 0))
+
+        snapshot = loader(user_id)
+        with self._lock:
+            # Do not cache a snapshot that an invalidation raced with while it was loading
+            if generation == (self._generations.get(None, 0), self._generations.get(user_id, 0)):
+                self._snapshots[user_id] = snapshot
+        return snapshot
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """Drop one user's snapshot, or every snapshot when no user is given."""
+        user_id = None if user_id is None else _user_key(user_id)
+        with self._lock:
+            self._counters["invalidations"] += 1
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            if user_id is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(user_id, None)
+
+    def apply_price_tick(self, ticker: str, price: float):
+        """Push a fresh live price into every cached snapshot holding `ticker`."""
+        with self._lock:
+            snapshots = list(self._snapshots.values())
+        for snapshot in snapshots:
+            if snapshot.apply_prices({ticker: price}):
+                with self._lock:
+                    self._counters["price_ticks"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "size": len(self._snapshots), "max_age_seconds": self.max_age_seconds}
+
+
+portfolio_snapshots = PortfolioSnapshotCache(
+    max_age_seconds=float(os.getenv("PORTFOLIO_SNAPSHOT_MAX_AGE_SECONDS", "300")),
+)
@@ -0,0 +1,155 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+
+from src.database.models import AssetHistory
+
+ARCHIVE_FORMAT = 1
+MANIFEST = "manifest.json"
+# One file per column; row i of dates/closes/ids belongs to the asset whose offsets range holds i
+COLUMNS = {
+    "asset_ids": np.int64,   # one entry per asset, ascending
+    "offsets": np.int64,     # len(asset_ids) + 1 row offsets into the columns below
+    "dates": "datetime64[D]",
+    "closes": np.float64,
+    "ids": np.int64,
+}
+
+
+class ArchiveError(Exception):
+    """The archive is missing, unreadable or was written by an incompatible version."""
+
+
+def table_fingerprint(session) -> Dict[str, Any]:
+    """
+    Cheap summary of asset_history used to tell whether an archive is current.
+
+    Row count, id and date bounds catch appended, deleted and re-imported
+    rows; the rounded sum of closes catches closes revised in place by the
+    refresh overlap.
+    """
+    rows, max_id, first, last, total = session.execute(select(
+        func.count(), func.max(AssetHistory.asset_hist_id), func.min(AssetHistory.date),
+        func.max(AssetHistory.date), func.total(AssetHistory.close_price),
+    )).one()
+    return {
+        "rows": rows,
+        "max_asset_hist_id": max_id,
+        "first_date": str(first) if first is not None else None,
+        "last_date": str(last) if last is not None else None,
+        "close_total": round(total or 0.0, 4),
+    }
+
+
+def write_archive(path: str, series: Dict[int, Any], fingerprint: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Write price series to `path` as one .npy file per column plus a manifest.
+
+    Columns are written under temporary names and renamed into place, the
+    manifest last, so a reader never sees a manifest describing half-written
+    columns.
+
+    Args:
+        path: Archive directory, created when missing
+        series: asset_id -> PriceSeries
+        fingerprint: table_fingerprint of the rows the series were read from
+
+    Returns:
+        dict: The manifest written
+    """
+    os.makedirs(path, exist_ok=True)
+    asset_ids = np.array(sorted(series), dtype=np.int64)
+    lengths = np.array([len(series[a]) for a in asset_ids], dtype=np.int64)
+    columns = {
+        "asset_ids": asset_ids,
+        "offsets": np.concatenate(([0], np.cumsum(lengths))).astype(np.int64),
+        "dates": np.concatenate([series[a].dates for a in asset_ids] or [np.array([], dtype="datetime64[D]")]),
+        "closes": np.concatenate([series[a].closes for a in asset_ids] or [np.array([], dtype=np.float64)]),
+        "ids": np.concatenate([series[a].ids for a in asset_ids] or [np.array([], dtype=np.int64)]),
+    }
+    for name, dtype in COLUMNS.items():
+        tmp = os.path.join(path, f".{name}.npy.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(columns[name], dtype=dtype))
+        os.replace(tmp, os.path.join(path, f"{name}.npy"))
+
+    manifest = {
+        "format": ARCHIVE_FORMAT,
+        "assets": len(asset_ids),
+        "rows": int(lengths.sum()),
+        "fingerprint": fingerprint,
+        "written_at": datetime.now(timezone.utc).isoformat(),
+    }
+    tmp = os.path.join(path, f".{MANIFEST}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(path, MANIFEST))
+    return manifest
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """Manifest of the archive at `path`; raises ArchiveError when missing or incompatible."""
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ArchiveError(f"No readable price history archive at {path}: {e}") from e
+    if manifest.get("format") != ARCHIVE_FORMAT:
+        raise ArchiveError(f"Price history archive at {path} has format {manifest.get('format')}, expected {ARCHIVE_FORMAT}")
+    return manifest
+
+
+def read_archive(path: str, mmap: bool = True) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Read the columns of the archive at `path`.
+
+    With `mmap` the columns are memory-mapped read-only, so opening the
+    archive costs a few file opens regardless of its size and pages are read
+    on first access; otherwise they are read into memory.
+
+    Returns:
+        tuple: (column name -> array, manifest)
+    """
+    manifest = read_manifest(path)
+    columns = {}
+    try:
+        for name, dtype in COLUMNS.items():
+            array = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None, allow_pickle=False)
+            if array.dtype != np.dtype(dtype):
+                raise ArchiveError(f"Column {name} of {path} has dtype {array.dtype}, expected {np.dtype(dtype)}")
+            columns[name] = array
+    except (OSError, ValueError) as e:
+        raise ArchiveError(f"Unreadable price history archive at {path}: {e}") from e
+    if len(columns["offsets"]) != len(columns["asset_ids"]) + 1 or columns["offsets"][-1] != manifest["rows"]:
+        raise ArchiveError(f"Price history archive at {path} does not match its manifest")
+    return columns, manifest
+
+
+def load_series(path: str, mmap: bool = True) -> Tuple[Dict[int, Any], Dict[str, Any]]:
+    """
+    PriceSeries per asset from the archive at `path`.
+
+    Each series is a view into the archive columns, so nothing is copied;
+    with `mmap` the series share the page cache with every other process
+    reading the same archive.
+
+    Returns:
+        tuple: (asset_id -> PriceSeries, manifest with the load time in `load_ms`)
+    """
+    from src.components.price_history_store import PriceSeries
+
+    started = time.perf_counter()
+    columns, manifest = read_archive(path, mmap=mmap)
+    offsets = columns["offsets"].tolist()
+    dates, closes, ids = columns["dates"], columns["closes"], columns["ids"]
+    series = {
+        asset_id: PriceSeries(asset_id, dates[lo:hi], closes[lo:hi], ids[lo:hi])
+        for asset_id, lo, hi in zip(columns["asset_ids"].tolist(), offsets, offsets[1:])
+    }
+    manifest["load_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return series, manifest
@@ -0,0 +1,455 @@
+import os
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+
+from src.components import price_history_archive
+from src.database.database import ReadSessionLocal
+from src.database.models import AssetHistory, AssetSector, AssetType, UserPortfolio
+from src.pipeline.logger import logger
+
+HOLDING_COLUMNS = [
+    'asset_id', 'asset_class', 'asset_name', 'concentration', 'asset_manager', 'category', 'ticker',
+    'asset_total_units'
+]
+
+
+def _to_day(value) -> np.datetime64:
+    """Convert a date, datetime, Timestamp or string to datetime64[D]."""
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+class PriceSeries:
+    """
+    Close price history of one asset as contiguous arrays sorted by date.
+
+    Series are never modified in place; a refresh replaces them, so readers can
+    keep using a series they already hold.
+
+    Args:
+        asset_id: Asset the prices belong to
+        dates: datetime64[D] array, ascending
+        closes: float64 close prices aligned with `dates`
+        ids: asset_hist_id of each row, aligned with `dates`
+    """
+
+    __slots__ = ('asset_id', 'dates', 'closes', 'ids')
+
+    def __init__(self, asset_id: int, dates: np.ndarray, closes: np.ndarray, ids: np.ndarray):
+        self.asset_id = asset_id
+        self.dates = dates
+        self.closes = closes
+        self.ids = ids
+        for array in (dates, closes, ids):
+            array.setflags(write=False)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def last_date(self) -> Optional[np.datetime64]:
+        return self.dates[-1] if len(self.dates) else None
+
+    def slice(self, start=None, end=None) -> 'PriceSeries':
+        """Rows with start <= date <= end; either bound may be omitted."""
+        lo = 0 if start is None else np.searchsorted(self.dates, _to_day(start), side='left')
+        hi = len(self.dates) if end is None else np.searchsorted(self.dates, _to_day(end), side='right')
+        return PriceSeries(self.asset_id, self.dates[lo:hi], self.closes[lo:hi], self.ids[lo:hi])
+
+    def as_of(self, day):
+        """
+        Last close on or before `day`.
+
+        Returns:
+            tuple: (date, close_price), or None when the series starts after `day`
+        """
+        idx = np.searchsorted(self.dates, _to_day(day), side='right') - 1
+        if idx < 0:
+            return None
+        return self.dates[idx].astype(date), float(self.closes[idx])
+
+
+def _build_series(asset_ids: np.ndarray, dates: np.ndarray, closes: np.ndarray, ids: np.ndarray) -> Dict[int, PriceSeries]:
+    """Split rows sorted by (asset_id, date) into one PriceSeries per asset."""
+    if not len(asset_ids):
+        return {}
+    bounds = np.flatnonzero(np.diff(asset_ids)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(asset_ids)]))
+    return {
+        int(asset_ids[lo]): PriceSeries(int(asset_ids[lo]), dates[lo:hi].copy(), closes[lo:hi].copy(), ids[lo:hi].copy())
+        for lo, hi in zip(starts, ends)
+    }
+
+
+def _fetch_rows(session, since=None, asset_ids: Optional[Iterable[int]] = None):
+    """Read asset_history rows as arrays sorted by (asset_id, date)."""
+    query = select(AssetHistory.asset_id, AssetHistory.date, AssetHistory.close_price, AssetHistory.asset_hist_id)
+    if since is not None:
+        query = query.where(AssetHistory.date >= pd.Timestamp(since).date())
+    if asset_ids is not None:
+        query = query.where(AssetHistory.asset_id.in_(list(asset_ids)))
+    rows = session.execute(query.order_by(AssetHistory.asset_id, AssetHistory.date, AssetHistory.asset_hist_id)).all()
+
+    asset_col = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    date_col = np.array([row[1] for row in rows], dtype='datetime64[D]')
+    close_col = np.fromiter((np.nan if row[2] is None else row[2] for row in rows), dtype=np.float64, count=len(rows))
+    id_col = np.fromiter((row[3] for row in rows), dtype=np.int64, count=len(rows))
+    return asset_col, date_col, close_col, id_col
+
+
+class PriceHistoryStore:
+    """
+    Process-wide, read-mostly copy of the asset_history table.
+
+    Holds one PriceSeries per asset_id so the analytics tools can slice price
+    history by date range or look up as-of prices without querying SQLite. The
+    store loads lazily on first use (or eagerly at startup via `load`) and is
+    brought up to date with `refresh` after the history table is rewritten.
+    As a safety net for writes made outside this process, a store older than
+    `max_age_seconds` picks up newly appended rows on the next read.
+
+    Loads and refreshes are single-flight: they run one at a time, the
+    first readers of an empty store wait for a single load, and once the
+    store expires one reader refreshes it while the others keep reading
+    the current snapshot.
+
+    With an `archive_path`, `load` cold-starts from the columnar archive there
+    (see price_history_archive) when its fingerprint still matches the
+    table, and rewrites it after reading the table otherwise.
+
+    Args:
+        session_factory: Callable returning a new SQLAlchemy session
+        max_age_seconds: Age after which reads trigger an incremental refresh
+        archive_path: Optional directory of the on-disk archive
+    """
+
+    def __init__(self, session_factory=ReadSessionLocal, max_age_seconds: float = 3600.0,
+                 archive_path: Optional[str] = None):
+        self.session_factory = session_factory
+        self.max_age_seconds = max_age_seconds
+        self.archive_path = archive_path
+        self._series = None  # asset_id -> PriceSeries, replaced wholesale on refresh
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.RLock()  # held for the duration of a load or refresh
+        self._counters = {"loads": 0, "refreshes": 0, "refreshed_rows": 0, "archive_loads": 0, "archive_writes": 0}
+        self._last_load = None  # {"source": "database" | "archive", "ms": duration of the last load}
+
+    def load(self, session=None) -> int:
+        """
+        (Re)load the full history table, from the archive when it is current.
+
+        Returns:
+            int: Number of price rows held
+        """
+        with self._load_lock:
+            return self._load(session)
+
+    def _load(self, session=None) -> int:
+        started = time.perf_counter()
+        own_session = session is None
+        session = session or self.session_factory()
+        try:
+            fingerprint = price_history_archive.table_fingerprint(session) if self.archive_path else None
+            series = self._load_archive(fingerprint) if fingerprint else None
+            source = "archive" if series is not None else "database"
+            if series is None:
+                series = _build_series(*_fetch_rows(session))
+        finally:
+            if own_session:
+                session.close()
+        with self._lock:
+            # Readers check _series without the lock, so it is set last
+            self._loaded_at = time.monotonic()
+            self._series = series
+            self._counters["loads"] += 1
+            self._counters["archive_loads"] += source == "archive"
+            self._last_load = {"source": source, "ms": round((time.perf_counter() - started) * 1000, 2)}
+        if source == "database" and self.archive_path:
+            self._write_archive(series, fingerprint)
+        return sum(len(s) for s in series.values())
+
+    def _load_archive(self, fingerprint) -> Optional[Dict[int, PriceSeries]]:
+        try:
+            series, manifest = price_history_archive.load_series(self.archive_path)
+        except price_history_archive.ArchiveError as e:
+            logger.warning(f"Price history archive not used: {e}")
+            return None
+        if manifest.get("fingerprint") != fingerprint:
+            logger.warning(f"Price history archive at {self.archive_path} is stale, reading asset_history")
+            return None
+        return series
+
+    def _write_archive(self, series: Dict[int, PriceSeries], fingerprint) -> bool:
+        try:
+            price_history_archive.write_archive(self.archive_path, series, fingerprint)
+        except OSError as e:
+            logger.warning(f"Failed to write price history archive to {self.archive_path}: {e}")
+            return False
+        with self._lock:
+            self._counters["archive_writes"] += 1
+        return True
+
+    def save_archive(self, session=None) -> bool:
+        """
+        Write the held series to `archive_path`, e.g. after a refresh.
+
+        The fingerprint is taken from the table as it is now, so call this
+        only while the store is in line with it. No-op without an archive path.
+
+        Returns:
+            bool: Whether an archive was written
+        """
+        if not self.archive_path:
+            return False
+        own_session = session is None
+        session = session or self.session_factory()
+        try:
+            fingerprint = price_history_archive.table_fingerprint(session)
+        finally:
+            if own_session:
+                session.close()
+        return self._write_archive(self._current(), fingerprint)
+
+    def refresh(self, since=None, asset_ids: Optional[Iterable[int]] = None, session=None) -> int:
+        """
+        Bring the store in line with asset_history without reloading all of it.
+
+        Rows dated on or after `since` are re-read and replace the held rows
+        from that date on, and rows the table no longer holds at the start of
+        each series (retention deletes) are trimmed. Without `since`, only rows
+        after each series' current last date are read, which covers appended
+        days but not rewritten ones.
+
+        Args:
+            since: Earliest date that may have been inserted or updated
+            asset_ids: Limit the refresh to these assets (default: all)
+            session: Optional session to read with
+
+        Returns:
+            int: Number of rows re-read from the database
+        """
+        with self._load_lock:
+            return self._refresh(since, asset_ids, session)
+
+    def _refresh(self, since=None, asset_ids: Optional[Iterable[int]] = None, session=None) -> int:
+        if self._series is None:
+            return self._load(session)
+
+        current = self._series
+        if since is None:
+            last_dates = [s.last_date for s in current.values() if len(s)]
+            since = min(last_dates).astype(date) if last_dates else None
+
+        own_session = session is None
+        session = session or self.session_factory()
+        try:
+            fetched = _fetch_rows(session, since=since, asset_ids=asset_ids)
+            first_dates = dict(session.execute(
+                select(AssetHistory.asset_id, func.min(AssetHistory.date)).group_by(AssetHistory.asset_id)
+            ).all())
+        finally:
+            if own_session:
+                session.close()
+
+        fresh = _build_series(*fetched)
+        targets = set(fresh) | set(current) if asset_ids is None else {int(a) for a in asset_ids}
+        merged = dict(current)
+        for asset_id in targets:
+            first = first_dates.get(asset_id)
+            if first is None:
+                merged.pop(asset_id, None)
+                continue
+            old = current.get(asset_id)
+            new = fresh.get(asset_id)
+            kept = old.slice(start=first) if old is not None else None
+            if kept is not None and since is not None:
+                cut = np.searchsorted(kept.dates, _to_day(since), side='left')
+                kept = PriceSeries(asset_id, kept.dates[:cut], kept.closes[:cut], kept.ids[:cut])
+            parts = [p for p in (kept, new) if p is not None and len(p)]
+            if not parts:
+                merged.pop(asset_id, None)
+                continue
+            merged[asset_id] = PriceSeries(
+                asset_id,
+                np.concatenate([p.dates for p in parts]),
+                np.concatenate([p.closes for p in parts]),
+                np.concatenate([p.ids for p in parts]),
+            )
+
+        with self._lock:
+            self._series = merged
+            self._loaded_at = time.monotonic()
+            self._counters["refreshes"] += 1
+            self._counters["refreshed_rows"] += len(fetched[0])
+        return len(fetched[0])
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._loaded_at >= self.max_age_seconds
+
+    def _current(self) -> Dict[int, PriceSeries]:
+        if self._series is None:
+            # Every first reader waits for the one load
+            with self._load_lock:
+                if self._series is None:
+                    self._load()
+        elif self._expired() and self._load_lock.acquire(blocking=False):
+            # Whoever refreshes, the other readers keep the current snapshot meanwhile
+            try:
+                if self._expired():
+                    self._refresh()
+            finally:
+                self._load_lock.release()
+        return self._series
+
+    def series(self, asset_id: int) -> Optional[PriceSeries]:
+        """Full price series of one asset, or None when it has no history."""
+        return self._current().get(int(asset_id))
+
+    def as_of(self, asset_id: int, day):
+        """Last (date, close_price) of an asset on or before `day`, or None."""
+        series = self.series(asset_id)
+        return series.as_of(day) if series is not None else None
+
+    def frame(self, asset_ids: Iterable[int], start=None, end=None) -> pd.DataFrame:
+        """
+        Price history of several assets as a DataFrame.
+
+        Args:
+            asset_ids: Assets to include; unknown ids are skipped
+            start: Optional first date to include
+            end: Optional last date to include
+
+        Returns:
+            pd.DataFrame: asset_hist_id, asset_id, date (datetime64) and
+                close_price, sorted by asset_id then date
+        """
+        current = self._current()
+        parts = [current[int(a)].slice(start, end) for a in dict.fromkeys(asset_ids) if int(a) in current]
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return pd.DataFrame({
+                'asset_hist_id': pd.Series(dtype='int64'),
+                'asset_id': pd.Series(dtype='int64'),
+                'date': pd.Series(dtype='datetime64[ns]'),
+                'close_price': pd.Series(dtype='float64'),
+            })
+        return pd.DataFrame({
+            'asset_hist_id': np.concatenate([p.ids for p in parts]),
+            'asset_id': np.repeat([p.asset_id for p in parts], [len(p) for p in parts]),
+            'date': np.concatenate([p.dates for p in parts]).astype('datetime64[ns]'),
+            'close_price': np.concatenate([p.closes for p in parts]),
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        series = self._series or {}
+        with self._lock:
+            return {
+                **self._counters,
+                "assets": len(series),
+                "rows": sum(len(s) for s in series.values()),
+                "age_seconds": None if self._loaded_at is None else round(time.monotonic() - self._loaded_at, 1),
+                "max_age_seconds": self.max_age_seconds,
+                "archive_path": self.archive_path,
+                "last_load": self._last_load,
+            }
+
+
+price_history_store = PriceHistoryStore(
+    max_age_seconds=float(os.getenv("PRICE_HISTORY_MAX_AGE_SECONDS", "3600")),
+    archive_path=os.getenv("PRICE_HISTORY_ARCHIVE") or None,
+)
+
+
+def _holdings_query(user_id: int):
+    return select(
+        UserPortfolio.asset_id,
+        AssetType.asset_class,
+        AssetType.asset_name,
+        AssetType.concentration,
+        AssetType.asset_manager,
+        AssetType.category,
+        AssetType.asset_ticker.label('ticker'),
+        UserPortfolio.asset_total_units,
+    ).join(
+        AssetType, UserPortfolio.asset_id == AssetType.asset_id
+    ).where(UserPortfolio.user_id == user_id)
+
+
+def _sector_weights_query(asset_ids: Iterable[int]):
+    return select(
+        AssetSector.asset_id,
+        AssetSector.sector_name.label('sector'),
+        AssetSector.sector_weightage,
+    ).where(AssetSector.asset_id.in_([int(a) for a in asset_ids]))
+
+
+def _holdings_history_frame(holdings) -> pd.DataFrame:
+    attributes = pd.DataFrame(holdings, columns=HOLDING_COLUMNS)
+    prices = price_history_store.frame(attributes['asset_id'].unique())
+    return prices.merge(attributes, on='asset_id', how='inner')
+
+
+def get_holdings_history(session, user_id: int) -> pd.DataFrame:
+    """
+    Daily price history of a user's holdings, one row per asset and date.
+
+    The price rows come from the price history store; only the holdings and
+    their asset attributes are queried. Sector weights are kept out of this
+    frame, see get_sector_weights and apply_sector_weights.
+
+    Args:
+        session: SQLAlchemy session
+        user_id: User whose holdings to include
+
+    Returns:
+        pd.DataFrame: asset_hist_id, date, close_price and HOLDING_COLUMNS
+    """
+    return _holdings_history_frame(session.execute(_holdings_query(user_id)).all())
+
+
+async def get_holdings_history_async(session, user_id: int) -> pd.DataFrame:
+    """get_holdings_history for an AsyncSession."""
+    return _holdings_history_frame((await session.execute(_holdings_query(user_id))).all())
+
+
+def get_sector_weights(session, asset_ids: Iterable[int]) -> pd.DataFrame:
+    """
+    Sector breakdown of the given assets.
+
+    Returns:
+        pd.DataFrame: asset_id, sector and sector_weightage (percent), one
+            row per asset and sector; assets without sectors have no rows
+    """
+    rows = session.execute(_sector_weights_query(asset_ids)).all()
+    return pd.DataFrame(rows, columns=['asset_id', 'sector', 'sector_weightage'])
+
+
+async def get_sector_weights_async(session, asset_ids: Iterable[int]) -> pd.DataFrame:
+    """get_sector_weights for an AsyncSession."""
+    rows = (await session.execute(_sector_weights_query(asset_ids))).all()
+    return pd.DataFrame(rows, columns=['asset_id', 'sector', 'sector_weightage'])
+
+
+def apply_sector_weights(history: pd.DataFrame, sector_weights: pd.DataFrame) -> pd.DataFrame:
+    """
+    Split each price row across the asset's sectors.
+
+    Only needed when a tool groups or filters by sector: the result has one
+    row per price row and sector, and assets without a sector breakdown keep
+    a single row with NaN sector and sector_weightage.
+
+    Args:
+        history: Frame from get_holdings_history
+        sector_weights: Frame from get_sector_weights
+
+    Returns:
+        pd.DataFrame: `history` with sector and sector_weightage columns
+    """
+    return history.merge(sector_weights, on='asset_id', how='left')
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+from src.pipeline import metrics, tracing
+
+_yf_sessions = threading.local()
+
+
+def yfinance_session():
+    """
+    Return the calling thread's browser-impersonating session for yfinance.
+
+    curl_cffi sessions are not safe to share between threads, so each worker
+    thread creates one on first use and reuses it afterwards.
+    """
+    from curl_cffi import requests
+
+    session = getattr(_yf_sessions, "session", None)
+    if session is None:
+        session = requests.Session(impersonate="chrome")
+        _yf_sessions.session = session
+    return session
+
+
+def fetch_ticker_info(symbol: str) -> Dict[str, Any]:
+    """Fetch `yf.Ticker(symbol).info` straight from the network."""
+    import yfinance as yf
+
+    return yf.Ticker(symbol, session=yfinance_session()).info
+
+
+def fetch_stored_quote(symbol: str) -> Dict[str, Any]:
+    """
+    Offline stand-in for fetch_ticker_info: an `info`-shaped payload holding
+    the latest stored close as `currentPrice`, empty for unknown symbols.
+    """
+    from src.database.database import ReadSessionLocal
+    from src.database.models import AssetLatestPrice, AssetType
+
+    with ReadSessionLocal() as session:
+        close = session.query(AssetLatestPrice.close_price).join(
+            AssetType, AssetType.asset_id == AssetLatestPrice.asset_id
+        ).filter(AssetType.asset_ticker == symbol).scalar()
+    return {} if close is None else {"currentPrice": float(close)}
+
+
+# QUOTE_SOURCE picks the loader; "database" keeps load tests and benchmarks offline
+QUOTE_LOADERS = {"yfinance": fetch_ticker_info, "database": fetch_stored_quote}
+
+
+class QuoteCache:
+    """
+    Process-wide TTL cache of upstream quote payloads keyed by symbol.
+
+    Entries expire after `ttl_seconds` and the least recently used entry is
+    evicted once `max_size` symbols are cached. Concurrent misses for the same
+    symbol are coalesced: the first caller runs `loader` and every other caller
+    waits for its result, so one symbol never has more than one fetch in flight.
+
+    Args:
+        loader: Callable fetching the payload for a symbol
+        ttl_seconds: How long a payload is served before it is fetched again
+        max_size: Maximum number of symbols kept in the cache
+    """
+
+    def __init__(self, loader: Callable[[str], Any], ttl_seconds: float = 15.0, max_size: int = 512):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries = OrderedDict()  # symbol -> (expires_at, value)
+        self._in_flight = {}  # symbol -> Future
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stale": 0, "coalesced": 0, "evictions": 0, "errors": 0}
+
+    def get(self, symbol: str) -> Any:
+        """
+        Return the cached payload for `symbol`, fetching it if absent or expired.
+
+        Raises:
+            Exception: Whatever `loader` raised; failures are never cached
+        """
+        key = symbol.upper()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    metrics.count_cache("quote", hit=True)
+                    return value
+                self._counters["stale"] += 1
+            else:
+                self._counters["misses"] += 1
+            metrics.count_cache("quote", hit=False)
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                leader = False
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                leader = True
+
+        if not leader:
+            with metrics.phase("upstream"), tracing.child_span("quote_fetch", "quote", symbol=key, coalesced=True):
+                return future.result()
+
+        try:
+            with metrics.phase("upstream"), tracing.child_span("quote_fetch", "quote", symbol=key):
+                value = self.loader(key)
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                self._counters["errors"] += 1
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+            self._in_flight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, symbol: str = None):
+        """Drop one symbol, or the whole cache when no symbol is given."""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol.upper(), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/stale counters together with the current cache size."""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"] + self._counters["stale"]
+            return {
+                **self._counters,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hit_ratio": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+quote_cache = QuoteCache(
+    loader=QUOTE_LOADERS[os.getenv("QUOTE_SOURCE", "yfinance")],
+    ttl_seconds=float(os.getenv("QUOTE_CACHE_TTL_SECONDS", "15")),
+    max_size=int(os.getenv("QUOTE_CACHE_MAX_SIZE", "512")),
+)
+
+
+def get_ticker_info(symbol: str) -> Dict[str, Any]:
+    """Return `yf.Ticker(symbol).info` through the shared quote cache."""
+    return quote_cache.get(symbol)
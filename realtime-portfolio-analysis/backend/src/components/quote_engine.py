@@ -0,0 +1,121 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.pipeline.logger import logger
+
+
+@dataclass
+class QuoteResult:
+    """
+    Outcome of a bulk quote request.
+
+    Attributes:
+        prices: Mapping of symbol to price for every symbol that could be priced
+        stale: Symbols priced from the database fallback instead of a live quote
+        missing: Symbols for which neither a live nor a fallback price was found
+        elapsed_ms: Wall-clock time spent serving the request
+    """
+    prices: Dict[str, float] = field(default_factory=dict)
+    stale: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+
+class QuoteEngine:
+    """
+    Fans live quote lookups out over a bounded thread pool.
+
+    Each symbol is fetched by `source` on a worker thread. Symbols whose live
+    quote fails, returns nothing or does not arrive within `timeout` seconds are
+    priced through `fallback` and reported as stale, so a slow upstream never
+    blocks the caller for longer than the timeout. Fetches of a timed-out
+    request that have not started are cancelled, so they do not hold the
+    shared pool up for the requests that follow.
+
+    Args:
+        source: Callable taking a symbol and returning a live price (or None)
+        fallback: Optional callable taking a symbol and returning (price, date)
+        max_workers: Upper bound on concurrent upstream requests
+        timeout: Seconds to wait for live quotes before falling back
+    """
+
+    def __init__(self,
+                 source: Callable[[str], Optional[float]],
+                 fallback: Optional[Callable[[str], Tuple[Optional[float], object]]] = None,
+                 max_workers: int = 8,
+                 timeout: float = 3.0):
+        self.source = source
+        self.fallback = fallback
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quote")
+
+    def _fetch_one(self, symbol: str, deadline: float) -> Optional[float]:
+        # The request already fell back for this symbol, do not spend a worker on it
+        if time.perf_counter() >= deadline:
+            return None
+        price = self.source(symbol)
+        return round(float(price), 2) if price else None
+
+    def fetch(self, symbols, timeout: Optional[float] = None) -> QuoteResult:
+        """
+        Fetch live prices for `symbols` concurrently.
+
+        Args:
+            symbols: Iterable of ticker symbols (duplicates are fetched once)
+            timeout: Overrides the engine timeout for this request
+
+        Returns:
+            QuoteResult: Prices for every symbol that could be priced, plus the
+            symbols that were served stale or could not be priced at all
+        """
+        started = time.perf_counter()
+        timeout = self.timeout if timeout is None else timeout
+        unique_symbols = list(dict.fromkeys(symbols))
+        deadline = started + timeout
+
+        # Each symbol runs in its own copy of the caller's context, so the tool's metrics timing and
+        # trace span see the fetch; one Context cannot be entered by two threads at once
+        futures = {
+            self._executor.submit(contextvars.copy_context().run, self._fetch_one, symbol, deadline): symbol
+            for symbol in unique_symbols
+        }
+        done, not_done = wait(futures, timeout=timeout)
+        # Drop the fetches still queued; the ones already running finish in the background
+        for future in not_done:
+            future.cancel()
+
+        result = QuoteResult()
+        needs_fallback = []
+        for future, symbol in futures.items():
+            if future not in done:
+                logger.warning(f"Live quote for {symbol} timed out after {timeout}s")
+                needs_fallback.append(symbol)
+                continue
+            try:
+                price = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching price for {symbol}: {e}")
+                price = None
+            if price:
+                result.prices[symbol] = price
+            else:
+                needs_fallback.append(symbol)
+
+        for symbol in needs_fallback:
+            db_price, price_date = self.fallback(symbol) if self.fallback else (None, None)
+            if db_price is not None:
+                result.prices[symbol] = db_price
+                result.stale.append(symbol)
+                logger.warning(f"Using stale database price for {symbol}: ${db_price} (from {price_date})")
+            else:
+                result.missing.append(symbol)
+
+        result.elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.exc import OperationalError
+
+from src.database.database import ReadSessionLocal
+from src.database.models import (
+    AssetClassRiskLevelMapping, AssetSector, AssetType, DataVersion, DefaultBenchmarks, RelativeBenchmark
+)
+
+CASH_TICKER = 'CASH'
+
+# Columns of asset_type kept per asset; portfolio_composition is never read from the catalog
+ASSET_COLUMNS = [
+    'asset_id', 'asset_ticker', 'asset_name', 'asset_class', 'net_expense_ratio', 'morningstar_rating',
+    'maturity_date', 'one_yr_volatility', 'similar_asset', 'category', 'asset_manager', 'bond_rating',
+    'concentration'
+]
+
+
+class _CatalogData:
+    """One immutable snapshot of the reference tables with their indexes."""
+
+    def __init__(self, session, version: int):
+        self.version = version
+
+        self.assets = {}  # asset_id -> dict of ASSET_COLUMNS
+        self.asset_ids_by_ticker = {}
+        for row in session.query(*[getattr(AssetType, c) for c in ASSET_COLUMNS]).order_by(AssetType.asset_id):
+            asset = dict(row._mapping)
+            self.assets[asset['asset_id']] = asset
+            self.asset_ids_by_ticker[asset['asset_ticker']] = asset['asset_id']
+        self.cash_asset_id = self.asset_ids_by_ticker.get(CASH_TICKER)
+
+        self.sectors = {}  # asset_id -> [(sector_name, sector_weightage), ...]
+        for asset_id, sector_name, weightage in session.query(
+            AssetSector.asset_id, AssetSector.sector_name, AssetSector.sector_weightage
+        ).order_by(AssetSector.asset_sec_id):
+            self.sectors.setdefault(asset_id, []).append((sector_name, weightage))
+
+        self.relative_benchmarks = dict(
+            session.query(RelativeBenchmark.asset_ticker, RelativeBenchmark.relative_benchmark).all()
+        )
+        self.default_benchmarks = {
+            asset_class: asset_id for asset_class, asset_id in session.query(
+                DefaultBenchmarks.benchmark_for_asset_class, DefaultBenchmarks.benchamark_asset_id
+            ).order_by(DefaultBenchmarks.benchmark_id)
+        }
+
+        # First mapping per (asset class, concentration), as the per-holding .first() lookups returned
+        self.risk_scores = {}
+        for asset_type, concentration, risk_score in session.query(
+            AssetClassRiskLevelMapping.asset_type,
+            AssetClassRiskLevelMapping.concentration,
+            AssetClassRiskLevelMapping.risk_score
+        ).order_by(AssetClassRiskLevelMapping.asset_risk_id):
+            self.risk_scores.setdefault((asset_type, concentration), risk_score)
+
+        # Filter value -> dimension; later dimensions win when a value appears in several
+        self.filter_levels = {}
+        assets = list(self.assets.values())
+        for value in dict.fromkeys(a['asset_class'] for a in assets):
+            self.filter_levels[value] = 'asset_class'
+        for value in dict.fromkeys(a['concentration'] for a in assets):
+            self.filter_levels[value] = 'concentration'
+        for value in dict.fromkeys(name for sectors in self.sectors.values() for name, _ in sectors):
+            self.filter_levels[value] = 'sector'
+        for value in dict.fromkeys(a['asset_name'] for a in assets):
+            self.filter_levels[value] = 'asset_name'
+        for value in dict.fromkeys(a['asset_ticker'] for a in assets):
+            self.filter_levels[value] = 'ticker'
+
+
+class ReferenceCatalog:
+    """
+    In-memory copy of the reference tables: asset_type, asset_sector,
+    relative_benchmarks, default_benchmarks and asset_class_risk_level_mapping.
+
+    These tables only change when create_data.py or the refresh scripts rewrite
+    them, and those bump the `reference_data` counter in data_version. The
+    catalog loads all five tables once, indexes them by asset id, ticker and
+    filter value, and reloads when it sees a new version. The version is read
+    at most once every `check_interval_seconds`, so a lookup is normally a
+    dictionary access.
+
+    Args:
+        session_factory: Callable returning a new SQLAlchemy session
+        check_interval_seconds: Minimum time between data_version reads
+    """
+
+    def __init__(self, session_factory=ReadSessionLocal, check_interval_seconds: float = 5.0):
+        self.session_factory = session_factory
+        self.check_interval_seconds = check_interval_seconds
+        self._data: Optional[_CatalogData] = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._counters = {"loads": 0, "version_checks": 0}
+
+    @staticmethod
+    def _read_version(session) -> int:
+        try:
+            return DataVersion.get(session, DataVersion.REFERENCE_DATA)
+        except OperationalError:
+            # Database not migrated yet: no data_version table, so nothing was bumped
+            session.rollback()
+            return 0
+
+    def load(self) -> int:
+        """
+        (Re)load the reference tables.
+
+        Returns:
+            int: Number of assets held
+        """
+        session = self.session_factory()
+        try:
+            version = self._read_version(session)
+            data = _CatalogData(session, version)
+        finally:
+            session.close()
+        with self._lock:
+            self._data = data
+            self._checked_at = time.monotonic()
+            self._counters["loads"] += 1
+        return len(data.assets)
+
+    def invalidate(self):
+        """Drop the loaded tables; the next lookup reloads them."""
+        with self._lock:
+            self._data = None
+
+    def _current(self) -> _CatalogData:
+        data = self._data
+        if data is None:
+            self.load()
+        elif time.monotonic() - self._checked_at >= self.check_interval_seconds:
+            session = self.session_factory()
+            try:
+                version = self._read_version(session)
+            finally:
+                session.close()
+            with self._lock:
+                self._checked_at = time.monotonic()
+                self._counters["version_checks"] += 1
+            if version != data.version:
+                self.load()
+        return self._data
+
+    @property
+    def version(self) -> int:
+        return self._current().version
+
+    @property
+    def cash_asset_id(self) -> Optional[int]:
+        """asset_id of the CASH asset, or None."""
+        return self._current().cash_asset_id
+
+    def asset(self, asset_id: int) -> Optional[Dict[str, Any]]:
+        """asset_type row of an asset as a dict, or None."""
+        asset = self._current().assets.get(asset_id)
+        return dict(asset) if asset is not None else None
+
+    def asset_id(self, ticker: str) -> Optional[int]:
+        """asset_id of a ticker, or None."""
+        return self._current().asset_ids_by_ticker.get(ticker)
+
+    def asset_ids(self, tickers) -> Dict[str, int]:
+        """Mapping of ticker to asset_id for the known tickers among `tickers`."""
+        index = self._current().asset_ids_by_ticker
+        return {ticker: index[ticker] for ticker in tickers if ticker in index}
+
+    def asset_name(self, asset_id: int) -> Optional[str]:
+        asset = self._current().assets.get(asset_id)
+        return asset['asset_name'] if asset is not None else None
+
+    def tickers(self) -> List[str]:
+        """Every asset ticker."""
+        return list(self._current().asset_ids_by_ticker)
+
+    def sectors(self, asset_id: int) -> List[tuple]:
+        """(sector_name, sector_weightage) pairs of an asset."""
+        return list(self._current().sectors.get(asset_id, []))
+
+    def relative_benchmark(self, ticker: str) -> Optional[str]:
+        """Ticker of the benchmark a holding is compared against, or None."""
+        return self._current().relative_benchmarks.get(ticker)
+
+    def default_benchmark(self, asset_class: str) -> Optional[int]:
+        """asset_id of the default benchmark of an asset class, or None."""
+        return self._current().default_benchmarks.get(asset_class)
+
+    def risk_score(self, asset_class: str, concentration: str) -> Optional[float]:
+        """Risk score mapped to an asset class and concentration, or None."""
+        return self._current().risk_scores.get((asset_class, concentration))
+
+    def filter_levels(self) -> Dict[Any, str]:
+        """Mapping of every filter value (asset class, concentration, sector, name, ticker) to its dimension."""
+        return dict(self._current().filter_levels)
+
+    def stats(self) -> Dict[str, Any]:
+        data = self._data
+        with self._lock:
+            return {
+                **self._counters,
+                "version": None if data is None else data.version,
+                "assets": 0 if data is None else len(data.assets),
+                "filter_values": 0 if data is None else len(data.filter_levels),
+                "seconds_since_check": None if self._checked_at is None else round(time.monotonic() - self._checked_at, 1),
+                "check_interval_seconds": self.check_interval_seconds,
+            }
+
+
+reference_catalog = ReferenceCatalog(
+    check_interval_seconds=float(os.getenv("REFERENCE_CATALOG_CHECK_SECONDS", "5")),
+)
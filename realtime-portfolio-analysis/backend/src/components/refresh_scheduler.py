@@ -0,0 +1,148 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from src.components.history_refresh import HistoryRefreshResult
+from src.components.portfolio_snapshot import portfolio_snapshots
+from src.components.price_history_store import price_history_store
+from src.pipeline.logger import logger
+import update_asset_history_table as uaht
+
+
+def _run_incremental_refresh() -> HistoryRefreshResult:
+    return uaht.refresh_asset_history(incremental=True)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class RefreshScheduler:
+    """
+    Runs the incremental asset history refresh inside the app.
+
+    A background task started with the app refreshes every `interval_seconds`
+    (after `initial_delay_seconds`); `run_now` triggers one on demand, e.g.
+    from /api/reset_db. Refreshes are single-flight: a trigger while one is
+    running waits for that run instead of starting a second one. The refresh
+    itself runs on a worker thread, off the event loop.
+
+    When a refresh wrote or deleted rows, the price history store re-reads the
+    changed dates, trims rows dropped by retention and swaps its series in one
+    assignment, then the portfolio snapshots are invalidated, so readers see
+    either the old or the new prices and no snapshot outlives the prices it
+    was built from. The store
+    also rewrites its on-disk archive, when it has one. The reference catalog
+    reloads itself through the data version the refresh bumps.
+
+    Args:
+        refresh: Blocking callable running one refresh
+        interval_seconds: Time between scheduled refreshes; 0 disables the schedule
+        initial_delay_seconds: Wait after start before the first scheduled refresh
+    """
+
+    def __init__(self, refresh: Callable[[], HistoryRefreshResult] = _run_incremental_refresh,
+                 interval_seconds: float = 21600.0, initial_delay_seconds: float = 60.0):
+        self.refresh = refresh
+        self.interval_seconds = interval_seconds
+        self.initial_delay_seconds = initial_delay_seconds
+        self._loop_task: Optional[asyncio.Task] = None
+        self._running: Optional[asyncio.Task] = None
+        self._next_run_at: Optional[datetime] = None
+        self._status: Dict[str, Any] = {
+            "runs": 0,
+            "failed_runs": 0,
+            "last_trigger": None,
+            "last_started_at": None,
+            "last_finished_at": None,
+            "last_duration_seconds": None,
+            "last_rows_written": None,
+            "last_rows_deleted": None,
+            "last_since": None,
+            "last_failures": {},
+            "last_error": None,
+        }
+
+    async def _run(self, trigger: str) -> Optional[HistoryRefreshResult]:
+        started = time.perf_counter()
+        # Clear the previous run's results, so a failed run does not report them next to its error
+        self._status.update(last_trigger=trigger, last_started_at=_now().isoformat(), last_error=None,
+                            last_rows_written=None, last_rows_deleted=None, last_since=None, last_failures={})
+        logger.info(f"Asset history refresh started ({trigger})")
+        try:
+            result = await asyncio.to_thread(self.refresh)
+            # Retention deletes alone also change the history the store holds
+            if result.rows_written or result.rows_deleted:
+                await asyncio.to_thread(price_history_store.refresh, result.since)
+                await asyncio.to_thread(price_history_store.save_archive)
+                portfolio_snapshots.invalidate()
+            self._status.update(
+                last_rows_written=result.rows_written,
+                last_rows_deleted=result.rows_deleted,
+                last_since=result.since.isoformat() if result.since else None,
+                last_failures={ticker: r.error for ticker, r in result.downloads.items() if r.error},
+            )
+            return result
+        except Exception as e:
+            self._status["failed_runs"] += 1
+            self._status["last_error"] = f"{type(e).__name__}: {e}"
+            logger.error(f"Asset history refresh failed: {e}")
+            return None
+        finally:
+            self._status["runs"] += 1
+            self._status["last_finished_at"] = _now().isoformat()
+            self._status["last_duration_seconds"] = round(time.perf_counter() - started, 2)
+            logger.info(f"Asset history refresh finished in {self._status['last_duration_seconds']}s")
+
+    async def run_now(self, trigger: str = "manual") -> Optional[HistoryRefreshResult]:
+        """Run a refresh, or wait for the one already running, and return its result (None if it failed)."""
+        if self._running is None or self._running.done():
+            self._running = asyncio.create_task(self._run(trigger))
+        return await asyncio.shield(self._running)
+
+    def trigger(self, trigger: str = "manual") -> asyncio.Task:
+        """Start run_now in the background and return its task."""
+        return asyncio.create_task(self.run_now(trigger))
+
+    async def _schedule(self):
+        delay = self.initial_delay_seconds
+        while True:
+            self._next_run_at = _now() + timedelta(seconds=delay)
+            await asyncio.sleep(delay)
+            await self.run_now("scheduled")
+            delay = self.interval_seconds
+
+    def start(self):
+        """Start the schedule on the running event loop; no-op when disabled or already started."""
+        if self.interval_seconds <= 0 or (self._loop_task is not None and not self._loop_task.done()):
+            return
+        self._loop_task = asyncio.create_task(self._schedule())
+        logger.info(f"Asset history refresh scheduled every {self.interval_seconds:g}s")
+
+    async def stop(self):
+        """Cancel the schedule; a refresh already running on its thread finishes on its own."""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        self._next_run_at = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            **self._status,
+            "running": self._running is not None and not self._running.done(),
+            "scheduled": self._loop_task is not None and not self._loop_task.done(),
+            "interval_seconds": self.interval_seconds,
+            "next_run_at": self._next_run_at.isoformat() if self._next_run_at else None,
+        }
+
+
+refresh_scheduler = RefreshScheduler(
+    interval_seconds=float(os.getenv("HISTORY_REFRESH_INTERVAL_SECONDS", "21600")),
+    initial_delay_seconds=float(os.getenv("HISTORY_REFRESH_INITIAL_DELAY_SECONDS", "60")),
+)
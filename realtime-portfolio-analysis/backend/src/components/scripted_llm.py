@@ -0,0 +1,185 @@
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi.websockets import WebSocketState
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    Frame,
+    InputAudioRawFrame,
+    OutputAudioRawFrame,
+    StartFrame,
+)
+from pipecat.processors.aggregators.llm_response import (
+    LLMAssistantAggregatorParams,
+    LLMAssistantContextAggregator,
+    LLMUserAggregatorParams,
+    LLMUserContextAggregator,
+)
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext, OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection
+from pipecat.services.llm_service import LLMService
+
+from src.pipeline.logger import logger
+
+# One scripted turn: call_context -> (tool name, arguments)
+ScriptStep = Callable[[Any], Tuple[str, Dict[str, Any]]]
+
+# A short call: authenticate, look at the portfolio, compare it, then trade
+DEFAULT_SCRIPT: List[ScriptStep] = [
+    lambda call: ("authenticate_user_tool", {"phonenumber": call.phone_number, "date_of_birth": ""}),
+    lambda call: ("user_holding_tool", {"user_id": str(call.user_id)}),
+    lambda call: ("aggregation_tool", {"user_id": str(call.user_id), "aggregation_metric": "total portfolio value",
+                                       "dimension_levels": ["Asset Class"], "visualization_types": "donut"}),
+    lambda call: ("portfolio_benchmark_tool", {"user_id": str(call.user_id), "time_history": 2,
+                                               "benchmark_against": ["SPX"], "interval": "quarterly"}),
+    lambda call: ("place_trade_tool", {"user_id": str(call.user_id), "symbol": "AAPL", "quantity": 1,
+                                       "order_type": "market", "action": "buy"}),
+]
+
+
+@dataclass
+class ScriptedContextAggregatorPair:
+    _user: LLMUserContextAggregator
+    _assistant: LLMAssistantContextAggregator
+
+    def user(self) -> LLMUserContextAggregator:
+        return self._user
+
+    def assistant(self) -> LLMAssistantContextAggregator:
+        return self._assistant
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p95": None, "max": None}
+    values = np.array(samples)
+    return {"p50": round(float(np.percentile(values, 50)), 2), "p95": round(float(np.percentile(values, 95)), 2),
+            "max": round(float(values.max()), 2)}
+
+
+class ScriptedLLMService(LLMService):
+    """
+    Offline stand-in for AzureRealtimeBetaLLMService, for voice-session load tests.
+
+    Instead of talking to a model it plays a fixed script: once the session's
+    context arrives it calls the script's tools one after another, through
+    the same registration and tool executor as a real call, pausing
+    `pause_seconds` before each as if the caller were speaking. Meanwhile it
+    streams silent bot audio in real time, so the output transport keeps
+    sending frames whose gaps the client can measure, and samples the event
+    loop lag every `lag_interval_seconds`.
+
+    Progress goes to the client as JSON messages of type "loadtest": one
+    "tool" event per call with its latency, and a final "done" event with
+    the session's event-loop lag percentiles. Enabled in websocket_endpoint
+    with VOICE_LLM_SERVICE=scripted.
+
+    Args:
+        script: Steps to play, see ScriptStep (default: DEFAULT_SCRIPT)
+        pause_seconds: Wait before each tool call
+        chunk_ms: Duration of each bot audio frame
+        sample_rate: Sample rate of the bot audio
+        lag_interval_seconds: Event loop lag sampling interval
+    """
+
+    def __init__(self, script: List[ScriptStep] = None, pause_seconds: float = 1.0, chunk_ms: int = 20,
+                 sample_rate: int = 16000, lag_interval_seconds: float = 0.02, **kwargs):
+        super().__init__(**kwargs)
+        self.script = script or DEFAULT_SCRIPT
+        self.pause_seconds = pause_seconds
+        self.chunk_ms = chunk_ms
+        self.sample_rate = sample_rate
+        self.lag_interval_seconds = lag_interval_seconds
+        self.call_context = None  # set by attach_call_context
+        self._context: Optional[OpenAILLMContext] = None
+        self._tasks: List[asyncio.Task] = []
+        self._lag_ms: List[float] = []
+
+    def create_context_aggregator(self, context: OpenAILLMContext, *,
+                                  user_params: LLMUserAggregatorParams = LLMUserAggregatorParams(),
+                                  assistant_params: LLMAssistantAggregatorParams = LLMAssistantAggregatorParams(),
+                                  ) -> ScriptedContextAggregatorPair:
+        return ScriptedContextAggregatorPair(
+            _user=LLMUserContextAggregator(context, params=user_params),
+            _assistant=LLMAssistantContextAggregator(context, params=assistant_params),
+        )
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame):
+            # The first context starts the script; later ones follow tool results
+            if self._context is None:
+                self._tasks = [self.create_task(self._run_script()), self.create_task(self._stream_audio()),
+                               self.create_task(self._sample_loop_lag())]
+            self._context = frame.context
+        elif isinstance(frame, InputAudioRawFrame):
+            pass  # the caller's audio only matters to the transport and its VAD
+        else:
+            await self.push_frame(frame, direction)
+
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        self._lag_ms = []
+
+    async def stop(self, frame: EndFrame):
+        await super().stop(frame)
+        await self._cancel_tasks()
+
+    async def cancel(self, frame: CancelFrame):
+        await super().cancel(frame)
+        await self._cancel_tasks()
+
+    async def _cancel_tasks(self):
+        for task in self._tasks:
+            await self.cancel_task(task)
+        self._tasks = []
+
+    async def _report(self, event: Dict[str, Any]):
+        websocket = getattr(self.call_context, "websocket", None)
+        if websocket is not None and websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.send_json({"type": "loadtest", **event})
+
+    async def _run_script(self):
+        tool_ms = []
+        for step in self.script:
+            await asyncio.sleep(self.pause_seconds)
+            name, arguments = step(self.call_context)
+            started = time.perf_counter()
+            error = None
+            try:
+                await self._run_function_call(self._context, str(uuid.uuid4()), name, arguments, run_llm=False)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                logger.error(f"Scripted call to {name} failed: {error}")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            tool_ms.append(elapsed_ms)
+            # Every later step needs the user id
+            unauthenticated = not getattr(self.call_context, "is_authenticated", False)
+            if unauthenticated:
+                error = error or "not authenticated"
+            await self._report({"event": "tool", "tool": name, "ms": round(elapsed_ms, 2), "error": error})
+            if unauthenticated:
+                break
+        await self._report({"event": "done", "tools": len(tool_ms), "tool_ms": _percentiles(tool_ms),
+                            "loop_lag_ms": _percentiles(self._lag_ms)})
+
+    async def _stream_audio(self):
+        silence = bytes(int(self.sample_rate * self.chunk_ms / 1000) * 2)
+        interval = self.chunk_ms / 1000
+        next_at = time.monotonic()
+        while True:
+            await self.push_frame(OutputAudioRawFrame(audio=silence, sample_rate=self.sample_rate, num_channels=1))
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+
+    async def _sample_loop_lag(self):
+        while True:
+            expected = time.perf_counter() + self.lag_interval_seconds
+            await asyncio.sleep(self.lag_interval_seconds)
+            self._lag_ms.append(max(0.0, (time.perf_counter() - expected) * 1000))
@@ -0,0 +1,177 @@
+import asyncio
+import contextvars
+import dataclasses
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict
+
+from src.pipeline import metrics, tracing
+from src.pipeline.logger import logger
+
+_worker_state = threading.local()
+
+
+async def run_on_event_loop(coro: Awaitable) -> Any:
+    """
+    Await `coro` on the server event loop.
+
+    Inside an offloaded tool handler the running loop is a private one owned by
+    the worker thread, while websockets and pipecat frames belong to the server
+    loop. Coroutines touching them are handed back to the server loop and the
+    worker waits for their result. On the server loop itself this is a plain await.
+    """
+    loop = getattr(_worker_state, "event_loop", None)
+    if loop is None:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def loop_bound(func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """Decorator making a coroutine function always execute on the server event loop."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_on_event_loop(func(*args, **kwargs))
+
+    return wrapper
+
+
+class ToolExecutor:
+    """
+    Runs voice tool handlers on a bounded thread pool, off the server event loop.
+
+    The tool handlers are coroutines, but almost all of their work is blocking:
+    SQLAlchemy queries, pandas aggregations and yfinance HTTP calls. Running them
+    on the event loop stalls the audio pipelines of every other session served
+    by the same worker. An offloaded handler is executed with `asyncio.run` on a
+    worker thread, and its `result_callback` is marshalled back to the server loop
+    so pipecat frames are still pushed from the loop that owns them.
+
+    At most `max_workers` handlers run at once; further calls wait in the pool
+    queue and are counted in the queue-depth metrics returned by `stats()`.
+
+    Args:
+        max_workers: Upper bound on concurrently running tool handlers
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "max_queue_depth": 0}
+        self._wait_ms = 0.0
+        self._run_ms = 0.0
+        self._per_tool = {}  # tool name -> {"calls", "failed", "total_ms"}
+
+    def _run_handler(self, name: str, handler: Callable, params, loop, submitted_at: float):
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._wait_ms += (started - submitted_at) * 1000
+        metrics.observe_queue_wait(name, started - submitted_at)
+        _worker_state.event_loop = loop
+        failed = False
+        try:
+            return asyncio.run(handler(params))
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            _worker_state.event_loop = None
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._running -= 1
+                self._run_ms += elapsed_ms
+                self._counters["failed" if failed else "completed"] += 1
+                tool = self._per_tool.setdefault(name, {"calls": 0, "failed": 0, "total_ms": 0.0})
+                tool["calls"] += 1
+                tool["failed"] += int(failed)
+                tool["total_ms"] += elapsed_ms
+
+    def _release_cancelled(self, future):
+        # A job cancelled while still queued (shutdown, or its caller went away) never reaches _run_handler
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+                self._counters["cancelled"] += 1
+
+    def offload(self, handler: Callable, name: str = None) -> Callable:
+        """
+        Wrap a `FunctionCallParams` tool handler so it runs on the thread pool.
+
+        Args:
+            handler: Coroutine function taking a single `FunctionCallParams`
+            name: Tool name used in the metrics (defaults to the handler name)
+
+        Returns:
+            Callable: Coroutine function suitable for `llm.register_function`
+        """
+        name = name or handler.__name__
+
+        @functools.wraps(handler)
+        async def wrapper(params):
+            loop = asyncio.get_running_loop()
+            result_callback = params.result_callback
+
+            async def threadsafe_result_callback(result, **kwargs):
+                await run_on_event_loop(result_callback(result, **kwargs))
+
+            worker_params = dataclasses.replace(params, result_callback=threadsafe_result_callback)
+            with self._lock:
+                self._queued += 1
+                self._counters["submitted"] += 1
+                self._counters["max_queue_depth"] = max(self._counters["max_queue_depth"], self._queued)
+            # Run in a copy of the caller's context, so the worker keeps the call's trace span and log context
+            context = contextvars.copy_context()
+            future = self._executor.submit(
+                context.run, self._run_handler, name, handler, worker_params, loop, time.perf_counter()
+            )
+            future.add_done_callback(self._release_cancelled)
+            # A cancelled call (e.g. client disconnect) stops waiting; the worker finishes on its own
+            return await asyncio.wrap_future(future)
+
+        return wrapper
+
+    def register(self, llm, name: str, handler: Callable, offload: bool = True):
+        """
+        Register a tool handler on a pipecat LLM service.
+
+        Args:
+            llm: Pipecat LLM service
+            name: Tool name as declared in the tool schema
+            handler: Coroutine function taking a single `FunctionCallParams`
+            offload: Run the handler on the thread pool; keep False for handlers
+                that are natively async and do not block the loop
+        """
+        handler = tracing.trace_tool(name, metrics.instrument_tool(name, handler))
+        llm.register_function(name, self.offload(handler, name) if offload else handler)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, concurrency and latency counters for the tool pool."""
+        with self._lock:
+            finished = self._counters["completed"] + self._counters["failed"]
+            return {
+                **self._counters,
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "avg_wait_ms": round(self._wait_ms / finished, 2) if finished else 0.0,
+                "avg_run_ms": round(self._run_ms / finished, 2) if finished else 0.0,
+                "tools": {
+                    name: {**tool, "total_ms": round(tool["total_ms"], 2)}
+                    for name, tool in self._per_tool.items()
+                },
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Tool executor shut down")
+
+
+tool_executor = ToolExecutor(max_workers=int(os.getenv("TOOL_EXECUTOR_MAX_WORKERS", "8")))
@@ -1,9 +1,9 @@
-from typing import List
+import threading
+import time
+from typing import Any, Dict, List
 from pipecat.adapters.schemas.function_schema import FunctionSchema
-from sqlalchemy import distinct
-from src.database.models import *
-from src.database.database import SessionLocal
-from contextlib import closing
+from pipecat.adapters.schemas.tools_schema import ToolsSchema
+from src.components.reference_catalog import reference_catalog
 
 class PortfolioToolSchemas:
     @staticmethod
@@ -18,34 +18,11 @@ class PortfolioToolSchemas:
 
     @staticmethod
     def get_filter_values() -> List[str]:
-        with closing(SessionLocal()) as db:
-            queries = [
-                db.query(distinct(AssetType.asset_class)),
-                db.query(distinct(AssetType.concentration)),
-                db.query(distinct(AssetSector.sector_name)),
-                db.query(distinct(AssetType.asset_name)),
-                db.query(distinct(AssetType.asset_ticker))
-            ]
-            
-            results = [query.all() for query in queries]
-
-        return [
-            item[0] for sublist in results
-            for item in sublist
-            if item[0] is not None
-        ]
+        return [value for value in reference_catalog.filter_levels() if value is not None]
 
     @staticmethod
     def get_dynamic_ticker_values() -> List[str]:
-        # This should be replaced with a database call in a real implementation
-        #get it from the database
-        db = SessionLocal()
-        try:
-            # Get the unique list of tickers from database
-            tickers = db.query(distinct(AssetType.asset_ticker)).filter(AssetType.asset_ticker.isnot(None)).all()
-            return [ticker[0] for ticker in tickers]
-        finally:
-            db.close()
+        return reference_catalog.tickers()
 
     @classmethod
     def authenticate_user_tool(cls):
@@ -571,4 +548,80 @@ class PortfolioToolSchemas:
                 },
             },
             required=["user_id", "ticker_value", "time_history"]
-        )
\ No newline at end of file
+        )
+
+# Schemas offered on every voice call, in the order the model sees them
+VOICE_TOOL_SCHEMAS = [
+    "authenticate_user_tool", "user_holding_tool", "aggregation_tool", "portfolio_benchmark_tool",
+    "relative_performance_tool", "risk_score_tool", "attribution_returns_tool", "news_tool",
+    "fund_fact_sheet_download_tool", "fund_fact_sheet_query_tool", "place_trade_tool", "update_trade_tool",
+    "confirm_trade_tool", "check_order_status_tool", "cancel_order_tool", "update_cash_balance_tool",
+    "get_bank_accounts_tool", "transfer_from_bank_tool", "dismiss_fund_transfer_tool", "get_price_trend_tool",
+]
+
+
+class ToolSchemaRegistry:
+    """
+    Voice tool schemas and their enum values, built once per reference data version.
+
+    The filter and ticker enums come from the reference catalog, so the whole
+    ToolsSchema only changes when the catalog loads a new data version. Every
+    websocket connection gets the same ToolsSchema instance; treat it as
+    read-only. The enums are kept as tuples and a frozenset of tickers for
+    argument validation in the handlers.
+    """
+
+    def __init__(self, catalog=reference_catalog):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._built = None  # (version, ToolsSchema, filter_values, tickers)
+        self._counters = {"builds": 0, "last_build_ms": None}
+
+    def _build(self, version):
+        started = time.perf_counter()
+        tools = ToolsSchema(standard_tools=[getattr(PortfolioToolSchemas, name)() for name in VOICE_TOOL_SCHEMAS])
+        built = (
+            version,
+            tools,
+            tuple(PortfolioToolSchemas.get_filter_values()),
+            frozenset(PortfolioToolSchemas.get_dynamic_ticker_values()),
+        )
+        self._counters["builds"] += 1
+        self._counters["last_build_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return built
+
+    def _current(self):
+        version = self.catalog.version
+        built = self._built
+        if built is None or built[0] != version:
+            with self._lock:
+                built = self._built
+                if built is None or built[0] != version:
+                    built = self._built = self._build(version)
+        return built
+
+    def tools_schema(self) -> ToolsSchema:
+        """ToolsSchema with every voice tool, shared by all connections."""
+        return self._current()[1]
+
+    def filter_values(self) -> tuple:
+        """Values accepted by the filter_values arguments."""
+        return self._current()[2]
+
+    def tickers(self) -> frozenset:
+        """Tickers accepted by the ticker arguments."""
+        return self._current()[3]
+
+    def stats(self) -> Dict[str, Any]:
+        built = self._built
+        with self._lock:
+            return {
+                **self._counters,
+                "version": None if built is None else built[0],
+                "tools": len(VOICE_TOOL_SCHEMAS),
+                "filter_values": 0 if built is None else len(built[2]),
+                "tickers": 0 if built is None else len(built[3]),
+            }
+
+
+tool_schema_registry = ToolSchemaRegistry()
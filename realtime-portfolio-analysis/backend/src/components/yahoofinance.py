@@ -1,9 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
-import yfinance as yf
 from dataclasses import dataclass
-from curl_cffi import requests
+from src.components.quote_cache import get_ticker_info, quote_cache
 from src.pipeline.exception import CustomException
 from src.pipeline.logger import logger
 import sys
@@ -32,10 +31,7 @@ def get_yahoo_finance_info(symbol: str) -> YahooFinanceInfo:
         # ticker = yf.Ticker(symbol)
         # info = ticker.info
 
-        session = requests.Session(impersonate="chrome")
-        ticker = yf.Ticker(symbol,session=session)
-
-        info = ticker.info
+        info = get_ticker_info(symbol)
 
         # Extract relevant information
         yahoo_finance_info = YahooFinanceInfo(
@@ -75,4 +71,9 @@ def get_yahoo_finance_info(symbol: str) -> YahooFinanceInfo:
 
     except Exception as e:
         logger.error(f"Error retrieving Yahoo Finance info for symbol {symbol}: {str(e)}")
-        raise CustomException(error_message=f"Failed to retrieve Yahoo Finance info for symbol {symbol}", error_details=sys.exc_info())
\ No newline at end of file
+        raise CustomException(error_message=f"Failed to retrieve Yahoo Finance info for symbol {symbol}", error_details=sys.exc_info())
+
+@router.get("/api/quote_cache/stats")
+def get_quote_cache_stats() -> Dict[str, Any]:
+    """Hit/miss/stale counters of the process-wide quote cache."""
+    return quote_cache.stats()
@@ -0,0 +1,70 @@
+# async_database.py
+"""
+Async engines and sessions (SQLAlchemy AsyncSession over aiosqlite) for the
+pipecat tool handlers, so they can await their queries instead of blocking
+the event loop. The sync engines in database.py stay in use for the REST
+endpoints, the refresh scripts and database writes.
+"""
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.database.database import DATABASE_URL, install_sqlite_pragmas, sqlite_settings
+from src.pipeline import metrics, tracing
+
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+
+def create_async_sqlite_engine(url: str = ASYNC_DATABASE_URL, read_only: bool = False, **overrides):
+    """
+    Create an aiosqlite engine with the same connection pragmas as create_sqlite_engine.
+
+    Up to `pool_size` connections are kept open and shared by every event
+    loop. Offloaded tool handlers each run on their own short-lived loop (see
+    tool_executor), and an aiosqlite connection is not tied to a loop: it
+    answers each call on the loop that awaits it. Without the pool every
+    session would open a connection, start its aiosqlite thread and run the
+    pragmas again. Overflow is unbounded, because a checkout that had to wait
+    for a connection would bind the pool's queue to the waiting loop. The
+    number of concurrent sessions is bounded by the tool executor instead.
+
+    SQLAlchemy guards the first connection of an engine with an asyncio
+    lock, which hangs when two loops make that connection at once. Open it
+    once with connect_async_engines before tool calls run, and close the
+    pooled connections and their aiosqlite threads with dispose_async_engines
+    at shutdown.
+
+    Args:
+        url: SQLAlchemy aiosqlite URL
+        read_only: Open every connection with `PRAGMA query_only`
+        **overrides: Any of the sqlite_settings arguments
+
+    Returns:
+        AsyncEngine: The configured async engine
+    """
+    settings = sqlite_settings(**overrides)
+    engine = create_async_engine(url, echo=settings["echo"], poolclass=AsyncAdaptedQueuePool,
+                                 pool_size=settings["pool_size"], max_overflow=-1)
+    install_sqlite_pragmas(engine.sync_engine, settings, read_only=read_only)
+    metrics.install_query_timing(engine.sync_engine)
+    tracing.install_query_tracing(engine.sync_engine)
+    return engine
+
+
+async_engine = create_async_sqlite_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+async_read_engine = create_async_sqlite_engine(read_only=True)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, expire_on_commit=False, autoflush=False)
+
+
+async def connect_async_engines():
+    """Make the first connection of each async engine, before concurrent use (see create_async_sqlite_engine)."""
+    for engine in (async_engine, async_read_engine):
+        async with engine.connect():
+            pass
+
+
+async def dispose_async_engines():
+    """Close the pooled connections of each async engine and their aiosqlite threads."""
+    for engine in (async_engine, async_read_engine):
+        await engine.dispose()
@@ -0,0 +1,91 @@
+# async_queries.py
+"""
+Awaitable versions of the hot read queries issued by the voice tool handlers.
+
+Every function takes an AsyncSession from async_database, e.g.
+
+    async with AsyncReadSessionLocal() as db:
+        phonenumber = await get_phone_number(db, user_id)
+"""
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import AssetType, OrderBook, User, UserBankAccount, UserPortfolio
+
+ORDER_STATUS_ORDER = {
+    'Under Review': 1,
+    'Placed': 2,
+    'Cancelled': 3
+}
+
+
+async def get_phone_number(session: AsyncSession, user_id: int):
+    """Phone number of a user, which keys the user's websocket, or None."""
+    return await session.scalar(select(User.phone_number).where(User.user_id == user_id))
+
+
+async def get_user_by_phone(session: AsyncSession, phone_number: str):
+    """User with the given phone number, or None."""
+    return await session.scalar(select(User).where(User.phone_number == phone_number).limit(1))
+
+
+async def get_cash_asset_id(session: AsyncSession):
+    """asset_id of the CASH asset, or None."""
+    return await session.scalar(select(AssetType.asset_id).where(AssetType.asset_ticker == 'CASH'))
+
+
+async def get_available_cash_balance(session: AsyncSession, user_id: int, cash_asset_id: int = None) -> float:
+    """
+    Available cash of a user: CASH holding minus "Under Review" buy orders.
+
+    Same formula as helper_functions.calculate_available_cash_balance.
+
+    Args:
+        session: AsyncSession
+        user_id: The user's ID
+        cash_asset_id: asset_id of CASH when already known, e.g. from the call context
+
+    Raises:
+        Exception: If the cash asset is not found
+    """
+    cash_asset_id = cash_asset_id or await get_cash_asset_id(session)
+    if not cash_asset_id:
+        raise Exception("Cash asset not found in database")
+
+    cash_balance = await session.scalar(
+        select(UserPortfolio.investment_amount)
+        .where(UserPortfolio.user_id == user_id, UserPortfolio.asset_id == cash_asset_id)
+    ) or 0.0
+    total_pending_buy_value = await session.scalar(
+        select(func.sum(OrderBook.amount))
+        .where(OrderBook.user_id == user_id, OrderBook.buy_sell == 'Buy', OrderBook.order_status == 'Under Review')
+    ) or 0.0
+    return round(cash_balance - total_pending_buy_value, 2)
+
+
+async def get_order_book(session: AsyncSession, user_id: int):
+    """A user's orders, under review first, then placed, then cancelled."""
+    result = await session.scalars(
+        select(OrderBook)
+        .where(OrderBook.user_id == user_id)
+        .order_by(case(ORDER_STATUS_ORDER, value=OrderBook.order_status, else_=4))
+    )
+    return result.all()
+
+
+async def get_order(session: AsyncSession, user_id: int, order_id: int = None):
+    """A user's order by id, or their most recent order when no id is given."""
+    query = select(OrderBook).where(OrderBook.user_id == user_id)
+    if order_id:
+        query = query.where(OrderBook.order_id == order_id)
+    else:
+        query = query.order_by(OrderBook.order_date.desc())
+    return await session.scalar(query.limit(1))
+
+
+async def get_active_bank_accounts(session: AsyncSession, user_id: int):
+    """A user's active linked bank accounts."""
+    result = await session.scalars(
+        select(UserBankAccount).where(UserBankAccount.user_id == user_id, UserBankAccount.is_active == 1)
+    )
+    return result.all()
@@ -0,0 +1,73 @@
+# bulk_upsert.py
+"""
+Set-based writes for the asset history refresh scripts.
+
+A price download is written with one `INSERT ... ON CONFLICT(asset_id, date)
+DO UPDATE` statement executed over all of its rows (executemany), committed
+in chunks, instead of a SELECT and an ORM add per row. The conflict target is
+the unique index uq_asset_history_asset_id_date, which apply_migrations
+creates on existing databases once they hold no duplicate (asset_id, date)
+rows (see the --dedupe flag of src.database.migrations).
+"""
+from typing import Dict, List
+
+import pandas as pd
+from sqlalchemy.dialects.sqlite import insert
+
+from src.database.models import AssetHistory
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def close_price_rows(asset_id: int, data: pd.DataFrame) -> List[Dict]:
+    """
+    Convert a yfinance download into asset_history rows.
+
+    Args:
+        asset_id: Asset the prices belong to
+        data: Frame indexed by date with a 'Close' column; the ('Close', ticker)
+            columns of a multi-ticker yfinance download are accepted too
+
+    Returns:
+        list: {"asset_id", "date", "close_price"} dicts, skipping zero and missing closes
+    """
+    close = data['Close']
+    if isinstance(close, pd.DataFrame):
+        close = close.iloc[:, 0]
+    close = pd.to_numeric(close, errors='coerce')
+    close = close[close.notna() & (close != 0)]
+    dates = pd.to_datetime(close.index).date
+    return [
+        {"asset_id": int(asset_id), "date": day, "close_price": float(price)}
+        for day, price in zip(dates, close.to_numpy())
+    ]
+
+
+def upsert_asset_history(session, rows: List[Dict], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Insert asset_history rows, replacing the close price of existing (asset_id, date) rows.
+
+    Each chunk of `chunk_size` rows is written with one executemany and committed.
+
+    Args:
+        session: SQLAlchemy session
+        rows: Rows as produced by close_price_rows
+        chunk_size: Rows per transaction
+
+    Returns:
+        int: Number of rows written
+    """
+    statement = insert(AssetHistory)
+    statement = statement.on_conflict_do_update(
+        index_elements=[AssetHistory.asset_id, AssetHistory.date],
+        set_={"close_price": statement.excluded.close_price},
+    )
+    for start in range(0, len(rows), chunk_size):
+        session.execute(statement, rows[start:start + chunk_size])
+        session.commit()
+    return len(rows)
+
+
+def upsert_close_prices(session, asset_id: int, data: pd.DataFrame, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Write one ticker's yfinance download to asset_history; returns the rows written."""
+    return upsert_asset_history(session, close_price_rows(asset_id, data), chunk_size=chunk_size)
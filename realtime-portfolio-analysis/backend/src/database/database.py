@@ -1,11 +1,105 @@
 # database.py
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-DATABASE_URL = "sqlite:///src/database/voicebot.sqlite3"
+from src.pipeline import metrics, tracing
+
+# Override to run against another database, e.g. one from generate_synthetic_db.py
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///src/database/voicebot.sqlite3")
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+def sqlite_settings(echo: bool = None, journal_mode: str = None, synchronous: str = None, cache_size_kib: int = None,
+                    mmap_size: int = None, busy_timeout_ms: int = None, pool_size: int = None,
+                    max_overflow: int = None) -> dict:
+    """
+    Resolve the SQLite engine settings, reading every one left as None from
+    the environment:
+
+        DB_ECHO                 log every SQL statement (default false)
+        SQLITE_JOURNAL_MODE     journal mode, WAL lets readers run alongside the writer (default WAL)
+        SQLITE_SYNCHRONOUS      fsync level; NORMAL is durable with WAL (default NORMAL)
+        SQLITE_CACHE_SIZE_KIB   page cache per connection in KiB (default 65536)
+        SQLITE_MMAP_SIZE        bytes of the file to memory-map, 0 disables (default 268435456)
+        SQLITE_BUSY_TIMEOUT_MS  wait on a locked database before failing (default 5000)
+        DB_POOL_SIZE            pooled connections kept open (default 10)
+        DB_MAX_OVERFLOW         extra connections allowed under load (default 20)
+    """
+    return {
+        "echo": _env_flag("DB_ECHO", "false") if echo is None else echo,
+        "journal_mode": journal_mode or os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": synchronous or os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "cache_size_kib": int(os.getenv("SQLITE_CACHE_SIZE_KIB", "65536")) if cache_size_kib is None else cache_size_kib,
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", "268435456")) if mmap_size is None else mmap_size,
+        "busy_timeout_ms": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")) if busy_timeout_ms is None else busy_timeout_ms,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")) if pool_size is None else pool_size,
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")) if max_overflow is None else max_overflow,
+    }
+
 
-engine = create_engine(DATABASE_URL, echo=True)
+def install_sqlite_pragmas(engine, settings: dict, read_only: bool = False):
+    """
+    Apply the connection pragmas from `settings` to every new connection of a
+    (sync) engine; pass `async_engine.sync_engine` for an async engine.
+    """
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # journal_mode is stored in the database file; only a writer may change it
+            if not read_only:
+                cursor.execute(f"PRAGMA journal_mode={settings['journal_mode']}")
+            cursor.execute(f"PRAGMA synchronous={settings['synchronous']}")
+            cursor.execute(f"PRAGMA cache_size=-{int(settings['cache_size_kib'])}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings['mmap_size'])}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings['busy_timeout_ms'])}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+
+def create_sqlite_engine(url: str = DATABASE_URL, read_only: bool = False, **overrides):
+    """
+    Create a SQLite engine with the connection pragmas and pool tuned for a
+    multi-threaded server.
+
+    Args:
+        url: SQLAlchemy SQLite URL
+        read_only: Open every connection with `PRAGMA query_only`, for analytics readers
+        **overrides: Any of the sqlite_settings arguments, e.g. echo=True,
+            journal_mode='DELETE' or pool_size=2; the rest come from the environment
+
+    Returns:
+        Engine: The configured SQLAlchemy engine
+    """
+    settings = sqlite_settings(**overrides)
+    engine = create_engine(
+        url,
+        echo=settings["echo"],
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        connect_args={"check_same_thread": False},
+    )
+    install_sqlite_pragmas(engine, settings, read_only=read_only)
+    metrics.install_query_timing(engine)
+    tracing.install_query_tracing(engine)
+    return engine
+
+
+engine = create_sqlite_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+# Read-only pool for the analytics tools, so long reports do not hold writer
+# connections. Set DB_READ_POOL_SIZE=0 to share the main pool instead.
+_read_pool_size = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+read_engine = create_sqlite_engine(read_only=True, pool_size=_read_pool_size) if _read_pool_size > 0 else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+Base = declarative_base()
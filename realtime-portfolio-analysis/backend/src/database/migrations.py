@@ -0,0 +1,140 @@
+"""
+Bring existing voicebot*.sqlite3 databases up to the current schema.
+
+The databases shipped with the project predate some tables and indexes
+declared in models.py. `apply_migrations` adds whatever is missing without
+touching existing data, and is safe to run repeatedly; the app runs it at
+startup.
+
+The unique index on asset_history (asset_id, date) cannot be created while
+the table holds duplicate rows. `apply_migrations` then leaves it out and
+logs the number of duplicates. Deleting them is an explicit step, which
+keeps the most recently inserted row of each (asset_id, date):
+
+    python -m src.database.migrations --dedupe [path/to/voicebot.sqlite3 ...]
+
+Usage:
+    python -m src.database.migrations [path/to/voicebot.sqlite3 ...]
+"""
+import argparse
+
+from sqlalchemy import inspect, text
+
+from src.database.database import Base, DATABASE_URL, create_sqlite_engine
+from src.database.models import AssetHistory, AssetHistoryWatermark, AssetLatestPrice, DataVersion
+from src.pipeline.logger import logger
+
+UNIQUE_HISTORY_INDEX = 'uq_asset_history_asset_id_date'
+
+# Replaced by the unique uq_asset_history_asset_id_date on the same columns
+LEGACY_INDEXES = {AssetHistory.__tablename__: ['ix_asset_history_asset_id_date']}
+
+
+def count_asset_history_duplicates(engine) -> int:
+    """
+    Count the asset_history rows that share an (asset_id, date) with a more
+    recently inserted row, i.e. the rows dedupe_asset_history would delete.
+    """
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT count(*) - (SELECT count(*) FROM (SELECT 1 FROM asset_history GROUP BY asset_id, date)) "
+            "FROM asset_history"
+        )).scalar()
+
+
+def dedupe_asset_history(engine) -> int:
+    """
+    Delete duplicate (asset_id, date) rows from asset_history, keeping the
+    most recently inserted one, so the unique index can be created. Only run
+    on request (the --dedupe flag), never by apply_migrations.
+
+    Returns:
+        int: Number of rows deleted
+    """
+    with engine.begin() as conn:
+        return conn.execute(text(
+            "DELETE FROM asset_history WHERE asset_hist_id NOT IN "
+            "(SELECT max(asset_hist_id) FROM asset_history GROUP BY asset_id, date)"
+        )).rowcount
+
+
+def apply_migrations(engine):
+    """
+    Create the asset_latest_price, data_version and asset_history_watermark
+    tables and any index declared on the models that the database is
+    missing, and drop the indexes superseded by them. Existing rows are
+    never changed: while asset_history holds duplicate (asset_id, date)
+    rows its unique index is skipped, with a warning, and the non-unique
+    index it supersedes is kept (or created) in its place.
+
+    Args:
+        engine: SQLAlchemy engine bound to the database to migrate
+
+    Returns:
+        list: Tables and indexes created, and indexes dropped or skipped
+    """
+    applied = []
+
+    if not inspect(engine).has_table(AssetLatestPrice.__tablename__):
+        applied.append(AssetLatestPrice.__tablename__)
+    AssetLatestPrice.ensure_table(engine)
+
+    for model in (DataVersion, AssetHistoryWatermark):
+        if not inspect(engine).has_table(model.__tablename__):
+            model.__table__.create(bind=engine)
+            applied.append(model.__tablename__)
+
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    skipped = set()
+    if AssetHistory.__tablename__ in existing_tables:
+        history_indexes = {index["name"] for index in inspector.get_indexes(AssetHistory.__tablename__)}
+        if UNIQUE_HISTORY_INDEX not in history_indexes:
+            duplicates = count_asset_history_duplicates(engine)
+            if duplicates:
+                logger.warning(f"asset_history has {duplicates} duplicate (asset_id, date) rows; not creating "
+                               f"{UNIQUE_HISTORY_INDEX} until they are removed with "
+                               f"python -m src.database.migrations --dedupe")
+                skipped.add(UNIQUE_HISTORY_INDEX)
+                applied.append(f"skipped {UNIQUE_HISTORY_INDEX} ({duplicates} duplicate rows)")
+                # Keep history lookups indexed until then
+                legacy = LEGACY_INDEXES[AssetHistory.__tablename__][0]
+                if legacy not in history_indexes:
+                    with engine.begin() as conn:
+                        conn.execute(text(f"CREATE INDEX {legacy} ON asset_history (asset_id, date)"))
+                    applied.append(legacy)
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            # Older databases may lack columns added since; leave their indexes alone
+            if index.name in skipped:
+                continue
+            if index.name not in existing_indexes and {c.name for c in index.columns} <= existing_columns:
+                index.create(bind=engine)
+                applied.append(index.name)
+        for legacy in LEGACY_INDEXES.get(table.name, []):
+            if legacy in existing_indexes and UNIQUE_HISTORY_INDEX not in skipped:
+                with engine.begin() as conn:
+                    conn.execute(text(f"DROP INDEX {legacy}"))
+                applied.append(f"dropped {legacy}")
+    return applied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply schema migrations to SQLite databases")
+    parser.add_argument("databases", nargs="*", help="SQLite files to migrate (defaults to the app database)")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Delete duplicate asset_history rows first, so its unique index can be created")
+    args = parser.parse_args()
+
+    urls = [f"sqlite:///{path}" for path in args.databases] or [DATABASE_URL]
+    for url in urls:
+        engine = create_sqlite_engine(url, pool_size=1)
+        if args.dedupe:
+            print(f"{url}: removed {dedupe_asset_history(engine)} duplicate asset_history rows")
+        applied = apply_migrations(engine)
+        print(f"{url}: {'applied ' + ', '.join(applied) if applied else 'already up to date'}")
+        engine.dispose()
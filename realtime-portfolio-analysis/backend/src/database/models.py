@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Date, Text, JSON, ForeignKey, func, select, TIMESTAMP
+from sqlalchemy import Column, Integer, String, Float, Date, Text, JSON, ForeignKey, func, select, insert, Index, TIMESTAMP
 from sqlalchemy.orm import relationship, Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.hybrid import hybrid_property
 from src.database.database import Base
 from datetime import date
@@ -46,6 +47,9 @@ class AssetType(Base):
 
 class AssetSector(Base):
     __tablename__ = 'asset_sector'
+    __table_args__ = (
+        Index('ix_asset_sector_asset_id', 'asset_id'),
+    )
 
     asset_sec_id = Column(Integer, primary_key=True)
     asset_id = Column(Integer, ForeignKey('asset_type.asset_id', ondelete='CASCADE'), nullable=False)
@@ -55,44 +59,108 @@ class AssetSector(Base):
 
 class AssetHistory(Base):
     __tablename__ = 'asset_history'
+    __table_args__ = (
+        # One price per asset and day; conflict target of the bulk upsert
+        Index('uq_asset_history_asset_id_date', 'asset_id', 'date', unique=True),
+    )
 
     asset_hist_id = Column(Integer, primary_key=True)
     asset_id = Column(Integer, ForeignKey('asset_type.asset_id', ondelete='CASCADE'), nullable=False)
     date = Column(Date, nullable=False, default=date.today)
     close_price = Column(Float, nullable=False)
 
+class AssetLatestPrice(Base):
+    """
+    Latest close price per asset, materialized from asset_history.
+
+    Kept in sync by the asset history refresh scripts through `rebuild`, so
+    readers get the current price with a single keyed lookup instead of a
+    max(date) aggregate over the whole history table.
+    """
+    __tablename__ = 'asset_latest_price'
+
+    asset_id = Column(Integer, ForeignKey('asset_type.asset_id', ondelete='CASCADE'), primary_key=True)
+    date = Column(Date, nullable=False)
+    close_price = Column(Float, nullable=False)
+
     @classmethod
-    def get_extended_data(cls, session: Session, user_id: int):
-        user_portfolio = session.query(
-            UserPortfolio.asset_id,
-            UserPortfolio.asset_total_units
-        ).filter(UserPortfolio.user_id == user_id).subquery()
-
-        query = (
-            session.query(
-                cls.asset_hist_id,
-                cls.asset_id,
-                cls.date,
-                cls.close_price,
-                AssetType.asset_class,
-                AssetType.asset_name,
-                AssetType.concentration,
-                AssetType.asset_manager,
-                AssetType.category,
-                AssetType.asset_ticker.label('ticker'),
-                AssetSector.sector_name.label('sector'),
-                AssetSector.sector_weightage,
-                user_portfolio.c.asset_total_units
-            )
-            .join(AssetType, cls.asset_id == AssetType.asset_id)
-            .outerjoin(AssetSector, AssetType.asset_id == AssetSector.asset_id)
-            .join(user_portfolio, cls.asset_id == user_portfolio.c.asset_id)
-        )
+    def rebuild(cls, session: Session):
+        """
+        Recompute the table from asset_history in one INSERT ... SELECT and commit.
+
+        Returns:
+            int: Number of assets with a latest price
+        """
+        # SQLite takes the bare close_price column from the row holding max(date)
+        latest = select(
+            AssetHistory.asset_id,
+            func.max(AssetHistory.date),
+            AssetHistory.close_price
+        ).group_by(AssetHistory.asset_id)
+
+        session.query(cls).delete()
+        session.execute(insert(cls).from_select(['asset_id', 'date', 'close_price'], latest))
+        session.commit()
+        return session.query(func.count(cls.asset_id)).scalar()
 
-        return query.all()
+    @classmethod
+    def get_prices(cls, session: Session, asset_ids):
+        """Return a mapping of asset_id to latest close price for `asset_ids`."""
+        rows = session.query(cls.asset_id, cls.close_price).filter(cls.asset_id.in_(list(asset_ids))).all()
+        return {asset_id: close_price for asset_id, close_price in rows}
+
+    @classmethod
+    def ensure_table(cls, engine):
+        """Create the table if missing and populate it when it is empty but history exists."""
+        cls.__table__.create(bind=engine, checkfirst=True)
+        session = Session(bind=engine)
+        try:
+            if session.query(cls.asset_id).first() is None and session.query(AssetHistory.asset_hist_id).first() is not None:
+                cls.rebuild(session)
+        finally:
+            session.close()
+
+class AssetHistoryWatermark(Base):
+    """
+    Per-asset record of the asset history refresh: the newest date stored,
+    where the last download started and how many rows it wrote.
+
+    The incremental refresh plans its downloads from asset_history itself;
+    this table shows how far each ticker got and when.
+    """
+    __tablename__ = 'asset_history_watermark'
+
+    asset_id = Column(Integer, ForeignKey('asset_type.asset_id', ondelete='CASCADE'), primary_key=True)
+    ticker = Column(String(10), nullable=False)
+    last_date = Column(Date, nullable=True)
+    requested_from = Column(Date, nullable=True)
+    rows_written = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(TIMESTAMP, nullable=False, default=func.now())
+
+    @classmethod
+    def record(cls, session: Session, rows):
+        """
+        Insert or replace watermarks and commit.
+
+        Args:
+            rows: dicts with asset_id, ticker, last_date, requested_from and rows_written
+        """
+        if not rows:
+            return
+        statement = sqlite_insert(cls).values([{**row, "refreshed_at": func.now()} for row in rows])
+        statement = statement.on_conflict_do_update(
+            index_elements=[cls.asset_id],
+            set_={column: statement.excluded[column]
+                  for column in ("ticker", "last_date", "requested_from", "rows_written", "refreshed_at")},
+        )
+        session.execute(statement)
+        session.commit()
 
 class UserPortfolio(Base):
     __tablename__ = 'user_portfolio'
+    __table_args__ = (
+        Index('ix_user_portfolio_user_id_asset_id', 'user_id', 'asset_id'),
+    )
 
     user_port_id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
@@ -104,15 +172,13 @@ class UserPortfolio(Base):
     @hybrid_property
     def latest_close_price(self):
         session = Session.object_session(self)
-        latest_price = session.query(AssetHistory.close_price).filter(AssetHistory.asset_id == self.asset_id).order_by(AssetHistory.date.desc()).first()
-        return latest_price[0] if latest_price else None
+        latest_price = session.get(AssetLatestPrice, self.asset_id)
+        return latest_price.close_price if latest_price else None
 
     @latest_close_price.expression
     def latest_close_price(cls):
-        return select(AssetHistory.close_price)\
-            .where(AssetHistory.asset_id == cls.asset_id)\
-            .order_by(AssetHistory.date.desc())\
-            .limit(1)\
+        return select(AssetLatestPrice.close_price)\
+            .where(AssetLatestPrice.asset_id == cls.asset_id)\
             .scalar_subquery()
 
     @hybrid_property
@@ -194,6 +260,9 @@ class RelativeBenchmark(Base):
 
 class OrderBook(Base):
     __tablename__ = 'order_book'
+    __table_args__ = (
+        Index('ix_order_book_user_id_status_side', 'user_id', 'order_status', 'buy_sell'),
+    )
 
     order_id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
@@ -214,6 +283,9 @@ class OrderBook(Base):
 
 class UserBankAccount(Base):
     __tablename__ = 'user_bank_accounts'
+    __table_args__ = (
+        Index('ix_user_bank_accounts_user_id', 'user_id'),
+    )
 
     bank_account_id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
@@ -221,4 +293,41 @@ class UserBankAccount(Base):
     account_number = Column(String(20), nullable=False)  # Masked format: ***1234
     account_type = Column(String(50), nullable=False)  # Checking, Savings, Money Market
     available_balance = Column(Float, nullable=False, default=0.0)
-    is_active = Column(Integer, nullable=False, default=1)  # 1 for active, 0 for inactive
\ No newline at end of file
+    is_active = Column(Integer, nullable=False, default=1)  # 1 for active, 0 for inactive
+
+class DataVersion(Base):
+    """
+    Version counters for data sets the server caches in memory.
+
+    Scripts that rewrite a data set call `bump`; in-process caches remember the
+    version they loaded and reload once `get` returns a different one.
+    """
+    __tablename__ = 'data_version'
+
+    REFERENCE_DATA = 'reference_data'  # asset_type, asset_sector, benchmarks and risk mappings
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, nullable=False, default=func.now(), onupdate=func.now())
+
+    @classmethod
+    def get(cls, session: Session, name: str) -> int:
+        """Current version of a data set, 0 when it was never bumped."""
+        return session.query(cls.version).filter(cls.name == name).scalar() or 0
+
+    @classmethod
+    def bump(cls, session: Session, name: str = REFERENCE_DATA) -> int:
+        """
+        Increment the version of a data set and commit.
+
+        Returns:
+            int: The new version
+        """
+        cls.__table__.create(bind=session.get_bind(), checkfirst=True)
+        row = session.get(cls, name)
+        if row is None:
+            row = cls(name=name, version=0)
+            session.add(row)
+        row.version += 1
+        session.commit()
+        return row.version
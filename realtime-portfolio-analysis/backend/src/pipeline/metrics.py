@@ -0,0 +1,323 @@
+"""
+Latency histograms and counters for the voice tools and REST endpoints,
+exported in the Prometheus text format on /metrics (see main.py).
+
+Every tool call and HTTP request runs inside a `Timing`, held in a context
+variable, that accumulates the time spent in each phase:
+
+    db             SQL statements, from the engine events installed by install_query_timing
+    upstream       quote fetches on a quote cache miss
+    serialization  JSON encoding of websocket frames and response bodies
+    ws_send        writing frames to the client websocket
+    compute        the rest of the call: pandas, Python, waiting on the loop
+
+The context variable follows the call onto the tool executor's worker thread
+(the wrapper is applied inside the offloaded handler), onto the QuoteEngine
+pool (symbols are submitted in a copy of the caller's context) and back onto
+the server loop for loop_bound coroutines, which asyncio runs in a copy of the
+caller's context. Work done outside a tool call or request is not attributed.
+"""
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.responses import JSONResponse
+
+PHASES = ("db", "upstream", "serialization", "ws_send", "compute")
+
+# Seconds; spans a cached lookup to a slow upstream fetch
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects it."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = TIME_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], list] = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets + ("+Inf",), series):
+                    bucket_labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-1])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-2]}")
+        return lines
+
+
+class Timing:
+    """Per-phase time of one tool call or request; see the module docstring."""
+
+    def __init__(self, caller: str):
+        self.caller = caller
+        self.started = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.cache_lookups: Dict[Tuple[str, str], int] = {}  # (cache, result) -> count
+        self._thread_phases: Dict[int, str] = {}  # thread ident -> phase open on that thread
+        self._open_counts: Dict[str, int] = {}  # phase -> threads currently inside it
+        self._open_since: Dict[str, float] = {}  # phase -> when the first of them entered
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases[phase] += seconds
+
+    def in_phase(self) -> bool:
+        """Whether the calling thread is inside a phase of this timing."""
+        with self._lock:
+            return threading.get_ident() in self._thread_phases
+
+    def enter(self, phase: str) -> bool:
+        """
+        Open `phase` on the calling thread; False when the thread already has
+        one open, in which case the outer phase keeps the time.
+        """
+        ident = threading.get_ident()
+        with self._lock:
+            if ident in self._thread_phases:
+                return False
+            self._thread_phases[ident] = phase
+            if not self._open_counts.get(phase):
+                self._open_since[phase] = time.perf_counter()
+            self._open_counts[phase] = self._open_counts.get(phase, 0) + 1
+            return True
+
+    def exit(self, phase: str):
+        """
+        Close the calling thread's phase. Threads inside the same phase at
+        once (e.g. parallel quote fetches) count their wall-clock union once.
+        """
+        with self._lock:
+            self._thread_phases.pop(threading.get_ident(), None)
+            self._open_counts[phase] -= 1
+            if not self._open_counts[phase]:
+                self.phases[phase] += time.perf_counter() - self._open_since.pop(phase)
+
+    def count_cache(self, cache: str, result: str):
+        with self._lock:
+            self.cache_lookups[(cache, result)] = self.cache_lookups.get((cache, result), 0) + 1
+
+    def finish(self) -> Tuple[float, Dict[str, float]]:
+        """
+        Total seconds and the per-phase split, compute being whatever no other
+        phase claimed; also flushes the cache lookups under `caller`.
+        """
+        total = time.perf_counter() - self.started
+        phases = dict(self.phases)
+        phases["compute"] = max(0.0, total - sum(v for k, v in phases.items() if k != "compute"))
+        for (cache, result), count in self.cache_lookups.items():
+            metrics_registry.cache_requests.inc(count, cache=cache, result=result, caller=self.caller)
+        return total, phases
+
+
+_current_timing: ContextVar[Optional[Timing]] = ContextVar("metrics_timing", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Attribute the time spent in the block to phase `name` of the current tool
+    call or request. A phase nested in another on the same thread (e.g. a
+    query run while serializing) is counted once, in the outer phase; the
+    same phase open on several threads at once is counted by wall clock.
+    """
+    timing = _current_timing.get()
+    if timing is None or not timing.enter(name):
+        yield
+        return
+    try:
+        yield
+    finally:
+        timing.exit(name)
+
+
+class MetricsRegistry:
+    """The process-wide tool, endpoint and cache metrics."""
+
+    def __init__(self):
+        self.tool_duration = Histogram("rtpa_tool_duration_seconds", "Voice tool handler run time.", ("tool",))
+        self.tool_phase = Histogram("rtpa_tool_phase_seconds", "Voice tool handler run time per phase.",
+                                    ("tool", "phase"))
+        self.tool_queue_wait = Histogram("rtpa_tool_queue_wait_seconds",
+                                         "Time an offloaded tool call waited for a tool executor worker.", ("tool",))
+        self.tool_errors = Counter("rtpa_tool_errors_total", "Voice tool handlers that raised.", ("tool",))
+        self.http_duration = Histogram("rtpa_http_request_duration_seconds", "REST request time up to the response start.",
+                                       ("method", "endpoint"))
+        self.http_phase = Histogram("rtpa_http_request_phase_seconds", "REST request time per phase.",
+                                    ("method", "endpoint", "phase"))
+        self.http_errors = Counter("rtpa_http_errors_total", "REST requests answered with a 5xx status or an exception.",
+                                   ("method", "endpoint", "status"))
+        self.cache_requests = Counter("rtpa_cache_requests_total",
+                                      "Cache lookups by result; caller is the tool name or the REST endpoint.",
+                                      ("cache", "result", "caller"))
+
+    def render(self) -> str:
+        families = [self.tool_duration, self.tool_phase, self.tool_queue_wait, self.tool_errors,
+                    self.http_duration, self.http_phase, self.http_errors, self.cache_requests]
+        return "\n".join(line for family in families for line in family.render()) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+def instrument_tool(name: str, handler: Callable) -> Callable:
+    """
+    Wrap a `FunctionCallParams` tool handler so each call records its duration,
+    phase split and errors under `tool=name`. Apply it before offloading, so
+    the timing covers the run on the worker thread and not the queue wait.
+    """
+
+    @functools.wraps(handler)
+    async def wrapper(params):
+        timing = Timing(name)
+        token = _current_timing.set(timing)
+        try:
+            return await handler(params)
+        except BaseException:
+            metrics_registry.tool_errors.inc(tool=name)
+            raise
+        finally:
+            _current_timing.reset(token)
+            total, phases = timing.finish()
+            metrics_registry.tool_duration.observe(total, tool=name)
+            for phase_name, seconds in phases.items():
+                metrics_registry.tool_phase.observe(seconds, tool=name, phase=phase_name)
+
+    return wrapper
+
+
+def observe_queue_wait(name: str, seconds: float):
+    metrics_registry.tool_queue_wait.observe(seconds, tool=name)
+
+
+def count_cache(cache: str, hit: bool):
+    """Count a lookup in `cache` against the current tool or endpoint ("other" outside both)."""
+    result = "hit" if hit else "miss"
+    timing = _current_timing.get()
+    if timing is None:
+        metrics_registry.cache_requests.inc(cache=cache, result=result, caller="other")
+    else:
+        # Counted when the call finishes: a request's route is only known then
+        timing.count_cache(cache, result)
+
+
+def install_query_timing(engine):
+    """Attribute the execution time of every statement on a (sync) engine to the db phase."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_query_started"].pop()
+        timing = _current_timing.get()
+        if timing is not None and not timing.in_phase():
+            timing.add("db", time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("metrics_query_started"):
+            connection.info["metrics_query_started"].pop()
+
+
+def dumps_json(data) -> str:
+    """Encode a websocket frame the way WebSocket.send_json does, timed as serialization."""
+    with phase("serialization"):
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse whose body encoding is timed as serialization; the app's default response class."""
+
+    def render(self, content) -> bytes:
+        with phase("serialization"):
+            return super().render(content)
+
+
+async def http_metrics_middleware(request, call_next):
+    """HTTP middleware timing every request under its route template, e.g. /api/stock/{symbol}."""
+    if request.url.path == "/metrics":
+        return await call_next(request)
+    timing = Timing("")
+    token = _current_timing.set(timing)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        _current_timing.reset(token)
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        timing.caller = f"{request.method} {endpoint}"
+        total, phases = timing.finish()
+        metrics_registry.http_duration.observe(total, method=request.method, endpoint=endpoint)
+        for phase_name, seconds in phases.items():
+            metrics_registry.http_phase.observe(seconds, method=request.method, endpoint=endpoint, phase=phase_name)
+        if status >= 500:
+            metrics_registry.http_errors.inc(method=request.method, endpoint=endpoint, status=status)
@@ -0,0 +1,338 @@
+"""
+Lightweight in-process tracing of voice sessions, exported as JSON lines.
+
+A span is one timed operation. Each websocket session is the root span of a
+trace whose id is its connection_uuid. Tool calls are its children, and the
+SQL statements, quote fetches and RAG requests made during a tool call are
+children of the tool's span. The current span is held in a context variable,
+so concurrent sessions never share spans. The tool executor and the
+QuoteEngine pool copy the caller's context onto their worker threads, so a
+tool call or quote fetch run there keeps its parent.
+
+Finished spans are appended to TRACE_FILE, one JSON object per line:
+
+    {"trace_id", "span_id", "parent_id", "name", "kind", "start", "duration_ms",
+     "status", "error", "thread", "attributes"}
+
+Tracing is off unless TRACE_FILE is set, e.g. TRACE_FILE=logs/traces.jsonl.
+When it is off no spans are created and each instrumented call costs one
+check. When it is on, each tool call, statement and quote fetch costs the
+calling thread one span, 25-35 us (measured by benchmarks.check_tracing).
+Serialization and file writes happen on a background writer thread, so the
+event loop and the aiosqlite threads never wait on the disk. At most
+TRACE_QUEUE_SIZE spans (default 10000) wait for the writer; spans finished
+while it is full are dropped and counted. The file is rotated to
+TRACE_FILE.1 once it exceeds TRACE_MAX_BYTES (default 50 MB). Print the
+slowest spans, or one session's span tree, with
+
+    python -m src.pipeline.tracing --top 20 --kind tool
+    python -m src.pipeline.tracing --trace <connection_uuid>
+"""
+import argparse
+import atexit
+import functools
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from sqlalchemy import event
+
+# Arguments that identify the caller; every other argument is recorded by name only
+_RECORDED_ARGUMENTS = ("user_id", "symbol", "ticker", "order_id", "aggregation_metric", "time_history")
+
+
+class Span:
+    """One timed operation; create them with start_span, span or child_span."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "attributes", "start", "error",
+                 "_started", "_token")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start = time.time()
+        self.error = None
+        self._started = time.perf_counter()
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, duration_ms: float) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start, 6),
+            "duration_ms": round(duration_ms, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "thread": threading.current_thread().name,
+            "attributes": self.attributes,
+        }
+
+
+class SpanExporter:
+    """
+    Appends finished spans to a JSON lines file from a background writer
+    thread; export only enqueues, so it is safe and cheap to call from any
+    thread, including the event loop.
+
+    Args:
+        path: File to append to; None or empty disables export
+        max_bytes: Size after which the file is rotated to `path`.1
+        max_queue: Spans waiting for the writer beyond which new ones are dropped
+    """
+
+    def __init__(self, path: Optional[str], max_bytes: int = 50 * 1024 * 1024, max_queue: int = 10000):
+        self.path = path or None
+        self.max_bytes = max_bytes
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._writer = None
+        self._file = None
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counters = {"exported": 0, "dropped": 0, "rotations": 0, "errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def export(self, record: Dict[str, Any]):
+        if self._writer is None:
+            self._start_writer()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._counters["dropped"] += 1
+
+    def flush(self):
+        """Block until every span exported so far is written to the file."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            try:
+                self._write(json.dumps(record, default=str) + "\n")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, line: str):
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+                self._size = self._file.tell()
+            elif self._size > self.max_bytes:
+                self._file.close()
+                os.replace(self.path, f"{self.path}.1")
+                self._file = open(self.path, "a", encoding="utf-8")
+                self._size = 0
+                with self._lock:
+                    self._counters["rotations"] += 1
+            self._file.write(line)
+            self._size += len(line)
+            # Flush whenever the writer catches up, so the file trails the spans by one batch
+            if self._queue.empty():
+                self._file.flush()
+            with self._lock:
+                self._counters["exported"] += 1
+        except OSError:
+            with self._lock:
+                self._counters["errors"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "queued": self._queue.qsize(), "path": self.path, "size_bytes": self._size}
+
+
+span_exporter = SpanExporter(os.getenv("TRACE_FILE", ""),
+                             max_bytes=int(os.getenv("TRACE_MAX_BYTES", str(50 * 1024 * 1024))),
+                             max_queue=int(os.getenv("TRACE_QUEUE_SIZE", "10000")))
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _new_span(name: str, kind: str, trace_id: Optional[str], attributes: Dict[str, Any]) -> Span:
+    parent = _current_span.get()
+    if trace_id is None:
+        trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex
+    return Span(name, kind, trace_id, parent.span_id if parent is not None else None, attributes)
+
+
+def _finish(span: Span, error: Optional[BaseException] = None):
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+    span_exporter.export(span.to_dict((time.perf_counter() - span._started) * 1000))
+
+
+def start_span(name: str, kind: str = "internal", trace_id: str = None, **attributes) -> Optional[Span]:
+    """
+    Open a span and make it the current one, for code that cannot use a with
+    block (e.g. a span covering a long try/finally). Close it with end_span
+    in the same task. Returns None when tracing is disabled.
+
+    Args:
+        name: Span name, e.g. the tool name
+        kind: Span category: session, tool, sql, quote, rag
+        trace_id: Start a trace with this id instead of joining the current one
+        **attributes: JSON-serializable details recorded with the span
+    """
+    if not span_exporter.enabled:
+        return None
+    span = _new_span(name, kind, trace_id, attributes)
+    span._token = _current_span.set(span)
+    return span
+
+
+def end_span(span: Optional[Span], error: Optional[BaseException] = None):
+    """Close a span opened with start_span, restoring its parent as the current span."""
+    if span is None:
+        return
+    _current_span.reset(span._token)
+    _finish(span, error)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", trace_id: str = None, **attributes) -> Iterator[Optional[Span]]:
+    """Trace the block as a span, a child of the current one if any; see start_span."""
+    opened = start_span(name, kind, trace_id, **attributes)
+    try:
+        yield opened
+    except BaseException as e:
+        end_span(opened, e)
+        raise
+    else:
+        end_span(opened)
+
+
+@contextmanager
+def child_span(name: str, kind: str, **attributes) -> Iterator[Optional[Span]]:
+    """Like span, but only inside a trace: work outside any session or tool call is not recorded."""
+    if _current_span.get() is None:
+        yield None
+        return
+    with span(name, kind, **attributes) as opened:
+        yield opened
+
+
+def trace_tool(name: str, handler: Callable) -> Callable:
+    """Wrap a `FunctionCallParams` tool handler so each call is a span of kind "tool"."""
+
+    @functools.wraps(handler)
+    async def wrapper(params):
+        arguments = params.arguments or {}
+        recorded = {key: arguments[key] for key in _RECORDED_ARGUMENTS if key in arguments}
+        with span(name, "tool", arguments=sorted(arguments), **recorded):
+            return await handler(params)
+
+    return wrapper
+
+
+def install_query_tracing(engine):
+    """Record every statement run on a (sync) engine inside a trace as a child span of kind "sql"."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get() if span_exporter.enabled else None
+        query_span = None
+        if parent is not None:
+            query_span = _new_span("sql", "sql", None, {"statement": re.sub(r"\s+", " ", statement)[:200],
+                                                        "executemany": executemany})
+        conn.info.setdefault("trace_query_spans", []).append(query_span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        query_span = conn.info["trace_query_spans"].pop()
+        if query_span is not None:
+            _finish(query_span)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("trace_query_spans"):
+            query_span = connection.info["trace_query_spans"].pop()
+            if query_span is not None:
+                _finish(query_span, exception_context.original_exception)
+
+
+def _read_spans(path: str) -> Iterator[Dict[str, Any]]:
+    for candidate in (f"{path}.1", path):
+        if os.path.exists(candidate):
+            with open(candidate, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+def _describe(record: Dict[str, Any]) -> str:
+    attributes = record["attributes"]
+    detail = attributes.get("statement") or attributes.get("symbol") or attributes.get("user_id") or ""
+    error = f"  ERROR {record['error']}" if record["error"] else ""
+    return f"{record['name']} {detail}".strip() + error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the slowest traced spans, or the span tree of one session.")
+    parser.add_argument("--file", default=span_exporter.path or os.path.join("logs", "traces.jsonl"))
+    parser.add_argument("--top", type=int, default=20, help="Number of spans to print")
+    parser.add_argument("--kind", help="Only spans of this kind: session, tool, sql, quote, rag")
+    parser.add_argument("--name", help="Only spans with this name, e.g. a tool name")
+    parser.add_argument("--trace", help="Print the span tree of this connection_uuid instead")
+    args = parser.parse_args()
+
+    if args.trace:
+        records = sorted((r for r in _read_spans(args.file) if r["trace_id"] == args.trace), key=lambda r: r["start"])
+        children = {}
+        for record in records:
+            children.setdefault(record["parent_id"], []).append(record)
+        known = {record["span_id"] for record in records}
+
+        def print_tree(record, depth):
+            print(f"{record['duration_ms']:>10.1f} ms  {'  ' * depth}{record['kind']:<7} {_describe(record)}")
+            for child in children.get(record["span_id"], []):
+                print_tree(child, depth + 1)
+
+        for record in records:
+            if record["parent_id"] is None or record["parent_id"] not in known:
+                print_tree(record, 0)
+        return
+
+    records = [r for r in _read_spans(args.file)
+               if (not args.kind or r["kind"] == args.kind) and (not args.name or r["name"] == args.name)]
+    records.sort(key=lambda r: r["duration_ms"], reverse=True)
+    print(f"{len(records)} spans in {args.file}\n")
+    print(f"{'ms':>10}  {'kind':<7} {'trace':<12} span")
+    for record in records[:args.top]:
+        print(f"{record['duration_ms']:>10.1f}  {record['kind']:<7} {record['trace_id'][:12]:<12} {_describe(record)}")
+
+
+if __name__ == "__main__":
+    main()
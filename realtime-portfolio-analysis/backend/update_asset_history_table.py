@@ -1,131 +1,59 @@
-import yfinance as yf  
-import pandas as pd  
-from datetime import datetime  
-from dateutil.relativedelta import relativedelta  
-from curl_cffi import requests  
+import argparse
+from src.components.history_refresh import HistoryRefreshResult, refresh_history
 from src.database.database import SessionLocal  
-from src.database.models import AssetType, AssetHistory 
+from src.database.models import AssetLatestPrice, DataVersion 
 from src.pipeline.logger import logger 
   
-def refresh_asset_history_table():  
-    """  
+def refresh_asset_history(incremental: bool = True, downloader=None) -> HistoryRefreshResult:
+    """
     Update the AssetHistory table to ensure it contains only data for the latest 5 years.  
-    Update existing records or insert new ones, and delete data older than 5 years.  
-    """  
+    Delete data older than 5 years and download only the days missing since the
+    newest stored close (plus a short overlap for revised closes); pass
+    incremental=False to re-download all 5 years.
+
+    Args:
+        incremental: Download only missing days
+        downloader: Replacement for the default MarketDataDownloader, see history_refresh.Downloader
+
+    Returns:
+        HistoryRefreshResult: Rows written and deleted, downloads made and their per-ticker report
+    """
     session = SessionLocal()  
-  
-    # Create a session for yfinance  
-    session_yf = requests.Session(impersonate="chrome")  
-  
-    # Get all non-cash assets from AssetType table  
-    assets = session.query(AssetType).filter(AssetType.asset_ticker != "CASH").all()  
-    if not assets:  
-        print("No non-cash assets found in AssetType table.")  
-        return  
-  
-    tickers = [asset.asset_ticker for asset in assets]  
-    ticker_to_id = {asset.asset_ticker: asset.asset_id for asset in assets}  
-  
-    print(f"Found {len(tickers)} non-cash assets to refresh historical data for.")  
-  
-    # Define the time range for the latest 5 years  
-    end_date = datetime.now()  
-    start_date = end_date - relativedelta(years=5)  
-  
-    # Delete old data beyond the 5-year range  
+    try:
+        logger.bind(frontend=True).info(f"Refreshing asset history ({'incremental' if incremental else 'full 5 years'})")
+        result = refresh_history(session, downloader=downloader, incremental=incremental)
+        logger.bind(frontend=True).info(f"Deleted {result.rows_deleted} old records from AssetHistory table.")
+        for start, end, tickers in result.requests:
+            print(f"Requested {len(tickers)} tickers from {start} to {end}")
+        for ticker, report in result.downloads.items():
+            if report.error:
+                logger.bind(frontend=True).warning(f"Download failed for {ticker} after {report.attempts} attempts: {report.error}")
+            else:
+                print(f"Downloaded {report.rows} records for {ticker} in {report.seconds:.2f}s ({report.attempts} attempts)")
+        if not result.rows_written:
+            return result
+        logger.bind(frontend=True).success(f"Successfully refreshed AssetHistory table with {result.rows_written} new or updated records")
 
-    logger.bind(frontend=True).info(f"Deleting records older than {start_date.date()}")
-    old_records_deleted = session.query(AssetHistory).filter(AssetHistory.date < start_date.date()).delete()  
-    session.commit()  
-    logger.bind(frontend=True).info(f"Deleted {old_records_deleted} old records from AssetHistory table.")  
-  
-    # Download historical data for all tickers  
-    logger.bind(frontend=True).info(f"Downloading historical data for all tickers from {start_date.date()} to {end_date.date()}")  
-    historical_data = {}  
-  
-    for ticker in tickers:  
-        try:  
-            if ticker == 'SPX':  
-                ticker = '^SPX'  # Use S&P 500 index ticker for SPX  
-            data = yf.download(ticker, start=start_date, end=end_date, session=session_yf)  
-  
-            ticker = ticker.replace('^', '')  # Clean up ticker for consistency  
-            if not data.empty:  
-                historical_data[ticker] = data  
-                print(f"Successfully downloaded data for {ticker}: {len(data)} records")  
-            else:  
-                print(f"No data available for {ticker}")  
-        except Exception as e:  
-            print(f"Failed to download data for {ticker}: {str(e)}")  
-  
-    if not historical_data:  
-        print("No historical data could be downloaded for any ticker.")  
-        return  
-  
-    # Find the most recent common date across all tickers  
-    valid_tickers = list(historical_data.keys())  
-    common_dates = set(historical_data[valid_tickers[0]].index)  
-    for ticker in valid_tickers[1:]:  
-        ticker_dates = set(historical_data[ticker].index)  
-        common_dates.intersection_update(ticker_dates)  
-  
-    if not common_dates:  
-        print("No common dates found across all tickers.")  
-        return  
-  
-    most_recent_common_date = max(common_dates)  
-    print(f"Most recent common date across all tickers: {most_recent_common_date.date()}")  
-  
-    # Update historical data in the database  
-    total_records = 0  
-  
-    for ticker in valid_tickers:  
-        asset_id = ticker_to_id.get(ticker)  
-        if not asset_id:  
-            print(f"No asset_id found for ticker {ticker}, skipping.")  
-            continue  
-  
-        # Filter data up to the most recent common date  
-        ticker_data = historical_data[ticker].loc[:most_recent_common_date]  
-        records_count = 0  
-  
-        for date_idx, row in ticker_data.iterrows():  
-            close_price = row['Close']  
-  
-            if float(close_price) != 0:  
-                # Check if a record for the same asset_id and date already exists  
-                existing_record = session.query(AssetHistory).filter_by(  
-                    asset_id=asset_id, date=date_idx.date()  
-                ).first()  
-  
-                if existing_record:  
-                    # Update the existing record  
-                    existing_record.close_price = float(close_price)  
-                    session.add(existing_record)  
-                else:  
-                    # Insert a new record  
-                    history_entry = AssetHistory(  
-                        asset_id=asset_id,  
-                        date=date_idx.date(),  
-                        close_price=float(close_price)  # Ensure it's a float  
-                    )  
-                    session.add(history_entry)  
-  
-                records_count += 1  
-                total_records += 1  
-        
-        print(f"Prepared {records_count} historical records for {ticker}")  
-  
-        # Commit in batches to avoid memory issues  
-        if total_records % 1000 == 0:  
-            session.commit()  
-            logger.bind(frontend=True).info(f"Committed {total_records} records so far")
-            print(f"Committed {total_records} records so far")  
-  
-    # Final commit for any remaining records  
-    session.commit()  
-    logger.bind(frontend=True).success(f"Successfully refreshed AssetHistory table with {total_records} new or updated records")
-    print(f"Successfully refreshed AssetHistory table with {total_records} new or updated records")  
+        # Keep the latest price table in step with the refreshed history
+        latest_count = AssetLatestPrice.rebuild(session)
+        print(f"Rebuilt AssetLatestPrice table for {latest_count} assets")
+        # Servers reload their reference catalog on the next version check
+        DataVersion.bump(session)
+        return result
+    finally:
+        session.close()
+
+def refresh_asset_history_table(incremental: bool = True, downloader=None):  
+    """  
+    Run refresh_asset_history.
+
+    Returns:
+        date: Earliest date that was inserted or updated, or None when nothing was written
+    """  
+    return refresh_asset_history(incremental, downloader).since
   
 if __name__ == "__main__":  
-    refresh_asset_history_table()  
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Refresh the asset_history table from Yahoo Finance")
+    parser.add_argument("--full", action="store_true", help="Re-download all 5 years instead of only missing days")
+    args = parser.parse_args()
+    refresh_asset_history_table(incremental=not args.full)
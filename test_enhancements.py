@@ -8,14 +8,24 @@ Tests:
 3. Demo database structure
 """
 
+import os
 import sys
-sys.path.insert(0, '/Users/kabeerthockchom/PortfolioAIEY/realtime-portfolio-analysis/backend')
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(REPO_ROOT, 'realtime-portfolio-analysis', 'backend')
+sys.path.insert(0, BACKEND_DIR)
+# The default database URL is relative to the backend directory
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(BACKEND_DIR, 'src', 'database', 'voicebot.sqlite3')}")
 
 from src.components.helper_functions import get_latest_db_price, get_realtime_stock_price
-from src.database.database import SessionLocal
+from src.database.database import SessionLocal, engine
+from src.database.migrations import apply_migrations
 from src.database.models import UserBankAccount, AssetType, AssetHistory
 import sqlite3
 
+# Add the tables the app creates on startup (e.g. asset_latest_price, read by get_latest_db_price)
+apply_migrations(engine)
+
 print("=" * 60)
 print("Portfolio Analysis Enhancements - Test Suite")
 print("=" * 60)
@@ -70,7 +80,7 @@ try:
         print(f"  • {acc.bank_name} ({acc.account_type}): ${acc.available_balance:,.2f}")
 
     # Check clean database
-    clean_db_path = "/Users/kabeerthockchom/PortfolioAIEY/demo/voicebot_clean.sqlite3"
+    clean_db_path = os.path.join(REPO_ROOT, "demo", "voicebot_clean.sqlite3")
     conn = sqlite3.connect(clean_db_path)
     cursor = conn.cursor()
 